@@ -0,0 +1,112 @@
+"""
+컨텍스트 전략(raw / summary / summary_topk)별 하위 에이전트 프롬프트 크기와 지연시간 비교
+
+    python -m benchmark.context_strategies --iterations 3 --llm-latency-per-1k 0.4 --ddg-body-chars 1500
+
+AnalysisAgent, PortfolioAgent 에 같은 전략을 적용해 그래프 전체를 실행하고,
+에이전트별 LLM 입력 크기(문자/토큰), LLM 호출 p50, 리포트 1건당 입력 토큰 합계와 e2e p50 을 출력합니다.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+# DB 모듈 import 전에 임시 DB 경로를 지정
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(prefix="finance_ctx_"), "ctx.db"))
+
+DOWNSTREAM_AGENTS = ["AnalysisAgent", "PortfolioAgent"]
+
+
+def _strategy_env(agent_name: str) -> str:
+    from common.context_builder import _camel_to_snake
+    return f"CONTEXT_STRATEGY_{_camel_to_snake(agent_name)}"
+
+
+def run_strategy(strategy: str, iterations: int) -> Dict[str, Any]:
+    from benchmark.run_benchmark import run_e2e
+    from common.llm_cache import clear_llm_caches
+    from common.metrics import metrics_registry
+
+    for agent_name in DOWNSTREAM_AGENTS:
+        os.environ[_strategy_env(agent_name)] = strategy
+
+    clear_llm_caches()
+    run_e2e()  # 워밍업
+    metrics_registry.reset()
+
+    samples: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run_e2e()
+        samples.append(time.perf_counter() - start)
+
+    agents = {}
+    for row in metrics_registry.snapshot():
+        if row["stage"] != "llm" or "purpose" in row["labels"]:
+            continue
+        count = row["count"] or 1
+        agents[row["labels"].get("agent")] = {
+            "input_chars": row["input_size"] // count,
+            "input_tokens": row["input_tokens"] // count,
+            "output_tokens": row["output_tokens"] // count,
+            "llm_p50_ms": round(row["p50_sec"] * 1000, 2),
+        }
+
+    samples.sort()
+    return {
+        "agents": agents,
+        "report_input_tokens": sum(a["input_tokens"] for a in agents.values()),
+        "downstream_input_tokens": sum(agents.get(name, {}).get("input_tokens", 0) for name in DOWNSTREAM_AGENTS),
+        "e2e_p50_ms": round(samples[len(samples) // 2] * 1000, 2),
+    }
+
+
+def main() -> int:
+    from benchmark.fakes import add_fake_arguments, fake_config_from_args, patch_external_services
+    from common.constants import ContextStrategy
+
+    parser = argparse.ArgumentParser(description="컨텍스트 전략별 프롬프트 크기/지연 비교")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--strategies", default=",".join(s.value for s in ContextStrategy))
+    parser.add_argument("--ddg-body-chars", type=int, default=1500, help="가짜 검색 결과 본문 길이")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+
+    strategies = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    unknown = set(strategies) - {s.value for s in ContextStrategy}
+    if unknown:
+        print(f"알 수 없는 전략: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    fake_config = fake_config_from_args(args)
+    fake_config.ddg_body_chars = args.ddg_body_chars
+
+    results = {}
+    with patch_external_services(fake_config):
+        for strategy in strategies:
+            results[strategy] = run_strategy(strategy, args.iterations)
+
+    raw = results.get(ContextStrategy.Raw.value)
+    if raw and raw["downstream_input_tokens"]:
+        for result in results.values():
+            result["downstream_reduction"] = round(raw["downstream_input_tokens"] / max(1, result["downstream_input_tokens"]), 2)
+
+    text = json.dumps(
+        {"meta": {"iterations": args.iterations, "fake_config": {k: v for k, v in vars(fake_config).items() if k != "recordings"}},
+         "strategies": results},
+        indent=2, ensure_ascii=False,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
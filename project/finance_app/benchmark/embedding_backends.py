@@ -0,0 +1,108 @@
+"""
+임베딩 백엔드(azure / local)별 검색 단계 지연시간 비교
+
+    python -m benchmark.embedding_backends --iterations 5 --embed-latency 0.3
+    python -m benchmark.embedding_backends --local-model sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2
+
+검색어 생성 → DDG 검색 → 근사 중복 제거 → 임베딩 → FAISS 생성 → 유사도 검색/재순위화(search_topic) 전체를
+백엔드별로 반복 실행하여 p50/p95 와 임베딩 호출 p50 을 출력합니다.
+  azure  가짜 임베딩(benchmark.fakes) + --embed-latency 로 API 왕복 지연을 재현
+  local  실제 로컬 sentence-transformers 모델 (EMBEDDING_BACKEND=local, --local-model / --onnx)
+LLM/DDG/크로스 인코더는 두 백엔드 모두 가짜 구현을 사용하고(제공자 요청 제한은 benchmark.fakes 에서 해제),
+임베딩 외 차이를 없애기 위해 시맨틱 캐시는 끕니다.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List
+from unittest import mock
+
+# DB 모듈 import 전에 임시 DB 경로와 측정 조건을 지정
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(prefix="finance_embed_"), "embed.db"))
+os.environ["LLM_CACHE_ENABLED"] = "false"
+
+BACKENDS = ["azure", "local"]
+
+
+def run_backend(backend: str, iterations: int, get_embeddings: Callable) -> Dict[str, Any]:
+    from benchmark.run_benchmark import CAPITAL, RISK_LEVEL, TOPIC, _summarize
+    from common.metrics import metrics_registry
+    from retrieval import vector_store
+
+    os.environ["EMBEDDING_BACKEND"] = backend
+    with mock.patch.object(vector_store, "get_embeddings", get_embeddings) if backend == "local" else nullcontext():
+        start = time.perf_counter()
+        vector_store.search_topic(TOPIC, CAPITAL, RISK_LEVEL)  # 워밍업 (로컬 모델 로드 포함)
+        warmup = time.perf_counter() - start
+        metrics_registry.reset()
+
+        samples: List[float] = []
+        documents = 0
+        for _ in range(iterations):
+            start = time.perf_counter()
+            documents = len(vector_store.search_topic(TOPIC, CAPITAL, RISK_LEVEL))
+            samples.append(time.perf_counter() - start)
+
+    result = _summarize(samples)
+    result["warmup_ms"] = round(warmup * 1000, 3)
+    result["documents"] = documents
+    for row in metrics_registry.snapshot():
+        if row["stage"] == "embedding" and not row["labels"]:
+            result["embedding_p50_ms"] = round(row["p50_sec"] * 1000, 3)
+            result["embedded_texts"] = row["input_size"] // max(1, row["count"])
+    return result
+
+
+def main() -> int:
+    from benchmark.fakes import add_fake_arguments, fake_config_from_args, patch_external_services
+
+    parser = argparse.ArgumentParser(description="임베딩 백엔드별 검색 지연 비교")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--local-model", help="LOCAL_EMBEDDING_MODEL (모델명 또는 로컬 경로)")
+    parser.add_argument("--batch-size", type=int, help="LOCAL_EMBEDDING_BATCH_SIZE")
+    parser.add_argument("--onnx", action="store_true", help="LOCAL_EMBEDDING_ONNX=true")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        print(f"알 수 없는 백엔드: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+    if args.local_model:
+        os.environ["LOCAL_EMBEDDING_MODEL"] = args.local_model
+    if args.batch_size:
+        os.environ["LOCAL_EMBEDDING_BATCH_SIZE"] = str(args.batch_size)
+    if args.onnx:
+        os.environ["LOCAL_EMBEDDING_ONNX"] = "true"
+
+    # patch_external_services 가 가짜로 바꾸기 전의 백엔드 선택 함수
+    from common.config import get_embeddings
+
+    fake_config = fake_config_from_args(args)
+    results = {}
+    with patch_external_services(fake_config):
+        for backend in backends:
+            results[backend] = run_backend(backend, args.iterations, get_embeddings)
+
+    text = json.dumps(
+        {"meta": {"iterations": args.iterations, "local_model": os.getenv("LOCAL_EMBEDDING_MODEL"), "onnx": args.onnx,
+                  "fake_config": {k: v for k, v in vars(fake_config).items() if k != "recordings"}},
+         "backends": results},
+        indent=2, ensure_ascii=False,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+"""
+외부 서비스(Azure OpenAI, DuckDuckGo, yfinance, 크로스 인코더 모델) 대체용 결정적 가짜 구현
+
+- 같은 입력에는 항상 같은 출력을 반환하므로 실행 간 결과 비교가 가능합니다.
+- 각 가짜 구현은 설정된 지연시간(초)만큼 대기하여 네트워크 비용을 흉내냅니다.
+- recordings 로 실제 응답을 녹화해 둔 JSON 을 넘기면 해당 응답을 우선 사용합니다.
+"""
+import argparse
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, SystemMessage
+
+DEFAULT_TICKERS = "005930.KS, 000660.KS, NVDA, SOXX, ^GSPC"
+DEFAULT_QUERIES = "semiconductor outlook, HBM demand 2025, SOXX ETF flows"
+
+
+@dataclass
+class FakeConfig:
+    """가짜 서비스 지연시간(초)과 출력 크기 설정"""
+    llm_latency: float = 0.0
+    llm_latency_per_1k_tokens: float = 0.0  # 입력 토큰 1천 개당 추가 지연
+    llm_output_chars: int = 1200
+    embed_latency: float = 0.0          # embed_documents/embed_query 호출당
+    embed_dim: int = 1536
+    ddg_latency: float = 0.0            # 쿼리당
+    ddg_body_chars: int = 400
+    ddg_duplicate_ratio: float = 0.0    # 여러 매체에 재배포된 같은 기사 비율 (0~1)
+    yf_latency: float = 0.0             # download 호출당
+    yf_info_latency: float = 0.0        # Ticker.info 조회당
+    yf_throttle_per_sec: int = 0        # 초당 download 호출 한도 (초과 시 Too Many Requests, 0=무제한)
+    cross_encoder_latency: float = 0.0  # 문서 쌍당
+    cross_encoder_busy: bool = False    # 지연을 sleep 대신 GIL 을 잡은 연산으로 재현
+    recordings: Dict[str, Any] = field(default_factory=dict)
+
+
+def add_fake_arguments(parser: argparse.ArgumentParser) -> None:
+    """가짜 서비스 지연시간/녹화 응답 관련 CLI 옵션을 추가합니다."""
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="LLM 호출당 지연(초)")
+    parser.add_argument("--llm-latency-per-1k", type=float, default=0.0, help="LLM 입력 토큰 1천 개당 추가 지연(초)")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="임베딩 호출당 지연(초)")
+    parser.add_argument("--ddg-latency", type=float, default=0.0, help="DDG 쿼리당 지연(초)")
+    parser.add_argument("--ddg-duplicate-ratio", type=float, default=0.0, help="DDG 결과 중 재배포 기사 사본 비율 (0~1)")
+    parser.add_argument("--yf-latency", type=float, default=0.0, help="yf.download 호출당 지연(초)")
+    parser.add_argument("--yf-info-latency", type=float, default=0.0, help="Ticker.info 조회당 지연(초)")
+    parser.add_argument("--yf-throttle-per-sec", type=int, default=0, help="초당 yf.download 호출 한도 (0=무제한)")
+    parser.add_argument("--ce-latency", type=float, default=0.0, help="크로스 인코더 문서 쌍당 지연(초)")
+    parser.add_argument("--ce-busy", action="store_true", help="크로스 인코더 지연을 CPU 연산(GIL 점유)으로 재현")
+    parser.add_argument("--recordings", help="녹화된 LLM/DDG 응답 JSON 경로")
+
+
+def fake_config_from_args(args: argparse.Namespace) -> FakeConfig:
+    """add_fake_arguments 로 파싱한 인자에서 FakeConfig 를 만듭니다."""
+    recordings = {}
+    if args.recordings:
+        with open(args.recordings, encoding="utf-8") as f:
+            recordings = json.load(f)
+    return FakeConfig(
+        llm_latency=args.llm_latency,
+        llm_latency_per_1k_tokens=args.llm_latency_per_1k,
+        embed_latency=args.embed_latency,
+        ddg_latency=args.ddg_latency,
+        ddg_duplicate_ratio=args.ddg_duplicate_ratio,
+        yf_latency=args.yf_latency,
+        yf_info_latency=args.yf_info_latency,
+        yf_throttle_per_sec=args.yf_throttle_per_sec,
+        cross_encoder_latency=args.ce_latency,
+        cross_encoder_busy=args.ce_busy,
+        recordings=recordings,
+    )
+
+
+def _seed(text: str) -> int:
+    return int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "little")
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 3)
+
+
+class FakeLLM:
+    """get_llm() 이 감싸는 채팅 모델 대체. 프롬프트 종류에 따라 결정적인 응답을 반환합니다."""
+
+    def __init__(self, config: FakeConfig):
+        self.config = config
+
+    def _respond(self, messages: List[Any]) -> str:
+        system = next((str(m.content) for m in messages if isinstance(m, SystemMessage)), "")
+        recorded = self.config.recordings.get("llm", {})
+        if "ticker selector" in system:
+            return recorded.get("tickers", DEFAULT_TICKERS)
+        if "search query designer" in system:
+            return recorded.get("queries", DEFAULT_QUERIES)
+        prompt = "".join(str(m.content) for m in messages)
+        rng = np.random.default_rng(_seed(prompt))
+        words = ["시장", "전망", "금리", "반도체", "수요", "리스크", "지표", "변동성", "실적", "환율"]
+        text = " ".join(rng.choice(words, size=max(1, self.config.llm_output_chars // 3)))
+        return recorded.get("agent", text[: self.config.llm_output_chars])
+
+    def _latency(self, messages: List[Any]) -> float:
+        input_tokens = _estimate_tokens("x" * sum(len(str(m.content)) for m in messages))
+        return self.config.llm_latency + self.config.llm_latency_per_1k_tokens * input_tokens / 1000
+
+    def invoke(self, messages: List[Any], **kwargs) -> AIMessage:
+        time.sleep(self._latency(messages))
+        return self._message(messages)
+
+    async def ainvoke(self, messages: List[Any], **kwargs) -> AIMessage:
+        await asyncio.sleep(self._latency(messages))
+        return self._message(messages)
+
+    def _message(self, messages: List[Any]) -> AIMessage:
+        prompt_chars = sum(len(str(m.content)) for m in messages)
+        input_tokens = _estimate_tokens("x" * prompt_chars)
+        content = self._respond(messages)
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": _estimate_tokens(content),
+                "total_tokens": input_tokens + _estimate_tokens(content),
+            },
+        )
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    get_embeddings() 대체. 텍스트 해시 기반의 결정적 단위 벡터를 반환합니다.
+    EMBEDDING_DIMENSIONS 가 설정되면 text-embedding-3 의 dimensions 처럼 앞쪽 차원만 잘라 다시 정규화합니다.
+    """
+
+    def __init__(self, config: FakeConfig):
+        from common.config import get_embedding_dimensions
+
+        self.config = config
+        self.dimensions = get_embedding_dimensions()
+
+    def _vector(self, text: str) -> List[float]:
+        rng = np.random.default_rng(_seed(text))
+        vector = rng.standard_normal(self.config.embed_dim).astype(np.float32)[:self.dimensions]
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.config.embed_latency)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.config.embed_latency)
+        return self._vector(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self.config.embed_latency)
+        return [self._vector(t) for t in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self.config.embed_latency)
+        return self._vector(text)
+
+
+class FakeDDGS:
+    """duckduckgo_search.DDGS 대체"""
+
+    def __init__(self, config: FakeConfig):
+        self.config = config
+
+    def __call__(self, *args, **kwargs) -> "FakeDDGS":
+        return self
+
+    def text(self, query: str, max_results: int = 5, **kwargs) -> List[Dict[str, str]]:
+        time.sleep(self.config.ddg_latency)
+        recorded = self.config.recordings.get("ddg", {})
+        if query in recorded:
+            return recorded[query][:max_results]
+        rng = np.random.default_rng(_seed(query))
+        words = ["market", "chip", "demand", "rate", "earnings", "outlook", "supply", "AI", "memory", "export"]
+        results = []
+        for i in range(max_results):
+            if rng.random() < self.config.ddg_duplicate_ratio:
+                # 쿼리와 무관한 통신사 기사 사본 (매체마다 앞부분 표기만 다름)
+                wire = np.random.default_rng(_seed(f"wire{i}"))
+                body = " ".join(wire.choice(words, size=max(3, self.config.ddg_body_chars // 6)))
+                body = f"[{query[:8]}] {body}"
+            else:
+                body = f"{query}: " + " ".join(rng.choice(words, size=max(3, self.config.ddg_body_chars // 6)))
+            results.append({
+                "title": f"{query} news {i + 1}",
+                "body": body[: self.config.ddg_body_chars],
+                "href": f"https://news.example.com/{_seed(query + str(i)) % 100000}",
+            })
+        return results
+
+
+class FakeYFinance:
+    """yfinance 모듈 대체 (download, Ticker)"""
+
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def _check_throttle(self):
+        # 최근 1초 호출 수가 한도를 넘으면 Yahoo 429 응답을 흉내냄
+        if not self.config.yf_throttle_per_sec:
+            return
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and now - self._calls[0] > 1.0:
+                self._calls.popleft()
+            self._calls.append(now)
+            if len(self._calls) > self.config.yf_throttle_per_sec:
+                raise RuntimeError("Too Many Requests. Rate limited.")
+
+    def download(self, tickers, period: str = "2mo", interval: str = "1d", group_by: str = "column", **kwargs):
+        self._check_throttle()
+        time.sleep(self.config.yf_latency)
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        index = pd.date_range(end="2025-01-31", periods=40, freq="B")
+        frames = {}
+        for ticker in tickers:
+            rng = np.random.default_rng(_seed(ticker))
+            close = 100 + np.cumsum(rng.standard_normal(len(index)))
+            frames[("Close", ticker)] = close
+            frames[("Open", ticker)] = close - rng.standard_normal(len(index))
+        data = pd.DataFrame(frames, index=index)
+        data.columns = pd.MultiIndex.from_tuples(data.columns, names=["Price", "Ticker"])
+        return data
+
+    def Ticker(self, ticker: str):
+        time.sleep(self.config.yf_info_latency)
+        return SimpleNamespace(info={"shortName": f"{ticker} Corp"})
+
+
+class FakeCrossEncoder:
+    """
+    sentence_transformers.CrossEncoder 대체. (query, text) 해시 기반 점수를 반환합니다.
+
+    MiniLM 레이어 수(L-4/L-6/L-12)에 비례해 지연되고, L-6 보다 작은 모델일수록
+    공통 점수에 모델별 잡음이 더 섞입니다. (2단계 재순위화 재현율 비교용)
+    """
+
+    _NOISE = {4: 0.2, 6: 0.0, 12: 0.0}
+
+    def __init__(self, config: FakeConfig, model_name: str = "fake", **kwargs):
+        self.config = config
+        self.model_name = model_name
+        layers = re.search(r"-L-(\d+)", model_name)
+        self.layers = int(layers.group(1)) if layers else 6
+
+    def predict(self, pairs, **kwargs) -> np.ndarray:
+        delay = self.config.cross_encoder_latency * len(pairs) * self.layers / 6
+        if self.config.cross_encoder_busy:
+            # 스레드 CPU 시간 기준이라 다른 스레드와 GIL 을 나눠 쓰면 그만큼 오래 걸림
+            end = time.thread_time() + delay
+            while time.thread_time() < end:
+                pass
+        else:
+            time.sleep(delay)
+        noise = self._NOISE.get(self.layers, 0.0)
+        scores = []
+        for q, t in pairs:
+            score = (_seed(q + t) % 1000) / 1000
+            if noise:
+                score += noise * ((_seed(self.model_name + q + t) % 1000) / 1000 - 0.5) * 2
+            scores.append(min(1.0, max(0.0, score)))
+        return np.array(scores, dtype=np.float32)
+
+
+class _NoopCallbackHandler(BaseCallbackHandler):
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+
+
+@contextmanager
+def patch_external_services(config: Optional[FakeConfig] = None) -> Iterator[FakeConfig]:
+    """
+    파이프라인이 사용하는 외부 서비스를 가짜 구현으로 교체합니다.
+
+    Example:
+        with patch_external_services(FakeConfig(llm_latency=0.5)):
+            create_graph(rag=True).invoke(state)
+    """
+    config = config or FakeConfig()
+    fake_llm = FakeLLM(config)
+    fake_embeddings = FakeEmbeddings(config)
+    fake_yf = FakeYFinance(config)
+
+    from common import resilience
+    from retrieval import cross_encoder_service
+    from retrieval.ticker_recommender import TickerRecommender
+    from retrieval.market_data_broker import MarketDataBroker
+
+    targets = {
+        "common.config._create_llm": lambda: fake_llm,
+        "common.config.get_embeddings": lambda: fake_embeddings,
+        "common.llm_cache.get_embeddings": lambda: fake_embeddings,
+        "retrieval.vector_store.get_embeddings": lambda: fake_embeddings,
+        "retrieval.ticker_recommender.get_embeddings": lambda: fake_embeddings,
+        "retrieval.retrieve_service.DDGS": FakeDDGS(config),
+        "retrieval.market_data_service.yf": fake_yf,
+        "retrieval.market_data_broker.yf": fake_yf,
+        # 워커 프로세스로도 넘길 수 있도록 피클 가능한 partial 사용
+        "retrieval.cross_encoder_service.CrossEncoder": functools.partial(FakeCrossEncoder, config),
+        "workflow.agent.base_agent.CallbackHandler": _NoopCallbackHandler,
+        "workflow.runner.CallbackHandler": _NoopCallbackHandler,
+    }
+
+    with ExitStack() as stack:
+        for target, replacement in targets.items():
+            stack.enter_context(mock.patch(target, replacement))
+        # 이미 로드된 크로스 인코더 싱글톤은 가짜 모델로 다시 생성
+        stack.enter_context(mock.patch.object(cross_encoder_service, "_cross_encoder_service", None))
+        # 티커 추천 인덱스는 가짜 임베딩으로 임시 디렉터리에 생성
+        stack.enter_context(mock.patch.dict(os.environ, {"TICKER_INDEX_DIR": tempfile.mkdtemp(prefix="finance_ticker_index_")}))
+        stack.enter_context(mock.patch.object(TickerRecommender, "_instance", None))
+        stack.enter_context(mock.patch.object(MarketDataBroker, "_instance", None))
+        # 제공자별 요청 제한/서킷 상태는 실행마다 새로 시작하고,
+        # 가짜 제공자 호출이 실제 요청 한도(토큰 버킷 대기)에 막혀 측정되지 않도록 한도를 사실상 해제
+        unlimited = {}
+        for provider in resilience.DEFAULT_PROVIDER_CONFIGS:
+            unlimited[f"PROVIDER_{provider.upper()}_RATE_PER_SEC"] = "1000000"
+            unlimited[f"PROVIDER_{provider.upper()}_BURST"] = "1000000"
+        stack.enter_context(mock.patch.dict(os.environ, unlimited))
+        stack.enter_context(mock.patch.dict(resilience._guards, clear=True))
+        yield config
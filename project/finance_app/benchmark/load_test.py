@@ -0,0 +1,355 @@
+"""
+여러 사용자가 동시에 앱을 사용하는 상황을 컨트롤러 계층에서 재현하는 부하 테스트
+
+    python -m benchmark.load_test --users 8 --sessions 3 --llm-latency 0.3 --ddg-latency 0.2
+
+사용자(스레드)마다 다음 흐름을 반복합니다.
+    1. UserController.on_save_btn       사용자 저장/갱신
+    2. ConvController.on_new_conv_btn   대화 세션 생성
+    3. create_graph(...).stream          에이전트 그래프 실행
+    4. ConvController.insert_session_result  결과 저장
+    5. 이력 목록 조회 + 보기(on_history_detail_btn)
+
+외부 서비스는 benchmark.fakes 의 가짜 구현으로 대체되며, st.session_state 는 스레드별 dict 로 대체됩니다.
+처리량, 단계별 지연 분위수, SQLite 쓰기 대기(잠금 대기 추정치)와 RSS 증가량을 JSON 으로 출력하고,
+실패한 흐름이나 잠금 오류가 있으면 종료 코드 1을 반환합니다.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional
+from unittest import mock
+
+# DB 모듈 import 전에 임시 DB 경로를 지정
+_TMP_DIR = tempfile.mkdtemp(prefix="finance_load_")
+os.environ.setdefault("DB_PATH", os.path.join(_TMP_DIR, "load.db"))
+
+STEPS = ["save_user", "new_conv", "graph", "insert_result", "history"]
+TOPICS = ["반도체 산업 전망", "2차전지 투자 전략", "미국 금리 인하 영향", "배당주 포트폴리오", "AI 인프라 수혜주"]
+_WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE")
+
+
+class _ThreadLocalSessionState(threading.local):
+    """스레드마다 독립된 st.session_state 대체 객체"""
+
+    def __init__(self):
+        self.state: Dict[str, Any] = {}
+
+
+class _FakeStreamlit:
+    """컨트롤러가 사용하는 streamlit 모듈 대체 (session_state 만 제공)"""
+
+    def __init__(self):
+        self._local = _ThreadLocalSessionState()
+
+    @property
+    def session_state(self) -> Dict[str, Any]:
+        return self._local.state
+
+
+def _rss_mb() -> float:
+    """현재 프로세스의 RSS(MB). /proc 이 없으면 최대 RSS 로 대체합니다."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _percentiles(samples: List[float]) -> Dict[str, Any]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p50_ms": round(pick(0.5) * 1000, 2),
+        "p95_ms": round(pick(0.95) * 1000, 2),
+        "p99_ms": round(pick(0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+class _WriteWaitMonitor:
+    """
+    SQLAlchemy 엔진 이벤트로 쓰기 구문 실행 시간과 잠금 오류를 수집합니다.
+
+    SQLite 는 busy_timeout 동안 잠금을 내부에서 기다리므로, 쓰기 구문 실행 시간을
+    잠금 대기의 근사치로 사용하고 threshold 를 넘는 구문을 잠금 대기로 집계합니다.
+    """
+
+    def __init__(self, engine, threshold_sec: float):
+        from sqlalchemy import event
+
+        self.engine = engine
+        self.threshold_sec = threshold_sec
+        self.samples: List[float] = []
+        self.lock_errors = 0
+        self._lock = threading.Lock()
+        self._event = event
+        self._listeners = [
+            ("before_cursor_execute", self._before),
+            ("after_cursor_execute", self._after),
+            ("handle_error", self._on_error),
+        ]
+        for name, fn in self._listeners:
+            event.listen(engine, name, fn)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_load_test_start", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_load_test_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if statement.lstrip().upper().startswith(_WRITE_PREFIXES):
+            with self._lock:
+                self.samples.append(elapsed)
+
+    def _on_error(self, context):
+        starts = context.connection.info.get("_load_test_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+        if "locked" in str(context.original_exception).lower():
+            with self._lock:
+                self.lock_errors += 1
+
+    def close(self) -> None:
+        for name, fn in self._listeners:
+            self._event.remove(self.engine, name, fn)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self.samples)
+            lock_errors = self.lock_errors
+        waits = [s for s in samples if s >= self.threshold_sec]
+        return {
+            "write_statements": _percentiles(samples),
+            "lock_wait_threshold_ms": round(self.threshold_sec * 1000, 2),
+            "lock_waits": len(waits),
+            "lock_wait_total_sec": round(sum(waits), 3),
+            "lock_errors": lock_errors,
+        }
+
+
+class _RssSampler(threading.Thread):
+    """부하 테스트 동안 RSS 를 주기적으로 기록합니다."""
+
+    def __init__(self, interval: float = 0.2):
+        super().__init__(name="rss-sampler", daemon=True)
+        self.interval = interval
+        self.start_mb = _rss_mb()
+        self.peak_mb = self.start_mb
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, _rss_mb())
+
+    def stop(self) -> Dict[str, float]:
+        self._stop_event.set()
+        self.join()
+        end_mb = _rss_mb()
+        self.peak_mb = max(self.peak_mb, end_mb)
+        return {
+            "start_mb": round(self.start_mb, 1),
+            "peak_mb": round(self.peak_mb, 1),
+            "end_mb": round(end_mb, 1),
+            "growth_mb": round(end_mb - self.start_mb, 1),
+        }
+
+
+def _initial_state(session_state: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "chat_state": {
+            "topic": session_state["topic"],
+            "user_name": session_state["user_name"],
+            "capital": session_state["capital"],
+            "risk_level": session_state["risk_level"],
+        },
+        "agent_id": 0,
+        "market_data_docs": [],
+        "market_data_response": "",
+        "retrieve_docs": [],
+        "retrieve_response": "",
+        "analysis_response": "",
+        "portfolio_response": "",
+        "context": "",
+        "messages": [],
+        "response": "",
+    }
+
+
+def run_user_flow(fake_st: _FakeStreamlit, user_index: int, session_index: int, rag: bool) -> Dict[str, float]:
+    """한 사용자의 상담 1회 흐름을 실행하고 단계별 소요시간(초)을 반환합니다."""
+    from controller.user_controller import userController
+    from controller.conv_controller import convController
+    from database.repository.user_repository import user_repository
+    from database.repository.session_repository import session_repository
+    from workflow.graph import create_graph
+
+    timings: Dict[str, float] = {}
+    state = fake_st.session_state
+    user_name = f"load_user_{user_index}"
+    topic = TOPICS[(user_index + session_index) % len(TOPICS)]
+
+    start = time.perf_counter()
+    if not userController.on_save_btn(user_name, 1000 + user_index, user_index % 5 + 1):
+        raise RuntimeError("on_save_btn 실패")
+    timings["save_user"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    state["input_topic"] = topic
+    if not convController.on_new_conv_btn(topic.replace(" ", "")):
+        raise RuntimeError("on_new_conv_btn 실패")
+    timings["new_conv"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    final_state = None
+    graph = create_graph(rag=rag)
+    for namespace, update in graph.stream(_initial_state(state), subgraphs=True, stream_mode="updates"):
+        body = update.get("generate_response") if isinstance(update, dict) else None
+        if body and body.get("portfolio_response"):
+            final_state = body
+    if final_state is None:
+        raise RuntimeError("그래프 실행 결과가 없습니다.")
+    timings["graph"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if not convController.insert_session_result(final_state):
+        raise RuntimeError("insert_session_result 실패")
+    timings["insert_result"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    user = user_repository.get_user_by_name(user_name)
+    sessions, _ = session_repository.get_session_list_by_user_id(user.user_id, limit=10)
+    if sessions:
+        convController.on_history_detail_btn(sessions[0].session_id)
+    timings["history"] = time.perf_counter() - start
+
+    return timings
+
+
+def run_load_test(users: int, sessions: int, rag: bool, fake_config, lock_wait_threshold: float) -> Dict[str, Any]:
+    from benchmark.fakes import patch_external_services
+    from common.metrics import metrics_registry
+    from database.engine import get_engine
+    from database.session import db_session
+
+    db_session.initialize()
+    fake_st = _FakeStreamlit()
+    step_samples: Dict[str, List[float]] = defaultdict(list)
+    flow_samples: List[float] = []
+    failures: List[str] = []
+    results_lock = threading.Lock()
+    barrier = threading.Barrier(users)
+
+    def worker(user_index: int):
+        barrier.wait()
+        for session_index in range(sessions):
+            start = time.perf_counter()
+            try:
+                timings = run_user_flow(fake_st, user_index, session_index, rag)
+            except Exception as e:
+                with results_lock:
+                    failures.append(f"user {user_index} / session {session_index}: {e!r}")
+                continue
+            elapsed = time.perf_counter() - start
+            with results_lock:
+                flow_samples.append(elapsed)
+                for step, value in timings.items():
+                    step_samples[step].append(value)
+
+    with ExitStack() as stack:
+        stack.enter_context(patch_external_services(fake_config))
+        stack.enter_context(mock.patch("controller.user_controller.st", fake_st))
+        stack.enter_context(mock.patch("controller.conv_controller.st", fake_st))
+        metrics_registry.reset()
+
+        monitor = _WriteWaitMonitor(get_engine(), lock_wait_threshold)
+        stack.callback(monitor.close)
+        sampler = _RssSampler()
+        sampler.start()
+
+        threads = [threading.Thread(target=worker, args=(i,), name=f"load-user-{i}") for i in range(users)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        rss = sampler.stop()
+        sqlite = monitor.report()
+        spans = metrics_registry.snapshot()
+
+    return {
+        "meta": {
+            "users": users,
+            "sessions_per_user": sessions,
+            "rag": rag,
+            "fake_config": {k: v for k, v in vars(fake_config).items() if k != "recordings"},
+        },
+        "throughput": {
+            "completed_flows": len(flow_samples),
+            "failed_flows": len(failures),
+            "elapsed_sec": round(elapsed, 3),
+            "flows_per_sec": round(len(flow_samples) / elapsed, 3) if elapsed else 0.0,
+        },
+        "flow_latency": _percentiles(flow_samples),
+        "steps": {step: _percentiles(step_samples[step]) for step in STEPS},
+        "sqlite": sqlite,
+        "rss": rss,
+        "failures": failures[:20],
+        "spans": spans,
+    }
+
+
+def main() -> int:
+    from benchmark.fakes import add_fake_arguments, fake_config_from_args
+
+    parser = argparse.ArgumentParser(description="동시 사용자 부하 테스트")
+    parser.add_argument("--users", type=int, default=8, help="동시 사용자(스레드) 수")
+    parser.add_argument("--sessions", type=int, default=3, help="사용자당 상담 횟수")
+    parser.add_argument("--no-rag", action="store_true", help="RAG 없이 그래프 실행")
+    parser.add_argument("--lock-wait-ms", type=float, default=50.0, help="잠금 대기로 집계할 쓰기 구문 소요시간(ms)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+
+    result = run_load_test(
+        users=args.users,
+        sessions=args.sessions,
+        rag=not args.no_rag,
+        fake_config=fake_config_from_args(args),
+        lock_wait_threshold=args.lock_wait_ms / 1000,
+    )
+
+    text = json.dumps(result, indent=2, ensure_ascii=False, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+    if result["throughput"]["failed_flows"] or result["sqlite"]["lock_errors"]:
+        print(
+            f"실패: 흐름 실패 {result['throughput']['failed_flows']}건, "
+            f"잠금 오류 {result['sqlite']['lock_errors']}건",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
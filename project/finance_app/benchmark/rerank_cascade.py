@@ -0,0 +1,169 @@
+"""
+2단계 재순위화(빠른 모델 → 정확한 모델) 재현율/지연시간 비교
+
+    python -m benchmark.rerank_cascade --queries 30 --top-m 5,8,10 --ce-latency 0.002
+    python -m benchmark.rerank_cascade --dataset rerank_eval.jsonl --top-m 5,8,10
+
+정확한 모델(accurate)만으로 매긴 상위 k개를 기준으로, 빠른 모델(fast) 단독과
+top-m 별 2단계 재순위화(cascade_m)의 recall@k 와 쿼리당 지연시간, 모델별 예측 지연을 출력합니다.
+
+--dataset 을 주면 실제 크로스 인코더 모델로 측정합니다.
+(JSONL 한 줄: {"query": "...", "documents": ["본문1", "본문2", ...]})
+주지 않으면 가짜 DDG 검색 결과와 가짜 크로스 인코더(benchmark.fakes)를 사용합니다.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List, Tuple
+
+from langchain.schema import Document
+
+TOPICS = ["반도체", "2차전지", "금리", "환율", "AI", "바이오", "배당주", "리츠", "원자재", "방산"]
+
+
+def _fake_candidates(count: int, per_query: int) -> List[Tuple[str, List[Document]]]:
+    from benchmark.fakes import FakeConfig, FakeDDGS
+
+    ddgs = FakeDDGS(FakeConfig())
+    candidates = []
+    for i in range(count):
+        topic = f"{TOPICS[i % len(TOPICS)]} 전망 {i}"
+        queries = [f"{topic} analysis", f"{topic} news", f"{topic} report"]
+        docs = [
+            Document(page_content=r["body"], metadata={"source": r["href"]})
+            for q in queries for r in ddgs.text(q, max_results=per_query)
+        ]
+        candidates.append((topic, docs))
+    return candidates
+
+
+def _load_dataset(path: str) -> List[Tuple[str, List[Document]]]:
+    candidates = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                candidates.append((row["query"], [Document(page_content=text) for text in row["documents"]]))
+    return candidates
+
+
+def _configure(mode: str) -> None:
+    """모드에 맞게 크로스 인코더 환경변수를 설정합니다. (accurate, fast, cascade_<m>)"""
+    os.environ["USE_CROSS_ENCODER"] = "true"
+    if mode.startswith("cascade_"):
+        os.environ["CROSS_ENCODER_CASCADE"] = "true"
+        os.environ["CROSS_ENCODER_CASCADE_TOP_M"] = mode.split("_", 1)[1]
+    else:
+        os.environ["CROSS_ENCODER_CASCADE"] = "false"
+        os.environ["CROSS_ENCODER_MODEL"] = mode
+
+
+def _top_k(scored: List[Tuple[Document, float]], k: int) -> List[int]:
+    order = sorted(range(len(scored)), key=lambda i: float(scored[i][1]), reverse=True)
+    return order[:k]
+
+
+def run_mode(mode: str, candidates, k: int) -> Tuple[Dict[str, Any], List[List[int]]]:
+    from common.metrics import metrics_registry
+    from retrieval.cross_encoder_service import CrossEncoderService
+
+    _configure(mode)
+    service = CrossEncoderService()
+    service.batch_score_documents(*candidates[0])  # 워밍업
+    metrics_registry.reset()
+
+    rankings: List[List[int]] = []
+    samples: List[float] = []
+    for query, docs in candidates:
+        start = time.perf_counter()
+        scored = service.batch_score_documents(query, docs)
+        samples.append(time.perf_counter() - start)
+        rankings.append(_top_k(scored, k))
+
+    predict = {}
+    for row in metrics_registry.snapshot():
+        if row["stage"] != "cross_encoder_predict":
+            continue
+        name = row["labels"].get("cascade") or row["labels"].get("model")
+        predict[name] = {
+            "model": row["labels"].get("model"),
+            "calls": row["count"],
+            "pairs_per_query": round(row["input_size"] / len(candidates), 2),
+            "p50_ms": round(row["p50_sec"] * 1000, 3),
+        }
+
+    samples.sort()
+    return {
+        "model": service.model_name,
+        "fast_model": service.fast_model_name if service.fast_encoder is not None else None,
+        "query_p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "query_mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "predict": predict,
+    }, rankings
+
+
+def main() -> int:
+    from benchmark.fakes import add_fake_arguments, fake_config_from_args, patch_external_services
+
+    parser = argparse.ArgumentParser(description="2단계 재순위화 recall@k/지연시간 비교")
+    parser.add_argument("--dataset", help="평가용 JSONL 경로 (주면 실제 크로스 인코더 사용)")
+    parser.add_argument("--queries", type=int, default=30, help="가짜 평가 쿼리 수")
+    parser.add_argument("--candidates", type=int, default=5, help="가짜 검색어당 후보 문서 수 (검색어 3개)")
+    parser.add_argument("--k", type=int, default=5, help="recall@k 의 k")
+    parser.add_argument("--top-m", default="5,8,10", help="쉼표로 구분한 cascade top-m 목록")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        top_ms = [int(m) for m in args.top_m.split(",") if m.strip()]
+    except ValueError:
+        print(f"잘못된 --top-m: {args.top_m}", file=sys.stderr)
+        return 2
+    modes = ["accurate", "fast"] + [f"cascade_{m}" for m in top_ms]
+
+    fake_config = fake_config_from_args(args)
+    if args.dataset:
+        candidates = _load_dataset(args.dataset)
+        context = nullcontext()
+    else:
+        candidates = _fake_candidates(args.queries, args.candidates)
+        context = patch_external_services(fake_config)
+    if not candidates:
+        print("평가할 쿼리가 없습니다.", file=sys.stderr)
+        return 2
+
+    results: Dict[str, Any] = {}
+    with context:
+        reference: List[List[int]] = []
+        for mode in modes:
+            result, rankings = run_mode(mode, candidates, args.k)
+            if mode == "accurate":
+                reference = rankings
+            hits = [len(set(r) & set(ref)) / max(1, len(ref)) for r, ref in zip(rankings, reference)]
+            result[f"recall@{args.k}"] = round(sum(hits) / len(hits), 4)
+            results[mode] = result
+
+    accurate_ms = results["accurate"]["query_p50_ms"]
+    if accurate_ms:
+        for result in results.values():
+            result["speedup_vs_accurate"] = round(accurate_ms / max(result["query_p50_ms"], 1e-6), 2)
+
+    text = json.dumps(
+        {"meta": {"queries": len(candidates), "k": args.k, "real_models": bool(args.dataset),
+                  "fake_config": None if args.dataset else {k: v for k, v in vars(fake_config).items() if k != "recordings"}},
+         "modes": results},
+        indent=2, ensure_ascii=False,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
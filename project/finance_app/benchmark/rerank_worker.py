@@ -0,0 +1,126 @@
+"""
+크로스 인코더 워커 프로세스 사용 여부에 따른 앱 응답성 비교
+
+    python -m benchmark.rerank_worker --sessions 4 --duration 5 --ce-latency 0.002 --ce-busy
+    python -m benchmark.rerank_worker --workers 0,1,2 --real-model
+
+--sessions 개의 스레드가 재순위화(후보 15개)를 반복하는 동안 메인 스레드에서 짧은 화면 처리 작업(tick)을
+반복 실행하여 tick 지연시간(p50/p99/max)과 초당 재순위화 수를 CROSS_ENCODER_WORKERS 값별로 출력합니다.
+--real-model 을 주면 실제 크로스 인코더를, 아니면 가짜 크로스 인코더(benchmark.fakes)를 사용합니다.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List
+
+TICK_WORK = 20000
+
+
+def _tick() -> None:
+    # 화면 렌더링에 해당하는 짧은 파이썬 연산
+    sum(i * i for i in range(TICK_WORK))
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def run_mode(workers: int, sessions: int, duration: float, candidates) -> Dict[str, Any]:
+    from retrieval.cross_encoder_service import CrossEncoderService
+    from retrieval.cross_encoder_worker import shutdown_worker_pool
+
+    os.environ["CROSS_ENCODER_WORKERS"] = str(workers)
+    os.environ["USE_CROSS_ENCODER"] = "true"
+    shutdown_worker_pool()
+    service = CrossEncoderService()
+    query, docs = candidates
+
+    # 기준 tick 시간 (재순위화 없음)
+    idle = []
+    for _ in range(50):
+        start = time.perf_counter()
+        _tick()
+        idle.append(time.perf_counter() - start)
+
+    stop = threading.Event()
+    reranks = [0] * sessions
+
+    def session(index: int):
+        while not stop.is_set():
+            service.batch_score_documents(query, docs)
+            reranks[index] += 1
+
+    threads = [threading.Thread(target=session, args=(i,), daemon=True) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+
+    ticks = []
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        _tick()
+        ticks.append(time.perf_counter() - start)
+        time.sleep(0.005)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    shutdown_worker_pool()
+
+    return {
+        "workers": workers,
+        "idle_tick_p50_ms": round(_percentile(idle, 0.5) * 1000, 3),
+        "tick_p50_ms": round(_percentile(ticks, 0.5) * 1000, 3),
+        "tick_p99_ms": round(_percentile(ticks, 0.99) * 1000, 3),
+        "tick_max_ms": round(max(ticks) * 1000, 3),
+        "reranks_per_sec": round(sum(reranks) / duration, 2),
+    }
+
+
+def main() -> int:
+    from benchmark.fakes import add_fake_arguments, fake_config_from_args, patch_external_services
+    from benchmark.rerank_cascade import _fake_candidates
+
+    parser = argparse.ArgumentParser(description="크로스 인코더 워커 프로세스 응답성 비교")
+    parser.add_argument("--workers", default="0,1,2", help="쉼표로 구분한 CROSS_ENCODER_WORKERS 값 목록")
+    parser.add_argument("--sessions", type=int, default=4, help="동시에 재순위화하는 세션(스레드) 수")
+    parser.add_argument("--duration", type=float, default=5.0, help="모드별 측정 시간(초)")
+    parser.add_argument("--real-model", action="store_true", help="실제 크로스 인코더 모델 사용")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        worker_counts = [int(w) for w in args.workers.split(",") if w.strip()]
+    except ValueError:
+        print(f"잘못된 --workers: {args.workers}", file=sys.stderr)
+        return 2
+
+    fake_config = fake_config_from_args(args)
+    candidates = _fake_candidates(1, 5)[0]
+    context = nullcontext() if args.real_model else patch_external_services(fake_config)
+
+    results = []
+    with context:
+        for workers in worker_counts:
+            results.append(run_mode(workers, args.sessions, args.duration, candidates))
+
+    text = json.dumps(
+        {"meta": {"sessions": args.sessions, "duration": args.duration, "real_model": args.real_model,
+                  "fake_config": None if args.real_model else {k: v for k, v in vars(fake_config).items() if k != "recordings"}},
+         "modes": results},
+        indent=2, ensure_ascii=False,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+외부 서비스 없이 파이프라인 성능을 측정하는 오프라인 벤치마크
+
+    python -m benchmark.run_benchmark --iterations 5 --output bench.json
+    python -m benchmark.run_benchmark --baseline bench.json --tolerance 0.15
+
+측정 단계:
+    e2e           create_graph(...).stream 전체 실행
+    e2e_async     하나의 이벤트 루프에서 --concurrency 건의 리포트를 astream 으로 동시 실행
+    vector_build  검색어 생성 → DDG 검색 → 임베딩 → FAISS 생성
+    rerank        크로스 인코더 재순위화
+    serialization AgentState 직렬화 (dict_to_str)
+    history_load  이력 응답/참고 자료 로드
+
+결과는 JSON 으로 출력되며, --baseline 을 주면 단계별 p50 을 비교하여
+허용치(tolerance)를 넘는 회귀가 있으면 종료 코드 1을 반환합니다.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+# DB 모듈 import 전에 임시 DB 경로와 캐시 설정을 지정
+_TMP_DIR = tempfile.mkdtemp(prefix="finance_bench_")
+os.environ.setdefault("DB_PATH", os.path.join(_TMP_DIR, "bench.db"))
+
+STAGES = ["e2e", "e2e_async", "vector_build", "rerank", "serialization", "history_load"]
+
+TOPIC = "반도체 산업 전망"
+CAPITAL = 1000
+RISK_LEVEL = 3
+
+
+def _initial_state() -> Dict[str, Any]:
+    return {
+        "chat_state": {"topic": TOPIC, "user_name": "bench", "capital": CAPITAL, "risk_level": RISK_LEVEL},
+        "agent_id": 0,
+        "market_data_docs": [],
+        "market_data_response": "",
+        "retrieve_docs": [],
+        "retrieve_response": "",
+        "analysis_response": "",
+        "portfolio_response": "",
+        "context": "",
+        "messages": [],
+        "response": "",
+    }
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    return {
+        "runs": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": round(pick(0.5) * 1000, 3),
+        "p95_ms": round(pick(0.95) * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _measure(fn: Callable[[], Any], iterations: int, warmup: int = 1) -> Dict[str, Any]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    result = None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return {**_summarize(samples), "_result": result}
+
+
+def run_e2e() -> Dict[str, Any]:
+    from workflow.graph import create_graph
+
+    graph = create_graph(rag=True)
+    final_state = None
+    for chunk in graph.stream(_initial_state(), subgraphs=True, stream_mode="updates"):
+        namespace, update = chunk
+        body = update.get("generate_response") if isinstance(update, dict) else None
+        if body and body.get("portfolio_response"):
+            final_state = body
+    return final_state
+
+
+def run_e2e_async(concurrency: int) -> List[Any]:
+    import asyncio
+    from workflow.runner import arun_reports
+
+    chat_states = [_initial_state()["chat_state"] for _ in range(concurrency)]
+    return asyncio.run(arun_reports(chat_states, rag=True, concurrency=concurrency))
+
+
+def run_vector_build():
+    from retrieval.vector_store import get_topic_vector_store
+    return get_topic_vector_store(TOPIC, CAPITAL, RISK_LEVEL)
+
+
+def run_benchmark(stages: List[str], iterations: int, fake_config, concurrency: int = 8) -> Dict[str, Any]:
+    from benchmark.fakes import patch_external_services
+    from common.llm_cache import clear_llm_caches
+    from common.metrics import metrics_registry
+
+    results: Dict[str, Any] = {}
+    with patch_external_services(fake_config):
+        clear_llm_caches()
+        metrics_registry.reset()
+
+        # 다른 단계의 입력으로 쓰기 위해 e2e 결과는 항상 한 번 생성
+        final_state = run_e2e()
+
+        if "e2e" in stages:
+            measured = _measure(run_e2e, iterations)
+            measured.pop("_result")
+            results["e2e"] = measured
+
+        if "e2e_async" in stages:
+            measured = _measure(lambda: run_e2e_async(concurrency), iterations)
+            reports = measured.pop("_result")
+            measured["concurrency"] = concurrency
+            measured["failed"] = sum(1 for r in reports if not isinstance(r, dict))
+            measured["reports_per_sec"] = round(concurrency / (measured["p50_ms"] / 1000), 2) if measured["p50_ms"] else 0.0
+            results["e2e_async"] = measured
+
+        if "vector_build" in stages:
+            measured = _measure(run_vector_build, iterations)
+            store = measured.pop("_result")
+            measured["documents"] = len(store.index_to_docstore_id) if store else 0
+            results["vector_build"] = measured
+
+        if "rerank" in stages:
+            from retrieval.cross_encoder_service import get_cross_encoder_service
+            store = run_vector_build()
+            candidates = store.similarity_search(TOPIC, k=15) if store else []
+            service = get_cross_encoder_service()
+            measured = _measure(lambda: service.rerank_documents(TOPIC, candidates, top_k=5, threshold=0.0), iterations)
+            measured.pop("_result")
+            measured["candidates"] = len(candidates)
+            results["rerank"] = measured
+
+        if "serialization" in stages or "history_load" in stages:
+            from common.utils import dict_to_str
+            measured = _measure(lambda: dict_to_str(final_state), iterations)
+            serialized = measured.pop("_result")
+            measured["bytes"] = len(serialized.encode("utf-8"))
+            if "serialization" in stages:
+                results["serialization"] = measured
+
+        if "history_load" in stages:
+            results["history_load"] = _run_history_load(final_state, iterations)
+
+        results["_spans"] = metrics_registry.snapshot()
+    return results
+
+
+def _run_history_load(final_state, iterations: int) -> Dict[str, Any]:
+    from common.utils import RESPONSE_FIELDS, dict_to_str, str_to_agentState
+    from database.session import db_session
+    from database.repository.user_repository import user_repository
+    from database.repository.session_repository import session_repository
+
+    db_session.initialize()
+    user = user_repository.get_user_by_name("bench")
+    if user is None:
+        user_repository.create_user("bench", CAPITAL, RISK_LEVEL)
+        user = user_repository.get_user_by_name("bench")
+    session_id = session_repository.create_session(user, TOPIC)
+    session_repository.create_session_detail(
+        session_id,
+        dict_to_str(final_state),
+        responses={key: final_state.get(key, "") for key in RESPONSE_FIELDS},
+    )
+
+    summary = _measure(lambda: session_repository.get_session_summary_by_id(session_id), iterations)
+    summary.pop("_result")
+    documents = _measure(lambda: session_repository.get_session_documents_by_id(session_id), iterations)
+    documents.pop("_result")
+
+    def full_load():
+        detail = session_repository.get_session_detail_by_id(session_id)
+        return str_to_agentState(detail.response)
+
+    full = _measure(full_load, iterations)
+    full.pop("_result")
+    return {**summary, "documents": documents, "full_state": full}
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float,
+    min_delta_ms: float = 1.0,
+) -> List[Dict[str, Any]]:
+    """단계별 p50 을 기준선과 비교합니다. 절대 차이가 min_delta_ms 미만이면 회귀로 보지 않습니다."""
+    rows = []
+    for stage, result in current["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base or stage.startswith("_"):
+            continue
+        ratio = result["p50_ms"] / base["p50_ms"] if base["p50_ms"] else 1.0
+        rows.append({
+            "stage": stage,
+            "baseline_p50_ms": base["p50_ms"],
+            "current_p50_ms": result["p50_ms"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + tolerance and result["p50_ms"] - base["p50_ms"] >= min_delta_ms,
+        })
+    return rows
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from benchmark.fakes import add_fake_arguments
+
+    parser = argparse.ArgumentParser(description="오프라인 파이프라인 벤치마크")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"쉼표로 구분 ({', '.join(STAGES)})")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8, help="e2e_async 단계의 동시 리포트 수")
+    add_fake_arguments(parser)
+    parser.add_argument("--llm-cache", action="store_true", help="시맨틱 캐시를 켠 상태로 측정")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", help="비교할 기준 결과 JSON 경로")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="허용 회귀 비율 (0.1 = 10%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="회귀로 판단할 최소 p50 차이(ms)")
+    return parser
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+    os.environ["LLM_CACHE_ENABLED"] = "true" if args.llm_cache else "false"
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        print(f"알 수 없는 단계: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    from benchmark.fakes import fake_config_from_args
+
+    fake_config = fake_config_from_args(args)
+    stage_results = run_benchmark(stages, args.iterations, fake_config, args.concurrency)
+    spans = stage_results.pop("_spans")
+    output = {
+        "meta": {"iterations": args.iterations, "concurrency": args.concurrency, "fake_config": {k: v for k, v in vars(fake_config).items() if k != "recordings"}},
+        "stages": stage_results,
+        "spans": spans,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        output["comparison"] = compare(output, baseline, args.tolerance, args.min_delta_ms)
+        if any(row["regression"] for row in output["comparison"]):
+            exit_code = 1
+
+    text = json.dumps(output, indent=2, ensure_ascii=False, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
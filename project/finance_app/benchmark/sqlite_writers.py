@@ -0,0 +1,123 @@
+"""
+여러 writer 스레드가 동시에 Session/SessionDetail 을 저장할 때의 처리량과 잠금 오류를 측정합니다.
+
+    python -m benchmark.sqlite_writers --writers 8 --rows 50
+
+PRAGMA 튜닝 프로파일(WAL 등)과 SQLite 기본 설정을 같은 조건에서 비교하며,
+잠금 오류가 발생하거나 저장된 행 수가 맞지 않으면 종료 코드 1을 반환합니다.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from database.engine import create_db_engine, get_sqlite_pragmas
+from database.model import Base, User, Session, SessionDetail
+
+# SQLite 기본 설정 (rollback journal, busy_timeout 없음)
+BASELINE_PRAGMAS = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "busy_timeout": 0,
+    "cache_size": -2000,
+    "mmap_size": 0,
+    "foreign_keys": False,
+}
+
+
+def run_writers(pragmas: Dict[str, Any], writers: int, rows: int, payload_size: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}", pragmas)
+        Base.metadata.create_all(engine)
+        SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+
+        with SessionLocal() as db:
+            user = User(name="bench", capital=100, risk_level=3)
+            db.add(user)
+            db.commit()
+            user_id = user.user_id
+
+        payload = "x" * payload_size
+        lock_errors = 0
+        latencies = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(writers)
+
+        def writer():
+            nonlocal lock_errors
+            barrier.wait()
+            for _ in range(rows):
+                start = time.perf_counter()
+                db = SessionLocal()
+                try:
+                    session = Session(user_id=user_id, capital=100, risk_level=3, topic="bench")
+                    db.add(session)
+                    db.flush()
+                    db.add(SessionDetail(session_id=session.session_id, response=payload))
+                    db.commit()
+                    with lock:
+                        latencies.append(time.perf_counter() - start)
+                except OperationalError:
+                    db.rollback()
+                    with lock:
+                        lock_errors += 1
+                finally:
+                    db.close()
+
+        threads = [threading.Thread(target=writer) for _ in range(writers)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        with SessionLocal() as db:
+            stored = db.query(SessionDetail).count()
+        engine.dispose()
+
+    latencies.sort()
+    return {
+        "journal_mode": pragmas["journal_mode"],
+        "synchronous": pragmas["synchronous"],
+        "busy_timeout": pragmas["busy_timeout"],
+        "writes": len(latencies),
+        "lock_errors": lock_errors,
+        "stored_rows": stored,
+        "elapsed_sec": round(elapsed, 3),
+        "writes_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2) if latencies else None,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="SQLite 동시 쓰기 벤치마크")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=50, help="writer 당 저장할 행 수")
+    parser.add_argument("--payload-size", type=int, default=20000, help="SessionDetail.response 크기(byte)")
+    parser.add_argument("--skip-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = {"tuned": run_writers(get_sqlite_pragmas(), args.writers, args.rows, args.payload_size)}
+    if not args.skip_baseline:
+        results["baseline"] = run_writers(BASELINE_PRAGMAS, args.writers, args.rows, args.payload_size)
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+    tuned = results["tuned"]
+    expected = args.writers * args.rows
+    if tuned["lock_errors"] or tuned["stored_rows"] != expected:
+        print(f"실패: 잠금 오류 {tuned['lock_errors']}건, 저장 {tuned['stored_rows']}/{expected}건", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
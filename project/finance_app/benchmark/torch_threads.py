@@ -0,0 +1,180 @@
+"""
+크로스 인코더 torch 스레드 수 / 코어 고정 설정별 처리량-지연시간 비교
+
+    python -m benchmark.torch_threads --intra 1,2,4,0 --workers 0,2 --sessions 1,4 --duration 5
+    python -m benchmark.torch_threads --intra 2 --workers 2 --affinity ,auto --real-model
+
+설정 조합마다 새 프로세스에서 CrossEncoderService 를 만들고(--sessions 개 스레드가 후보 15개 재순위화를 반복)
+재순위화 1건의 p50/p95 지연과 초당 재순위화 수를 출력합니다. (intra 0 = torch 기본값)
+--real-model 을 주지 않으면 MiniLM 과 같은 크기의 임의 가중치 트랜스포머(SyntheticCrossEncoder)로
+실제 torch 연산량을 재현합니다.
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+from unittest import mock
+
+import numpy as np
+
+MAX_TOKENS = 256
+
+
+class SyntheticCrossEncoder:
+    """MiniLM-L-N 크기(hidden 384, FFN 1536)의 임의 가중치 트랜스포머. 점수 의미는 없고 연산량만 재현합니다."""
+
+    def __init__(self, model_name: str, **kwargs):
+        import torch
+        from torch import nn
+
+        layers = re.search(r"-L-(\d+)", model_name)
+        torch.manual_seed(0)
+        self.model_name = model_name
+        self.embedding = nn.Embedding(4096, 384)
+        encoder_layer = nn.TransformerEncoderLayer(384, 12, 1536, batch_first=True)
+        self.encoder = nn.TransformerEncoder(encoder_layer, int(layers.group(1)) if layers else 6, enable_nested_tensor=False)
+        self.head = nn.Linear(384, 1)
+        for module in (self.embedding, self.encoder, self.head):
+            module.eval()
+
+    def predict(self, pairs, batch_size: int = 32, **kwargs) -> np.ndarray:
+        import torch
+
+        scores = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            ids = [[ord(c) % 4096 for c in f"{q} [SEP] {t}"[:MAX_TOKENS]] for q, t in batch]
+            length = max(len(row) for row in ids)
+            tokens = torch.zeros((len(ids), length), dtype=torch.long)
+            padding = torch.ones((len(ids), length), dtype=torch.bool)
+            for i, row in enumerate(ids):
+                tokens[i, :len(row)] = torch.tensor(row)
+                padding[i, :len(row)] = False
+            with torch.inference_mode():
+                hidden = self.encoder(self.embedding(tokens), src_key_padding_mask=padding)
+                scores.append(torch.sigmoid(self.head(hidden[:, 0])).squeeze(-1).numpy())
+        return np.concatenate(scores)
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def run_one(sessions: int, duration: float, real_model: bool) -> Dict[str, Any]:
+    """현재 환경변수 설정으로 재순위화 부하를 걸고 결과를 반환합니다. (하위 프로세스에서 실행)"""
+    from benchmark.rerank_cascade import _fake_candidates
+    from retrieval.cross_encoder_worker import shutdown_worker_pool
+
+    query, docs = _fake_candidates(1, 5)[0]
+    patcher = mock.patch("retrieval.cross_encoder_service.CrossEncoder", SyntheticCrossEncoder)
+    if not real_model:
+        patcher.start()
+    try:
+        from retrieval.cross_encoder_service import CrossEncoderService
+
+        service = CrossEncoderService()
+        service.batch_score_documents(query, docs)  # 워밍업 (워커별 모델 로드 포함)
+        for _ in range(sessions):
+            service.batch_score_documents(query, docs)
+
+        latencies: List[float] = []
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def session():
+            while not stop.is_set():
+                start = time.perf_counter()
+                service.batch_score_documents(query, docs)
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+
+        threads = [threading.Thread(target=session, daemon=True) for _ in range(sessions)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        shutdown_worker_pool()
+        if not real_model:
+            patcher.stop()
+
+    import torch
+    return {
+        "reranks": len(latencies),
+        "reranks_per_sec": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000, 2) if latencies else None,
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        "app_torch_threads": torch.get_num_threads(),
+    }
+
+
+def _split(text: str) -> List[str]:
+    return [v.strip() for v in text.split(",")]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="크로스 인코더 torch 스레드/코어 고정 설정 스윕")
+    parser.add_argument("--intra", default="1,2,0", help="쉼표로 구분한 intra-op 스레드 수 (0=torch 기본값)")
+    parser.add_argument("--inter", default="0", help="쉼표로 구분한 inter-op 스레드 수 (0=torch 기본값)")
+    parser.add_argument("--workers", default="0", help="쉼표로 구분한 CROSS_ENCODER_WORKERS 값")
+    parser.add_argument("--affinity", default="", help="쉼표로 구분한 코어 고정 설정 (빈 값=고정 안 함, auto, 0-3 ... / --workers 1 이상일 때만 적용)")
+    parser.add_argument("--sessions", default="1,4", help="쉼표로 구분한 동시 재순위화 세션 수")
+    parser.add_argument("--duration", type=float, default=5.0, help="조합별 측정 시간(초)")
+    parser.add_argument("--real-model", action="store_true", help="실제 크로스 인코더 모델 사용")
+    parser.add_argument("--run-one", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_one(int(args.sessions), args.duration, args.real_model)))
+        return 0
+
+    results = []
+    for intra, inter, workers, affinity, sessions in itertools.product(
+        _split(args.intra), _split(args.inter), _split(args.workers), _split(args.affinity), _split(args.sessions)
+    ):
+        setting = {"intra_op_threads": int(intra), "inter_op_threads": int(inter), "workers": int(workers),
+                   "cpu_affinity": affinity, "sessions": int(sessions)}
+        env = dict(os.environ,
+                   USE_CROSS_ENCODER="true",
+                   CROSS_ENCODER_INTRA_OP_THREADS=intra,
+                   CROSS_ENCODER_INTER_OP_THREADS=inter,
+                   CROSS_ENCODER_WORKERS=workers,
+                   CROSS_ENCODER_CPU_AFFINITY=affinity)
+        command = [sys.executable, "-m", "benchmark.torch_threads", "--run-one",
+                   "--sessions", sessions, "--duration", str(args.duration)]
+        if args.real_model:
+            command.append("--real-model")
+        completed = subprocess.run(command, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(completed.stderr[-2000:], file=sys.stderr)
+            results.append({**setting, "error": f"exit {completed.returncode}"})
+            continue
+        results.append({**setting, **json.loads(completed.stdout.strip().splitlines()[-1])})
+        print(json.dumps(results[-1], ensure_ascii=False), file=sys.stderr)
+
+    text = json.dumps(
+        {"meta": {"cpu_count": os.cpu_count(), "duration": args.duration, "real_model": args.real_model},
+         "results": results},
+        indent=2, ensure_ascii=False,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
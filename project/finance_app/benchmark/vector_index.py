@@ -0,0 +1,150 @@
+"""
+임베딩 차원 축소 / 스칼라 양자화 / FAISS 인덱스 종류별 메모리·검색 시간·재현율 비교
+
+    python -m benchmark.vector_index --corpus 20000 --queries 200
+    python -m benchmark.vector_index --dims 1536,512,256 --quantizations none,int8 --index-types flat,hnsw
+    python -m benchmark.vector_index --vectors news_embeddings.npy   # 실제 text-embedding-3-small 벡터
+
+기준선은 전체 차원 float32 전수 탐색(IndexFlatL2)의 top-k 이며, 조합마다
+recall@k(기준선 top-k 와 겹치는 비율), 인덱스 크기(직렬화 바이트), 쿼리 1건 검색 시간(단일 스레드),
+생성 시간과 기준선 대비 배율을 출력합니다.
+차원 축소는 text-embedding-3 의 dimensions 파라미터와 같이 앞쪽 차원만 잘라 다시 정규화합니다.
+--vectors 를 주지 않으면 주제 군집과 앞쪽 차원에 분산이 몰린 스펙트럼을 가진 합성 단위 벡터를 사용하고,
+쿼리는 말뭉치에 없는 같은 분포의 벡터입니다. (--vectors 는 쿼리를 말뭉치에서 떼어 냄)
+"""
+import argparse
+import itertools
+import json
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+import faiss
+import numpy as np
+
+FULL_DIM = 1536
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return np.ascontiguousarray(vectors / np.linalg.norm(vectors, axis=1, keepdims=True), dtype=np.float32)
+
+
+def synthetic_vectors(count: int, dimension: int, topics: int, seed: int) -> np.ndarray:
+    """주제 중심 + 잡음에 차원별 감쇠를 곱한 단위 벡터 (앞쪽 차원일수록 정보가 많음)"""
+    rng = np.random.default_rng(seed)
+    centers = np.random.default_rng(0).standard_normal((topics, dimension)).astype(np.float32)
+    vectors = centers[rng.integers(0, topics, size=count)] + 0.8 * rng.standard_normal((count, dimension)).astype(np.float32)
+    decay = (1.0 + np.arange(dimension, dtype=np.float32) / 64.0) ** -0.5
+    return _normalize(vectors * decay)
+
+
+def load_vectors(args) -> Tuple[np.ndarray, np.ndarray]:
+    if args.vectors:
+        vectors = _normalize(np.load(args.vectors).astype(np.float32))
+        rng = np.random.default_rng(args.seed)
+        order = rng.permutation(len(vectors))
+        return vectors[order[args.queries:]], vectors[order[:args.queries]]
+    corpus = synthetic_vectors(args.corpus, FULL_DIM, args.topics, args.seed)
+    queries = synthetic_vectors(args.queries, FULL_DIM, args.topics, args.seed + 1)
+    return corpus, queries
+
+
+def _search_per_query(index: faiss.Index, queries: np.ndarray, k: int) -> Tuple[np.ndarray, float]:
+    """요청 처리처럼 쿼리를 한 건씩 검색하고 (결과 id, 쿼리당 초) 를 반환합니다."""
+    ids = np.empty((len(queries), k), dtype=np.int64)
+    start = time.perf_counter()
+    for i in range(len(queries)):
+        _, ids[i] = index.search(queries[i:i + 1], k)
+    return ids, (time.perf_counter() - start) / len(queries)
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def run_config(corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int,
+               dimension: int, index_config: Dict[str, Any]) -> Dict[str, Any]:
+    from retrieval.vector_index import build_faiss_index, index_factory_string
+
+    base = _normalize(corpus[:, :dimension]) if dimension < corpus.shape[1] else corpus
+    query = _normalize(queries[:, :dimension]) if dimension < queries.shape[1] else queries
+
+    start = time.perf_counter()
+    index = build_faiss_index(base, index_config)
+    index.add(base)
+    build_sec = time.perf_counter() - start
+    ids, per_query = _search_per_query(index, query, k)
+    return {
+        "dimensions": dimension,
+        "index": index_factory_string(len(base), index_config),
+        "recall_at_k": round(_recall(ids, truth), 4),
+        "index_bytes": len(faiss.serialize_index(index)),
+        "search_ms_per_query": round(per_query * 1000, 4),
+        "build_sec": round(build_sec, 3),
+    }
+
+
+def _split(text: str) -> List[str]:
+    return [v.strip() for v in text.split(",") if v.strip()]
+
+
+def main() -> int:
+    from retrieval.vector_index import INDEX_TYPES, QUANTIZATIONS, get_index_config
+
+    parser = argparse.ArgumentParser(description="벡터 차원/양자화/인덱스 종류별 재현율·메모리·검색 시간 비교")
+    parser.add_argument("--corpus", type=int, default=20000, help="합성 말뭉치 벡터 수")
+    parser.add_argument("--queries", type=int, default=200, help="쿼리 수")
+    parser.add_argument("--topics", type=int, default=200, help="합성 벡터의 주제 군집 수")
+    parser.add_argument("--vectors", help="실제 임베딩 .npy 경로 (문서 수 x 차원)")
+    parser.add_argument("--dims", default="1536,512,256", help="쉼표로 구분한 임베딩 차원")
+    parser.add_argument("--quantizations", default="none,fp16,int8")
+    parser.add_argument("--index-types", default="flat,hnsw,ivf")
+    parser.add_argument("--k", type=int, default=10, help="recall@k 의 k")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    quantizations, index_types = _split(args.quantizations), _split(args.index_types)
+    unknown = (set(quantizations) - set(QUANTIZATIONS)) | (set(index_types) - set(INDEX_TYPES))
+    if unknown:
+        print(f"알 수 없는 설정: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    # 요청 하나가 검색 하나를 처리하는 상황을 재현
+    faiss.omp_set_num_threads(1)
+    corpus, queries = load_vectors(args)
+    dims = [d for d in (int(v) for v in _split(args.dims)) if d <= corpus.shape[1]]
+
+    baseline_index = faiss.IndexFlatL2(corpus.shape[1])
+    baseline_index.add(corpus)
+    truth, baseline_per_query = _search_per_query(baseline_index, queries, args.k)
+    baseline_bytes = len(faiss.serialize_index(baseline_index))
+
+    results = []
+    for dimension, quantization, index_type in itertools.product(dims, quantizations, index_types):
+        index_config = dict(get_index_config(), index_type=index_type, quantization=quantization, min_size=0)
+        row = {"quantization": quantization, "index_type": index_type,
+               **run_config(corpus, queries, truth, args.k, dimension, index_config)}
+        row["memory_reduction_x"] = round(baseline_bytes / row["index_bytes"], 2)
+        row["search_speedup_x"] = round(baseline_per_query * 1000 / max(row["search_ms_per_query"], 1e-6), 2)
+        results.append(row)
+        print(json.dumps(row, ensure_ascii=False), file=sys.stderr)
+
+    text = json.dumps(
+        {"meta": {"corpus": len(corpus), "queries": len(queries), "source_dim": corpus.shape[1], "k": args.k,
+                  "vectors": args.vectors or "synthetic",
+                  "baseline": {"index": "Flat", "index_bytes": baseline_bytes,
+                               "search_ms_per_query": round(baseline_per_query * 1000, 4)}},
+         "results": results},
+        indent=2, ensure_ascii=False,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
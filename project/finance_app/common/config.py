@@ -1,7 +1,13 @@
 import os
+from typing import Optional
 from dotenv import load_dotenv
 from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
 from langfuse import Langfuse
+from common.constants import EmbeddingBackend
+from common.deadline import get_stage_timeout
+from common.env import get_env_int, get_env_str
+from common.local_embeddings import DEFAULT_MODEL as DEFAULT_LOCAL_EMBEDDING_MODEL, get_local_embeddings
+from common.resilience import GuardedChatModel, get_provider_guard
 import logging
 
 load_dotenv()
@@ -19,13 +25,22 @@ logger = logging.getLogger(__name__)
 #     )
 
 def get_llm():
+    """요청 한도/서킷 브레이커(common.resilience)가 적용된 LLM 을 반환합니다."""
+    return GuardedChatModel(_create_llm(), get_provider_guard("llm"))
+
+
+def _create_llm():
+    # 재시도까지 포함한 전체 호출이 LLM 단계 제한시간(STAGE_TIMEOUT_LLM) 안에 끝나도록 요청당 타임아웃 설정
+    max_retries = get_env_int("LLM_MAX_RETRIES", 1, min_value=0)
     try:
         return AzureChatOpenAI(
             openai_api_key=os.getenv("AOAI_API_KEY"),
             azure_endpoint=os.getenv("AOAI_ENDPOINT"),
             api_version=os.getenv("AOAI_API_VERSION", "2024-02-01"),
             azure_deployment=os.getenv("AOAI_DEPLOY_GPT5_MINI"),
-            streaming=True
+            streaming=True,
+            timeout=get_stage_timeout("llm") / (max_retries + 1),
+            max_retries=max_retries,
         )
     except Exception as e:
         logger.error(f"Azure OpenAI LLM 초기화 실패: {str(e)}")
@@ -34,13 +49,45 @@ def get_llm():
         logger.error(f"API_VERSION: {os.getenv('AOAI_API_VERSION')}")
         raise
 
+def get_embedding_backend() -> EmbeddingBackend:
+    """임베딩 백엔드를 반환합니다. (EMBEDDING_BACKEND=azure|local)"""
+    value = get_env_str("EMBEDDING_BACKEND", EmbeddingBackend.Azure.value).lower()
+    try:
+        return EmbeddingBackend(value)
+    except ValueError:
+        logger.warning(f"환경변수 EMBEDDING_BACKEND 값이 올바르지 않습니다({value}). 기본값 {EmbeddingBackend.Azure.value}을 사용합니다.")
+        return EmbeddingBackend.Azure
+
+
+def get_embedding_dimensions() -> Optional[int]:
+    """
+    Azure 임베딩 출력 차원 (EMBEDDING_DIMENSIONS, 0 이면 모델 기본 차원)
+
+    text-embedding-3 계열은 dimensions 파라미터로 앞쪽 차원만 잘라 정규화한 벡터(예: 256, 512)를 반환합니다.
+    """
+    dimensions = get_env_int("EMBEDDING_DIMENSIONS", 0, min_value=0)
+    return dimensions or None
+
+
+def get_embedding_model_name() -> str:
+    """현재 백엔드의 임베딩 모델 식별자 (인덱스 재생성 여부 판단용)"""
+    if get_embedding_backend() == EmbeddingBackend.Local:
+        return f"local:{get_env_str('LOCAL_EMBEDDING_MODEL', DEFAULT_LOCAL_EMBEDDING_MODEL)}"
+    model = os.getenv("AOAI_DEPLOY_EMBED_3_SMALL", "text-embedding-3-small")
+    dimensions = get_embedding_dimensions()
+    return f"{model}@{dimensions}" if dimensions else model
+
+
 def get_embeddings():
+    if get_embedding_backend() == EmbeddingBackend.Local:
+        return get_local_embeddings()
     try:
         return AzureOpenAIEmbeddings(
             model=os.getenv("AOAI_DEPLOY_EMBED_3_SMALL", "text-embedding-3-small"),
             openai_api_version=os.getenv("AOAI_EMBED_API_VERSION", "2024-02-01"),
             api_key=os.getenv("AOAI_API_KEY"),
             azure_endpoint=os.getenv("AOAI_ENDPOINT"),
+            dimensions=get_embedding_dimensions(),
         )
     except Exception as e:
         logger.error(f"Azure OpenAI Embeddings 초기화 실패: {str(e)}")
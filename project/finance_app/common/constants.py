@@ -10,6 +10,19 @@ class Mode(Enum):
     Portfolio = "portfolio"     # 포트폴리오 생성 요청 시
     History = "history"         # 대화 내역 요청 시
 
+class ContextStrategy(Enum):
+    Raw = "raw"                    # 원본 문서 전체
+    Summary = "summary"            # 앞선 에이전트의 요약만
+    SummaryTopK = "summary_topk"   # 요약 + 인용/상위 k개 문서
+
+class TickerStrategy(Enum):
+    LLM = "llm"                    # 매 리포트마다 LLM 으로 추천
+    Embedding = "embedding"        # 임베딩 인덱스로 추천, 신뢰도가 낮으면 LLM
+
+class EmbeddingBackend(Enum):
+    Azure = "azure"                # Azure OpenAI 임베딩 API
+    Local = "local"                # 로컬 sentence-transformers 모델 (CPU)
+
 class Agent:
     Analysis = "analysis"
     MarketData = "market_data"
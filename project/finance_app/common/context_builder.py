@@ -0,0 +1,398 @@
+"""
+에이전트 프롬프트 컨텍스트를 토큰 예산 안에서 조립하는 모듈
+
+- 에이전트별 토큰 예산은 환경변수(CONTEXT_BUDGET_<AGENT>)로 조정합니다.
+- 토큰 수는 로컬 토크나이저(tiktoken)로 계산하며, 인코딩 파일을 사용할 수 없으면 문자 수 기반 추정치를 사용합니다.
+- 섹션(시장 데이터/검색 결과/분석 결과)별로 우선순위에 따라 예산을 나누고,
+  섹션 안에서는 관련성 점수와 최신순으로 문서를 채운 뒤 남는 문서는 잘라내거나 제외합니다.
+- 하위 에이전트가 원본 문서 대신 앞선 에이전트의 요약을 받도록 컨텍스트 전략(CONTEXT_STRATEGY_<AGENT>)을 선택할 수 있습니다.
+"""
+import re
+import threading
+import logging
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from common.constants import ContextStrategy
+from common.env import get_env_int, get_env_str
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKENIZER_ENCODING = "o200k_base"
+
+# 에이전트별 컨텍스트 토큰 예산 (0 이하이면 제한 없음)
+DEFAULT_CONTEXT_BUDGETS = {
+    "MarketDataAgent": 3000,
+    "RetrieveAgent": 4000,
+    "AnalysisAgent": 5000,
+    "PortfolioAgent": 5000,
+}
+
+# 에이전트별 컨텍스트 전략 (앞선 에이전트의 결과를 받는 에이전트만 해당)
+DEFAULT_CONTEXT_STRATEGIES = {
+    "AnalysisAgent": ContextStrategy.Summary,
+    "PortfolioAgent": ContextStrategy.Summary,
+}
+DEFAULT_CONTEXT_TOP_K = 2
+
+_CITATION_PATTERN = re.compile(r"\[문서\s*(\d+)\]")
+
+# 잘라낸 문서가 이 토큰 수보다 짧아지면 넣지 않음
+MIN_TRUNCATED_TOKENS = 48
+TRUNCATION_MARK = " …(이하 생략)"
+
+_CJK_PATTERN = re.compile(r"[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u4e00-\u9fff\uac00-\ud7af]")
+
+
+def _camel_to_snake(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).upper()
+
+
+def get_context_budget(agent_name: str) -> int:
+    """에이전트 클래스명에 해당하는 컨텍스트 토큰 예산을 반환합니다. (예: CONTEXT_BUDGET_PORTFOLIO_AGENT)"""
+    default = DEFAULT_CONTEXT_BUDGETS.get(agent_name, 0)
+    return get_env_int(f"CONTEXT_BUDGET_{_camel_to_snake(agent_name)}", default)
+
+
+def get_context_strategy(agent_name: str) -> ContextStrategy:
+    """에이전트 클래스명에 해당하는 컨텍스트 전략을 반환합니다. (예: CONTEXT_STRATEGY_ANALYSIS_AGENT=summary)"""
+    default = DEFAULT_CONTEXT_STRATEGIES.get(agent_name, ContextStrategy.Raw)
+    name = f"CONTEXT_STRATEGY_{_camel_to_snake(agent_name)}"
+    value = get_env_str(name, default.value).lower()
+    try:
+        return ContextStrategy(value)
+    except ValueError:
+        logger.warning(f"환경변수 {name} 값이 올바르지 않습니다({value}). 기본값 {default.value}을 사용합니다.")
+        return default
+
+
+def get_context_top_k(agent_name: str) -> int:
+    """summary_topk 전략에서 요약과 함께 넘길 문서 수를 반환합니다."""
+    return get_env_int(f"CONTEXT_TOP_K_{_camel_to_snake(agent_name)}", DEFAULT_CONTEXT_TOP_K, min_value=0)
+
+
+def select_top_documents(
+    docs: Sequence[Any], summary: str, top_k: int, numbered_positions: Optional[Sequence[int]] = None
+) -> List[Any]:
+    """
+    요약에서 [문서 N] 으로 인용된 문서를 먼저, 나머지는 관련성 점수 순으로 top_k 개를 고릅니다.
+    반환 순서는 원래 문서 순서를 유지합니다.
+
+    Args:
+        numbered_positions: 요약이 참고한 컨텍스트에 [문서 1], [문서 2] ... 로 실린 문서의 docs 내 위치
+                            (ContextBuilder.rendered_positions, 없으면 예산 없이 렌더링했을 때의 순서로 간주)
+    """
+    if top_k <= 0 or not docs:
+        return []
+    if numbered_positions is None:
+        numbered_positions = [i for i, _ in sorted(enumerate(docs), key=lambda item: _document_priority(*item))]
+    cited = []
+    for match in _CITATION_PATTERN.finditer(summary or ""):
+        number = int(match.group(1))
+        if not 1 <= number <= len(numbered_positions):
+            continue
+        index = numbered_positions[number - 1]
+        if 0 <= index < len(docs) and index not in cited:
+            cited.append(index)
+    ranked = [i for i, _ in sorted(enumerate(docs), key=lambda item: _document_priority(*item)) if i not in cited]
+    selected = (cited + ranked)[:top_k]
+    return [docs[i] for i in sorted(selected)]
+
+
+class Tokenizer:
+    """tiktoken 인코더를 지연 로드하여 공유하는 토크나이저"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Tokenizer, cls).__new__(cls)
+            cls._instance._encoding = None
+            cls._instance._loaded = False
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def _get_encoding(self):
+        if self._loaded:
+            return self._encoding
+        with self._lock:
+            if not self._loaded:
+                name = get_env_str("CONTEXT_TOKENIZER_ENCODING", DEFAULT_TOKENIZER_ENCODING)
+                try:
+                    import tiktoken
+                    self._encoding = tiktoken.get_encoding(name)
+                except Exception as e:
+                    logger.warning(f"토크나이저({name})를 불러올 수 없어 문자 수 기반 추정치를 사용합니다: {e}")
+                    self._encoding = None
+                self._loaded = True
+        return self._encoding
+
+    @staticmethod
+    def _estimate(text: str) -> int:
+        # 한글/한자는 대략 글자당 1토큰, 그 외는 4글자당 1토큰
+        cjk = len(_CJK_PATTERN.findall(text))
+        return cjk + (len(text) - cjk + 3) // 4
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        encoding = self._get_encoding()
+        if encoding is None:
+            return self._estimate(text)
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """text 를 max_tokens 이하로 자릅니다. 가능하면 문장/줄 경계에서 자릅니다."""
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+
+        encoding = self._get_encoding()
+        if encoding is not None:
+            cut = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+        else:
+            # 추정치 기준으로 이진 탐색
+            lo, hi = 0, len(text)
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if self._estimate(text[:mid]) <= max_tokens:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            cut = text[:lo]
+
+        boundary = max(cut.rfind("\n"), cut.rfind(". "), cut.rfind("다. "))
+        if boundary > len(cut) // 2:
+            cut = cut[: boundary + 1]
+        return cut.rstrip()
+
+
+tokenizer = Tokenizer()
+
+
+def count_tokens(text: str) -> int:
+    """로컬 토크나이저로 text 의 토큰 수를 계산합니다."""
+    return tokenizer.count(text)
+
+
+def format_document(index: int, doc: Any, content: Optional[str] = None) -> str:
+    """문서 하나를 '[문서 N] 출처: ..., 섹션: ...' 형식의 블록으로 만듭니다."""
+    metadata = getattr(doc, "metadata", {}) or {}
+    source = metadata.get("source", "Unknown")
+    section = metadata.get("section", "")
+    header = f"[문서 {index}] 출처: {source}"
+    if section:
+        header = f"{header}, 섹션: {section}"
+    body = doc.page_content if content is None else content
+    return f"{header}\n{body}\n\n"
+
+
+def _document_priority(position: int, doc: Any) -> tuple:
+    """관련성 점수가 높을수록, 최신일수록(날짜 없는 문서는 마지막), 원래 순서가 앞설수록 우선"""
+    metadata = getattr(doc, "metadata", {}) or {}
+    score = metadata.get("relevance_score")
+    timestamp = _parse_timestamp(metadata.get("date") or metadata.get("published"))
+    return (
+        -(float(score) if score is not None else 0.0),
+        timestamp is None,
+        -(timestamp or 0.0),
+        position,
+    )
+
+
+def _parse_timestamp(value: Any) -> Optional[float]:
+    # 문서 날짜(ISO 문자열/date/datetime/epoch 초)를 UTC 타임스탬프로 변환 (해석할 수 없으면 None)
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        parsed = datetime(value.year, value.month, value.day)
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class _Section:
+    __slots__ = ("title", "content", "weight", "min_tokens")
+
+    def __init__(self, title: str, content: Union[str, Sequence[Any]], weight: float, min_tokens: int):
+        self.title = title
+        self.content = content
+        self.weight = weight
+        self.min_tokens = min_tokens
+
+
+class ContextBuilder:
+    """
+    섹션별 우선순위(weight)에 따라 토큰 예산을 나누어 컨텍스트 문자열을 조립합니다.
+
+    Example:
+        context = (
+            ContextBuilder(budget_tokens=5000)
+            .add_section("[시장 데이터]", market_docs, weight=1)
+            .add_section("[검색 결과]", retrieve_docs, weight=2)
+            .add_section("[분석 결과]", analysis_text, weight=2)
+            .build()
+        )
+    """
+
+    def __init__(self, budget_tokens: Optional[int] = None):
+        self.budget_tokens = budget_tokens if budget_tokens and budget_tokens > 0 else None
+        self._sections: List[_Section] = []
+        self.stats: Dict[str, Any] = {}
+        # 섹션 제목별로 컨텍스트에 [문서 N] 순서로 실린 문서의 원래 위치 (build 후 채워짐)
+        self.rendered_positions: Dict[str, List[int]] = {}
+
+    def add_section(
+        self,
+        title: str,
+        content: Union[str, Sequence[Any], None],
+        weight: float = 1.0,
+        min_tokens: int = 0,
+    ) -> "ContextBuilder":
+        """
+        섹션을 추가합니다. 섹션은 추가한 순서대로 출력됩니다.
+
+        Args:
+            title: 섹션 제목 (빈 문자열이면 제목 없이 본문만 출력)
+            content: Document 리스트 또는 문자열
+            weight: 예산 배분 비중 (클수록 남는 예산도 먼저 배분받음)
+            min_tokens: 비중과 무관하게 보장할 최소 토큰 수
+        """
+        if content:
+            self._sections.append(_Section(title, content, weight, min_tokens))
+        return self
+
+    def _render_section(self, section: _Section, limit: Optional[int]) -> tuple:
+        """
+        섹션을 limit 토큰 이내로 렌더링하여
+        (부분 문자열 리스트, 사용 토큰, 포함 문서 수, 잘린 문서 수, [문서 N] 순서의 포함 문서 위치) 를 반환합니다.
+        """
+        parts: List[str] = []
+        used = 0
+        if section.title:
+            title = f"{section.title}\n"
+            parts.append(title)
+            used += count_tokens(title)
+
+        if isinstance(section.content, str):
+            text = section.content
+            if limit is not None and used + count_tokens(text) > limit:
+                text = tokenizer.truncate(text, limit - used - count_tokens(TRUNCATION_MARK))
+                if not text:
+                    return [], 0, 0, 1, []
+                text += TRUNCATION_MARK
+                truncated = 1
+            else:
+                truncated = 0
+            parts.append(text)
+            return parts, used + count_tokens(text), 1, truncated, []
+
+        ordered = sorted(enumerate(section.content), key=lambda item: _document_priority(*item))
+        kept = 0
+        truncated = 0
+        numbered: List[int] = []
+        for position, doc in ordered:
+            block = format_document(kept + 1, doc)
+            tokens = count_tokens(block)
+            if limit is None or used + tokens <= limit:
+                parts.append(block)
+                numbered.append(position)
+                used += tokens
+                kept += 1
+                continue
+
+            # 남은 예산이 충분하면 본문을 잘라서 포함하고 이후 문서는 제외
+            header_tokens = count_tokens(format_document(kept + 1, doc, content=""))
+            remaining = limit - used - header_tokens - count_tokens(TRUNCATION_MARK)
+            if remaining >= MIN_TRUNCATED_TOKENS:
+                content = tokenizer.truncate(doc.page_content, remaining) + TRUNCATION_MARK
+                block = format_document(kept + 1, doc, content=content)
+                parts.append(block)
+                numbered.append(position)
+                used += count_tokens(block)
+                kept += 1
+                truncated += 1
+            break
+
+        if kept == 0:
+            return [], 0, 0, 0, []
+        return parts, used, kept, truncated, numbered
+
+    def _allocate(self, needs: List[int]) -> List[int]:
+        """섹션별 필요 토큰(needs)을 바탕으로 예산을 배분합니다."""
+        budget = self.budget_tokens
+        total_weight = sum(s.weight for s in self._sections) or 1.0
+        allocations = []
+        for section, need in zip(self._sections, needs):
+            share = max(section.min_tokens, int(budget * section.weight / total_weight))
+            allocations.append(min(need, share))
+
+        # 남는 예산은 비중이 큰 섹션부터(같으면 먼저 추가된 순서) 부족분을 채움
+        leftover = budget - sum(allocations)
+        order = sorted(range(len(needs)), key=lambda i: -self._sections[i].weight)
+        for i in order:
+            if leftover <= 0:
+                break
+            extra = min(leftover, needs[i] - allocations[i])
+            allocations[i] += extra
+            leftover -= extra
+        return allocations
+
+    def build(self) -> str:
+        if not self._sections:
+            self.stats = {"tokens": 0, "budget": self.budget_tokens, "documents": 0, "dropped": 0, "truncated": 0}
+            self.rendered_positions = {}
+            return ""
+
+        separator_tokens = count_tokens("\n")
+        rendered = [self._render_section(s, None) for s in self._sections]
+        needs = [used + separator_tokens for _, used, _, _, _ in rendered]
+
+        if self.budget_tokens is not None and sum(needs) > self.budget_tokens:
+            limits = self._allocate(needs)
+            rendered = [
+                self._render_section(s, limit - separator_tokens) if limit < need else r
+                for s, r, limit, need in zip(self._sections, rendered, limits, needs)
+            ]
+
+        buffer: List[str] = []
+        total_items = sum(1 if isinstance(s.content, str) else len(s.content) for s in self._sections)
+        kept = truncated = tokens = 0
+        self.rendered_positions = {}
+        for section, (parts, used, section_kept, section_truncated, numbered) in zip(self._sections, rendered):
+            if not isinstance(section.content, str):
+                self.rendered_positions[section.title] = numbered
+            if not parts:
+                truncated += section_truncated
+                continue
+            if buffer:
+                buffer.append("\n")
+                tokens += separator_tokens
+            buffer.extend(parts)
+            tokens += used
+            kept += section_kept
+            truncated += section_truncated
+
+        self.stats = {
+            "tokens": tokens,
+            "budget": self.budget_tokens,
+            "documents": kept,
+            "dropped": total_items - kept,
+            "truncated": truncated,
+        }
+        if self.stats["dropped"] or truncated:
+            logger.info(
+                f"컨텍스트 예산 적용: {tokens}/{self.budget_tokens} 토큰, "
+                f"포함 {kept}건, 제외 {self.stats['dropped']}건, 잘림 {truncated}건"
+            )
+        return "".join(buffer)
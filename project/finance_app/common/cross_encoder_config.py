@@ -2,7 +2,7 @@
 크로스 인코더 관련 설정을 관리하는 모듈
 """
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,7 +22,21 @@ DEFAULT_CROSS_ENCODER_CONFIG = {
     "max_documents": 15,
     "rerank_top_k": 5,
     "use_cross_encoder": True,
-    "cache_models": True
+    "cache_models": True,
+    # 2단계 재순위화: 빠른 모델로 전체 후보를 점수화하고 상위 cascade_top_m 개만 정확한 모델로 다시 점수화
+    "cascade_enabled": False,
+    "cascade_fast_model": CROSS_ENCODER_MODELS["fast"],
+    "cascade_accurate_model": CROSS_ENCODER_MODELS["accurate"],
+    "cascade_top_m": 8,
+    # 0이면 앱 프로세스에서 추론, 1 이상이면 해당 개수의 워커 프로세스에서 추론
+    "worker_processes": 0,
+    "worker_timeout": 60.0,
+    # torch 스레드 수 (0이면 torch 기본값, 코어 고정 시에는 고정된 코어 수)
+    "intra_op_threads": 0,
+    "inter_op_threads": 0,
+    # 워커 프로세스 코어 고정: "" (고정 안 함), "0-3,8" (코어 목록), "auto" (허용된 코어를 워커 수로 나눠 워커마다 고정)
+    # 앱 프로세스에서 추론할 때(worker_processes=0)는 앱 전체가 고정되므로 적용하지 않음
+    "cpu_affinity": ""
 }
 
 def _validate_model_name(model_name: str) -> str:
@@ -91,10 +105,152 @@ def get_cross_encoder_config() -> Dict[str, Any]:
         cache_models = os.getenv("CACHE_CROSS_ENCODER_MODELS").lower()
         config["cache_models"] = cache_models in ["true", "1", "yes", "on"]
 
+    if os.getenv("CROSS_ENCODER_CASCADE"):
+        cascade = os.getenv("CROSS_ENCODER_CASCADE").lower()
+        config["cascade_enabled"] = cascade in ["true", "1", "yes", "on"]
+
+    if os.getenv("CROSS_ENCODER_FAST_MODEL"):
+        config["cascade_fast_model"] = _validate_model_name(os.getenv("CROSS_ENCODER_FAST_MODEL"))
+
+    if os.getenv("CROSS_ENCODER_ACCURATE_MODEL"):
+        config["cascade_accurate_model"] = _validate_model_name(os.getenv("CROSS_ENCODER_ACCURATE_MODEL"))
+
+    if os.getenv("CROSS_ENCODER_CASCADE_TOP_M"):
+        try:
+            top_m = int(os.getenv("CROSS_ENCODER_CASCADE_TOP_M"))
+            config["cascade_top_m"] = _validate_positive_int(top_m, 8, "정밀 재점수화 문서 수")
+        except ValueError:
+            logger.warning("CROSS_ENCODER_CASCADE_TOP_M 값이 정수가 아닙니다. 기본값을 사용합니다.")
+
+    if os.getenv("CROSS_ENCODER_WORKERS"):
+        try:
+            workers = int(os.getenv("CROSS_ENCODER_WORKERS"))
+            config["worker_processes"] = max(0, workers)
+        except ValueError:
+            logger.warning("CROSS_ENCODER_WORKERS 값이 정수가 아닙니다. 기본값을 사용합니다.")
+
+    if os.getenv("CROSS_ENCODER_WORKER_TIMEOUT"):
+        try:
+            timeout = float(os.getenv("CROSS_ENCODER_WORKER_TIMEOUT"))
+            config["worker_timeout"] = timeout if timeout > 0 else 60.0
+        except ValueError:
+            logger.warning("CROSS_ENCODER_WORKER_TIMEOUT 값이 숫자가 아닙니다. 기본값을 사용합니다.")
+
+    for env_name, key in [("CROSS_ENCODER_INTRA_OP_THREADS", "intra_op_threads"),
+                          ("CROSS_ENCODER_INTER_OP_THREADS", "inter_op_threads")]:
+        if os.getenv(env_name):
+            try:
+                config[key] = max(0, int(os.getenv(env_name)))
+            except ValueError:
+                logger.warning(f"{env_name} 값이 정수가 아닙니다. 기본값을 사용합니다.")
+
+    if os.getenv("CROSS_ENCODER_CPU_AFFINITY"):
+        affinity = os.getenv("CROSS_ENCODER_CPU_AFFINITY").strip().lower()
+        try:
+            if affinity != "auto":
+                parse_core_list(affinity)
+            config["cpu_affinity"] = affinity
+        except ValueError:
+            logger.warning(f"CROSS_ENCODER_CPU_AFFINITY 형식이 잘못되었습니다: {affinity}")
+
+    if config["cpu_affinity"] and not config["worker_processes"]:
+        # 앱 프로세스를 고정하면 Streamlit 서버/세션 스레드까지 같은 코어에 묶이므로 워커 모드에서만 허용
+        logger.warning("CROSS_ENCODER_CPU_AFFINITY 는 CROSS_ENCODER_WORKERS 가 1 이상일 때만 적용됩니다. 코어 고정 없이 실행합니다.")
+        config["cpu_affinity"] = ""
+
     # 설정 로깅
     logger.info(f"크로스 인코더 설정 로드 완료: {config}")
     return config
 
+def parse_core_list(text: str) -> List[int]:
+    """ "0-3,8" 형식의 코어 목록을 [0, 1, 2, 3, 8] 로 변환합니다."""
+    cores = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+            if start > end:
+                raise ValueError(part)
+            cores.update(range(start, end + 1))
+        else:
+            cores.add(int(part))
+    if not cores or min(cores) < 0:
+        raise ValueError(text)
+    return sorted(cores)
+
+def resolve_cpu_affinity(affinity: str, slot: int = 0, slots: int = 1) -> Optional[List[int]]:
+    """
+    프로세스를 고정할 코어 목록을 계산합니다. 고정하지 않으면 None
+
+    Args:
+        affinity: cpu_affinity 설정값
+        slot: 워커 번호 (auto 일 때 사용)
+        slots: 코어를 나눠 쓰는 워커 수 (auto 일 때 사용)
+    """
+    if not affinity or not hasattr(os, "sched_getaffinity"):
+        return None
+    allowed = sorted(os.sched_getaffinity(0))
+    if affinity == "auto":
+        if slots <= 1:
+            return None
+        # 허용된 코어를 워커 수만큼 연속 구간으로 나눔 (코어가 부족하면 나눠 씀)
+        per_slot = max(1, len(allowed) // slots)
+        start = (slot * per_slot) % len(allowed)
+        return allowed[start:start + per_slot]
+    cores = [c for c in parse_core_list(affinity) if c in allowed]
+    return cores or None
+
+def _set_process_affinity(cores: List[int]) -> None:
+    # os.sched_setaffinity(0) 은 호출한 스레드에만 적용되므로 이미 떠 있는 스레드도 모두 고정
+    task_dir = "/proc/self/task"
+    thread_ids = [int(tid) for tid in os.listdir(task_dir)] if os.path.isdir(task_dir) else [0]
+    for thread_id in thread_ids:
+        try:
+            os.sched_setaffinity(thread_id, cores)
+        except ProcessLookupError:
+            continue
+
+_inter_op_configured = False
+
+def configure_torch_threads(config: Dict[str, Any], slot: int = 0, slots: int = 1) -> Dict[str, Any]:
+    """
+    현재 프로세스에 코어 고정과 torch intra/inter-op 스레드 수를 적용합니다.
+    모델 로드 전에 호출하며, 적용된 값을 반환합니다.
+    코어 고정은 프로세스의 모든 스레드에 적용되므로 워커 프로세스에서만 cpu_affinity 를 넘깁니다.
+    """
+    global _inter_op_configured
+    import torch
+
+    applied: Dict[str, Any] = {}
+    cores = resolve_cpu_affinity(config.get("cpu_affinity", ""), slot, slots)
+    if cores:
+        try:
+            _set_process_affinity(cores)
+            applied["cpu_affinity"] = cores
+        except OSError as e:
+            logger.warning(f"코어 고정 실패({cores}): {e}")
+            cores = None
+
+    intra = config.get("intra_op_threads", 0) or (len(cores) if cores else 0)
+    if intra:
+        torch.set_num_threads(intra)
+    applied["intra_op_threads"] = torch.get_num_threads()
+
+    inter = config.get("inter_op_threads", 0)
+    if inter and not _inter_op_configured:
+        # inter-op 스레드 수는 프로세스에서 병렬 작업이 시작되기 전 한 번만 바꿀 수 있음
+        try:
+            torch.set_num_interop_threads(inter)
+            _inter_op_configured = True
+        except RuntimeError as e:
+            logger.warning(f"inter-op 스레드 수를 변경할 수 없습니다: {e}")
+    applied["inter_op_threads"] = torch.get_num_interop_threads()
+
+    logger.info(f"크로스 인코더 torch 스레드 설정: {applied}")
+    return applied
+
 def get_cross_encoder_model_name() -> str:
     """크로스 인코더 모델명을 반환합니다."""
     return get_cross_encoder_config()["model_name"]
@@ -115,6 +271,18 @@ def is_cross_encoder_enabled() -> bool:
     """크로스 인코더 사용 여부를 반환합니다."""
     return get_cross_encoder_config()["use_cross_encoder"]
 
+def is_cascade_enabled() -> bool:
+    """2단계(빠른 모델 → 정확한 모델) 재순위화 사용 여부를 반환합니다."""
+    return get_cross_encoder_config()["cascade_enabled"]
+
+def get_cascade_top_m() -> int:
+    """정확한 모델로 다시 점수화할 상위 문서 수를 반환합니다."""
+    return get_cross_encoder_config()["cascade_top_m"]
+
+def get_worker_processes() -> int:
+    """크로스 인코더 워커 프로세스 수를 반환합니다. (0이면 앱 프로세스에서 추론)"""
+    return get_cross_encoder_config()["worker_processes"]
+
 def should_cache_models() -> bool:
     """모델 캐싱 여부를 반환합니다."""
     return get_cross_encoder_config()["cache_models"]
@@ -137,7 +305,7 @@ def validate_config() -> bool:
             logger.error("임계값이 유효하지 않습니다.")
             return False
 
-        if config["max_documents"] <= 0 or config["rerank_top_k"] <= 0:
+        if config["max_documents"] <= 0 or config["rerank_top_k"] <= 0 or config["cascade_top_m"] <= 0:
             logger.error("문서 수 설정이 유효하지 않습니다.")
             return False
 
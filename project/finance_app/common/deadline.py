@@ -0,0 +1,166 @@
+"""
+파이프라인 단계별 제한시간과 리포트 전체 SLA 를 관리하는 모듈
+
+- 단계별 제한시간(초)은 환경변수(STAGE_TIMEOUT_<STAGE>)로, 리포트 전체 SLA 는 REPORT_SLA_SECONDS 로 조정합니다.
+- 실제 제한시간은 min(단계 제한시간, 리포트 남은 시간) 이며, 필수 단계(LLM 응답)는 최소 시간을 보장합니다.
+- 제한시간을 넘긴 단계는 StageTimeoutError 를 발생시키고, 호출한 에이전트가 축소 실행(degrade)합니다.
+  버려진 호출도 클라이언트 타임아웃(DDGS, yf.download, AzureChatOpenAI)으로 끝나므로 스레드를 오래 잡지 않습니다.
+  축소된 단계는 AgentState["degraded_stages"] 에 기록됩니다.
+- 동기 단계는 스레드 풀에서 실행하되 호출 측의 contextvars(LangChain 콜백/실행 설정)와
+  Streamlit 스크립트 컨텍스트를 그대로 넘겨 Langfuse 추적과 st.warning/st.error 가 유지되게 합니다.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+
+from common.env import get_env_float, get_env_int
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STAGE_TIMEOUTS = {
+    "ticker_suggestion": 20.0,
+    "market_data": 20.0,
+    "yfinance": 10.0,       # yf.download 클라이언트 타임아웃
+    "retrieve": 45.0,
+    "ddg_search": 10.0,     # DDGS 클라이언트 타임아웃
+    "llm": 90.0,
+}
+DEFAULT_REPORT_SLA_SECONDS = 300.0
+# 필수 단계에 보장하는 최소 제한시간
+DEFAULT_MIN_REQUIRED_TIMEOUT = 15.0
+
+# 제한시간을 두고 실행할 동기 작업용 스레드 풀
+# 제한시간을 넘겨 버려진 LLM 호출이 검색/시세 단계의 스레드를 차지하지 않도록 LLM 단계는 별도 풀에서 실행
+_executor = ThreadPoolExecutor(
+    max_workers=get_env_int("STAGE_TIMEOUT_WORKERS", 32, min_value=1),
+    thread_name_prefix="stage",
+)
+_llm_executor = ThreadPoolExecutor(
+    max_workers=get_env_int("STAGE_TIMEOUT_LLM_WORKERS", 16, min_value=1),
+    thread_name_prefix="stage-llm",
+)
+# LLM 호출만 하는 단계
+LLM_STAGES = ("llm", "ticker_suggestion")
+
+
+class StageTimeoutError(TimeoutError):
+    """단계 제한시간 초과"""
+
+    def __init__(self, stage: str, timeout: float):
+        super().__init__(f"{stage} 단계가 제한시간 {timeout:.1f}초를 초과했습니다.")
+        self.stage = stage
+        self.timeout = timeout
+
+
+def get_stage_timeout(stage: str) -> float:
+    """단계의 기본 제한시간(초)을 반환합니다. (예: STAGE_TIMEOUT_DDG_SEARCH=5)"""
+    default = DEFAULT_STAGE_TIMEOUTS.get(stage, DEFAULT_STAGE_TIMEOUTS["llm"])
+    return get_env_float(f"STAGE_TIMEOUT_{stage.upper()}", default, min_value=0.1)
+
+
+def get_report_sla() -> float:
+    return get_env_float("REPORT_SLA_SECONDS", DEFAULT_REPORT_SLA_SECONDS, min_value=1.0)
+
+
+def new_report_deadline() -> float:
+    """지금부터 리포트 SLA 가 끝나는 시각(time.time 기준)을 반환합니다."""
+    return time.time() + get_report_sla()
+
+
+def remaining_time(state: Optional[Dict[str, Any]]) -> Optional[float]:
+    """state 의 리포트 마감까지 남은 시간(초). 마감이 없으면 None"""
+    deadline = (state or {}).get("deadline")
+    if not deadline:
+        return None
+    return deadline - time.time()
+
+
+def resolve_timeout(stage: str, state: Optional[Dict[str, Any]] = None, required: bool = False) -> float:
+    """
+    단계 제한시간과 리포트 남은 시간 중 작은 값을 반환합니다.
+
+    Args:
+        stage: 단계 이름
+        state: AgentState (deadline 필드 사용)
+        required: True면 남은 시간이 부족해도 최소 시간을 보장
+    """
+    timeout = get_stage_timeout(stage)
+    remaining = remaining_time(state)
+    if remaining is not None:
+        timeout = min(timeout, remaining)
+    if required:
+        floor = get_env_float("STAGE_TIMEOUT_MIN_REQUIRED", DEFAULT_MIN_REQUIRED_TIMEOUT, min_value=0.1)
+        timeout = max(timeout, floor)
+    return timeout
+
+
+def _run_in_caller_context(context: contextvars.Context, script_ctx, fn: Callable, *args, **kwargs) -> Any:
+    """풀 스레드에서 호출 측 contextvars 와 Streamlit 스크립트 컨텍스트로 fn 을 실행합니다."""
+    thread = threading.current_thread()
+
+    def run() -> Any:
+        if script_ctx is not None:
+            add_script_run_ctx(thread, script_ctx)
+        return fn(*args, **kwargs)
+
+    try:
+        return context.run(run)
+    finally:
+        if script_ctx is not None:
+            # 풀 스레드는 재사용되므로 다음 작업에 이 세션의 스크립트 컨텍스트가 남지 않게 해제
+            setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+
+
+def call_with_timeout(stage: str, fn: Callable, *args, state: Optional[Dict[str, Any]] = None,
+                      required: bool = False, **kwargs) -> Any:
+    """
+    동기 함수를 제한시간 안에 실행합니다. 초과하면 StageTimeoutError 를 발생시킵니다.
+    (초과된 작업은 백그라운드 스레드에서 끝날 때까지 실행되지만 결과는 버립니다.)
+    """
+    timeout = resolve_timeout(stage, state, required)
+    if timeout <= 0:
+        raise StageTimeoutError(stage, 0.0)
+    executor = _llm_executor if stage in LLM_STAGES else _executor
+    future = executor.submit(
+        _run_in_caller_context,
+        contextvars.copy_context(),
+        get_script_run_ctx(suppress_warning=True),
+        fn,
+        *args,
+        **kwargs,
+    )
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise StageTimeoutError(stage, timeout) from None
+
+
+async def acall_with_timeout(stage: str, awaitable: Awaitable, state: Optional[Dict[str, Any]] = None,
+                             required: bool = False) -> Any:
+    """비동기 작업을 제한시간 안에 실행합니다. 초과하면 작업을 취소하고 StageTimeoutError 를 발생시킵니다."""
+    timeout = resolve_timeout(stage, state, required)
+    if timeout <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise StageTimeoutError(stage, 0.0)
+    try:
+        return await asyncio.wait_for(awaitable, timeout=timeout)
+    except asyncio.TimeoutError:
+        raise StageTimeoutError(stage, timeout) from None
+
+
+def mark_degraded(state: Dict[str, Any], stage: str, reason: Exception = None) -> Dict[str, Any]:
+    """state 에 축소 실행된 단계를 기록한 새 dict 를 반환합니다."""
+    logger.warning(f"단계 축소 실행: {stage} ({reason})")
+    degraded = list(state.get("degraded_stages") or [])
+    if stage not in degraded:
+        degraded.append(stage)
+    return {**state, "degraded_stages": degraded}
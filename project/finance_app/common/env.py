@@ -0,0 +1,55 @@
+"""
+환경변수 값을 타입별로 읽어오는 헬퍼 모듈
+"""
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+_TRUE_VALUES = ["true", "1", "yes", "on"]
+
+
+def get_env_str(name: str, default: str) -> str:
+    """문자열 환경변수를 반환합니다. 비어 있으면 기본값을 사용합니다."""
+    value = os.getenv(name)
+    return value if value else default
+
+
+def get_env_bool(name: str, default: bool) -> bool:
+    """불리언 환경변수를 반환합니다."""
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.lower() in _TRUE_VALUES
+
+
+def get_env_int(name: str, default: int, min_value: int = None) -> int:
+    """정수 환경변수를 반환합니다. 형식이 잘못되었거나 범위를 벗어나면 기본값을 사용합니다."""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        parsed = int(value)
+    except ValueError:
+        logger.warning(f"{name} 값이 정수가 아닙니다. 기본값 {default}을 사용합니다.")
+        return default
+    if min_value is not None and parsed < min_value:
+        logger.warning(f"{name}이 유효하지 않음: {parsed}, 기본값 {default}을 사용합니다.")
+        return default
+    return parsed
+
+
+def get_env_float(name: str, default: float, min_value: float = None, max_value: float = None) -> float:
+    """실수 환경변수를 반환합니다. 형식이 잘못되었거나 범위를 벗어나면 기본값을 사용합니다."""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        parsed = float(value)
+    except ValueError:
+        logger.warning(f"{name} 값이 숫자가 아닙니다. 기본값 {default}을 사용합니다.")
+        return default
+    if (min_value is not None and parsed < min_value) or (max_value is not None and parsed > max_value):
+        logger.warning(f"{name}이 범위를 벗어남: {parsed}, 기본값 {default}을 사용합니다.")
+        return default
+    return parsed
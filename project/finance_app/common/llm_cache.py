@@ -0,0 +1,258 @@
+"""
+LLM 호출 결과를 임베딩 유사도로 재사용하는 시맨틱 캐시 모듈
+
+- 호출 지점(namespace)별로 독립된 캐시를 유지합니다.
+- scope(자본금/위험성향 등)는 정확히 일치해야 하고, key(주제 등)는 임베딩 유사도로 비교합니다.
+- TTL 만료, LRU 방식의 용량 제한, 적중률 통계를 제공합니다.
+"""
+import asyncio
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from common.config import get_llm, get_embeddings
+from common.env import get_env_bool, get_env_float, get_env_int
+from common.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LLM_CACHE_CONFIG = {
+    "enabled": True,
+    "similarity_threshold": 0.93,
+    "ttl_seconds": 6 * 60 * 60,
+    "max_entries": 256,
+}
+
+
+def get_llm_cache_config() -> Dict[str, Any]:
+    """환경변수에서 시맨틱 캐시 설정을 읽어옵니다."""
+    config = DEFAULT_LLM_CACHE_CONFIG.copy()
+    config["enabled"] = get_env_bool("LLM_CACHE_ENABLED", config["enabled"])
+    config["similarity_threshold"] = get_env_float(
+        "LLM_CACHE_THRESHOLD", config["similarity_threshold"], min_value=0.0, max_value=1.0
+    )
+    config["ttl_seconds"] = get_env_int("LLM_CACHE_TTL", config["ttl_seconds"], min_value=1)
+    config["max_entries"] = get_env_int("LLM_CACHE_MAX_ENTRIES", config["max_entries"], min_value=1)
+    return config
+
+
+class _CacheEntry:
+    __slots__ = ("scope", "key", "vector", "completion", "created_at")
+
+    def __init__(self, scope: str, key: str, vector: np.ndarray, completion: str):
+        self.scope = scope
+        self.key = key
+        self.vector = vector
+        self.completion = completion
+        self.created_at = time.monotonic()
+
+
+class SemanticCache:
+    """하나의 호출 지점(namespace)에 대한 시맨틱 캐시"""
+
+    def __init__(self, namespace: str, similarity_threshold: float, ttl_seconds: int, max_entries: int):
+        self.namespace = namespace
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._embeddings = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        try:
+            if self._embeddings is None:
+                self._embeddings = get_embeddings()
+            vector = np.asarray(self._embeddings.embed_query(text), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            return vector / norm if norm > 0 else None
+        except Exception as e:
+            logger.warning(f"시맨틱 캐시 임베딩 실패({self.namespace}): {e}")
+            return None
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [k for k, e in self._entries.items() if now - e.created_at > self.ttl_seconds]
+        for k in expired:
+            del self._entries[k]
+        self.expirations += len(expired)
+
+    def lookup(self, scope: str, key: str) -> tuple:
+        """
+        캐시를 조회합니다.
+
+        Returns:
+            (저장된 응답 또는 None, key 임베딩 벡터 또는 None)
+        """
+        with self._lock:
+            self._purge_expired()
+            # 완전히 같은 key는 임베딩 없이 바로 반환
+            for entry_id, entry in self._entries.items():
+                if entry.scope == scope and entry.key == key:
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return entry.completion, entry.vector
+            candidates = [(k, e) for k, e in self._entries.items() if e.scope == scope]
+
+        vector = self._embed(key)
+        if vector is None:
+            with self._lock:
+                self.misses += 1
+            return None, None
+
+        with self._lock:
+            best_id, best_score = None, -1.0
+            if candidates:
+                ids = [k for k, _ in candidates]
+                matrix = np.stack([e.vector for _, e in candidates])
+                scores = matrix @ vector
+                idx = int(np.argmax(scores))
+                best_id, best_score = ids[idx], float(scores[idx])
+
+            if best_id is not None and best_score >= self.similarity_threshold and best_id in self._entries:
+                self._entries.move_to_end(best_id)
+                self.hits += 1
+                logger.info(f"시맨틱 캐시 적중({self.namespace}): 유사도 {best_score:.3f}")
+                return self._entries[best_id].completion, vector
+
+            self.misses += 1
+            return None, vector
+
+    def store(self, scope: str, key: str, completion: str, vector: Optional[np.ndarray] = None) -> None:
+        """응답을 캐시에 저장합니다. 용량을 넘으면 가장 오래 사용되지 않은 항목을 제거합니다."""
+        if vector is None:
+            vector = self._embed(key)
+            if vector is None:
+                return
+
+        with self._lock:
+            self._entries[self._next_id] = _CacheEntry(scope, key, vector, completion)
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "namespace": self.namespace,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class CachedLLM:
+    """get_llm() 결과를 감싸 invoke 호출을 시맨틱 캐시로 처리하는 래퍼"""
+
+    def __init__(self, cache: SemanticCache, key: Optional[str] = None, scope: str = ""):
+        self.cache = cache
+        self.key = key
+        self.scope = scope
+
+    def _resolve_key(self, messages: List[BaseMessage]) -> str:
+        if self.key:
+            return self.key
+        # key가 없으면 마지막 사용자 메시지를 비교 대상으로 사용
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                return str(message.content)
+        return str(messages[-1].content) if messages else ""
+
+    def _record_stats(self) -> None:
+        stats = self.cache.get_stats()
+        metrics_registry.set_gauge("llm_cache_hit_ratio", stats["hit_ratio"], namespace=self.cache.namespace)
+        metrics_registry.set_gauge("llm_cache_entries", stats["entries"], namespace=self.cache.namespace)
+
+    def invoke(self, messages: List[BaseMessage], **kwargs) -> BaseMessage:
+        key = self._resolve_key(messages)
+        completion, vector = self.cache.lookup(self.scope, key)
+        self._record_stats()
+        if completion is not None:
+            return AIMessage(content=completion)
+
+        response = get_llm().invoke(messages, **kwargs)
+        if response.content:
+            self.cache.store(self.scope, key, response.content, vector)
+        return response
+
+    async def ainvoke(self, messages: List[BaseMessage], **kwargs) -> BaseMessage:
+        key = self._resolve_key(messages)
+        # 조회/저장 시의 임베딩 호출은 동기 클라이언트이므로 스레드로 넘김
+        completion, vector = await asyncio.to_thread(self.cache.lookup, self.scope, key)
+        self._record_stats()
+        if completion is not None:
+            return AIMessage(content=completion)
+
+        response = await get_llm().ainvoke(messages, **kwargs)
+        if response.content:
+            await asyncio.to_thread(self.cache.store, self.scope, key, response.content, vector)
+        return response
+
+
+# 전역 캐시 인스턴스 (namespace별)
+_caches: Dict[str, SemanticCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_semantic_cache(namespace: str) -> SemanticCache:
+    """namespace에 해당하는 전역 시맨틱 캐시 인스턴스를 반환합니다."""
+    with _caches_lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            config = get_llm_cache_config()
+            cache = SemanticCache(
+                namespace=namespace,
+                similarity_threshold=config["similarity_threshold"],
+                ttl_seconds=config["ttl_seconds"],
+                max_entries=config["max_entries"],
+            )
+            _caches[namespace] = cache
+        return cache
+
+
+def get_cached_llm(namespace: str, key: Optional[str] = None, scope: str = ""):
+    """
+    시맨틱 캐시가 적용된 LLM을 반환합니다. 캐시가 비활성화되어 있으면 get_llm()을 그대로 반환합니다.
+
+    Args:
+        namespace: 호출 지점 이름 (호출 지점마다 캐시가 분리됨)
+        key: 유사도 비교에 사용할 텍스트 (None이면 마지막 사용자 메시지)
+        scope: 정확히 일치해야 캐시를 재사용하는 조건 문자열
+    """
+    if not get_llm_cache_config()["enabled"]:
+        return get_llm()
+    return CachedLLM(get_semantic_cache(namespace), key=key, scope=scope)
+
+
+def get_llm_cache_stats() -> List[Dict[str, Any]]:
+    """모든 시맨틱 캐시의 적중률 통계를 반환합니다."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    return [cache.get_stats() for cache in caches]
+
+
+def clear_llm_caches() -> None:
+    """모든 시맨틱 캐시를 비웁니다."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.clear()
@@ -0,0 +1,77 @@
+"""
+로컬 sentence-transformers 임베딩 (EMBEDDING_BACKEND=local)
+
+- 다국어 문장 임베딩 모델(LOCAL_EMBEDDING_MODEL)을 CPU 에서 실행하여
+  FAISS 생성/시맨틱 캐시/티커 추천이 Azure OpenAI 임베딩 API 왕복 없이 동작하게 합니다.
+- LOCAL_EMBEDDING_BATCH_SIZE 단위로 묶어서 L2 정규화된 벡터로 인코딩합니다.
+  LangChain 메서드(embed_documents/embed_query)는 규약대로 리스트를 반환하고,
+  FAISS 생성처럼 배열이 필요한 호출 측은 encode() 로 float32 배열(문서 수 x 차원)을 복사 없이 받을 수 있습니다.
+- LOCAL_EMBEDDING_ONNX=true 면 ONNX Runtime 백엔드로 실행합니다. (optimum[onnxruntime] 필요)
+"""
+import logging
+import threading
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from common.env import get_env_bool, get_env_int, get_env_str
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+DEFAULT_BATCH_SIZE = 32
+
+
+class LocalSentenceEmbeddings(Embeddings):
+    """SentenceTransformer 를 감싼 LangChain Embeddings"""
+
+    def __init__(self, model_name: str, batch_size: int = DEFAULT_BATCH_SIZE, onnx: bool = False, device: str = "cpu"):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        # backend 인자는 sentence-transformers 3.2 이상에서만 지원되므로 ONNX 일 때만 전달
+        kwargs = {"backend": "onnx"} if onnx else {}
+        logger.info(f"로컬 임베딩 모델 로드 시작: {model_name} (onnx={onnx}, device={device})")
+        self.model = SentenceTransformer(model_name, device=device, **kwargs)
+        get_dimension = getattr(self.model, "get_embedding_dimension", None) or self.model.get_sentence_embedding_dimension
+        self.dimension = get_dimension()
+        logger.info(f"로컬 임베딩 모델 로드 완료: {model_name} ({self.dimension}차원)")
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """정규화된 float32 임베딩 배열 (len(texts) x dimension)"""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+
+_local_embeddings = None
+_local_embeddings_lock = threading.Lock()
+
+
+def get_local_embeddings() -> LocalSentenceEmbeddings:
+    """환경변수 설정으로 만든 전역 로컬 임베딩 모델을 반환합니다. (최초 호출 시 로드)"""
+    global _local_embeddings
+    with _local_embeddings_lock:
+        if _local_embeddings is None:
+            _local_embeddings = LocalSentenceEmbeddings(
+                model_name=get_env_str("LOCAL_EMBEDDING_MODEL", DEFAULT_MODEL),
+                batch_size=get_env_int("LOCAL_EMBEDDING_BATCH_SIZE", DEFAULT_BATCH_SIZE, min_value=1),
+                onnx=get_env_bool("LOCAL_EMBEDDING_ONNX", False),
+                device=get_env_str("LOCAL_EMBEDDING_DEVICE", "cpu"),
+            )
+        return _local_embeddings
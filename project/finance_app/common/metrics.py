@@ -0,0 +1,270 @@
+"""
+파이프라인 단계별 지연시간/입출력 크기/토큰 수를 수집하는 프로세스 내 메트릭 모듈
+
+- span(stage, **labels) 컨텍스트 매니저로 각 단계를 계측합니다.
+- 단계별 히스토그램(p50/p95/p99)과 카운터를 MetricsRegistry 에 모읍니다.
+- render_prometheus() 로 Prometheus 텍스트 포맷을 만들고,
+  METRICS_PORT 가 설정되면 로컬 HTTP 엔드포인트(/metrics)로 노출합니다.
+"""
+import threading
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from common.env import get_env_int, get_env_str
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "finance_app"
+QUANTILES = (0.5, 0.95, 0.99)
+# 분위수 계산에 사용하는 최근 샘플 수
+_RESERVOIR_SIZE = 2048
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class _StageStats:
+    __slots__ = ("samples", "count", "total", "errors", "input_size", "output_size",
+                 "input_tokens", "output_tokens")
+
+    def __init__(self):
+        self.samples = deque(maxlen=_RESERVOIR_SIZE)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.input_size = 0
+        self.output_size = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+
+class Span:
+    """span() 안에서 입출력 크기와 토큰 수를 기록하는 객체"""
+
+    def __init__(self, stage: str, labels: Dict[str, str]):
+        self.stage = stage
+        self.labels = labels
+        self.input_size = 0
+        self.output_size = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def set_input(self, size: int) -> None:
+        self.input_size = int(size or 0)
+
+    def set_output(self, size: int) -> None:
+        self.output_size = int(size or 0)
+
+    def add_tokens(self, input_tokens: int = 0, output_tokens: int = 0) -> None:
+        self.input_tokens += int(input_tokens or 0)
+        self.output_tokens += int(output_tokens or 0)
+
+    def record_llm_response(self, response: Any) -> None:
+        """LLM 응답의 usage_metadata 와 본문 길이를 기록합니다."""
+        usage = getattr(response, "usage_metadata", None) or {}
+        self.add_tokens(usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+        self.set_output(len(getattr(response, "content", "") or ""))
+
+
+class MetricsRegistry:
+    """단계별 메트릭을 보관하는 레지스트리"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(MetricsRegistry, cls).__new__(cls)
+            cls._instance._stats = {}
+            cls._instance._gauges = {}
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    @staticmethod
+    def _key(stage: str, labels: Dict[str, str]) -> Tuple[str, LabelKey]:
+        return stage, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def observe(self, span: Span, elapsed: float, error: bool = False) -> None:
+        key = self._key(span.stage, span.labels)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _StageStats()
+            stats.samples.append(elapsed)
+            stats.count += 1
+            stats.total += elapsed
+            stats.errors += int(error)
+            stats.input_size += span.input_size
+            stats.output_size += span.output_size
+            stats.input_tokens += span.input_tokens
+            stats.output_tokens += span.output_tokens
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        """외부 모듈(캐시, 서킷 브레이커 등)의 현재 상태 값을 기록합니다."""
+        with self._lock:
+            self._gauges[self._key(name, labels)] = float(value)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """단계별 통계를 dict 리스트로 반환합니다."""
+        with self._lock:
+            items = [(key, stats, sorted(stats.samples)) for key, stats in self._stats.items()]
+        result = []
+        for (stage, labels), stats, samples in items:
+            result.append({
+                "stage": stage,
+                "labels": dict(labels),
+                "count": stats.count,
+                "errors": stats.errors,
+                "total_sec": stats.total,
+                **{f"p{int(q * 100)}_sec": _quantile(samples, q) for q in QUANTILES},
+                "input_size": stats.input_size,
+                "output_size": stats.output_size,
+                "input_tokens": stats.input_tokens,
+                "output_tokens": stats.output_tokens,
+            })
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._gauges.clear()
+
+    def render_prometheus(self) -> str:
+        """Prometheus 텍스트 포맷으로 메트릭을 출력합니다."""
+        with self._lock:
+            items = [(key, stats, sorted(stats.samples)) for key, stats in self._stats.items()]
+            gauges = list(self._gauges.items())
+
+        def fmt_labels(labels: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = [(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs]
+            return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+        latency = f"{METRIC_PREFIX}_stage_latency_seconds"
+        lines = [
+            f"# HELP {latency} Pipeline stage latency.",
+            f"# TYPE {latency} summary",
+        ]
+        for (stage, labels), stats, samples in items:
+            base = (("stage", stage),) + labels
+            for q in QUANTILES:
+                lines.append(f"{latency}{fmt_labels(base, (('quantile', str(q)),))} {_quantile(samples, q):.6f}")
+            lines.append(f"{latency}_sum{fmt_labels(base)} {stats.total:.6f}")
+            lines.append(f"{latency}_count{fmt_labels(base)} {stats.count}")
+
+        counters = [
+            ("stage_errors_total", "Stage executions that raised.", lambda s: s.errors),
+            ("stage_input_size_total", "Sum of stage input sizes (items or chars).", lambda s: s.input_size),
+            ("stage_output_size_total", "Sum of stage output sizes (items or chars).", lambda s: s.output_size),
+            ("stage_input_tokens_total", "LLM input tokens.", lambda s: s.input_tokens),
+            ("stage_output_tokens_total", "LLM output tokens.", lambda s: s.output_tokens),
+        ]
+        for name, help_text, getter in counters:
+            metric = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for (stage, labels), stats, _ in items:
+                lines.append(f"{metric}{fmt_labels((('stage', stage),) + labels)} {getter(stats)}")
+
+        for (name, labels), value in gauges:
+            metric = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric}{fmt_labels(labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+
+@contextmanager
+def span(stage: str, **labels) -> Iterator[Span]:
+    """
+    한 단계의 실행 시간을 측정하여 레지스트리에 기록합니다.
+
+    Example:
+        with span("ddg_search", query=q) as s:
+            results = ddgs.text(q)
+            s.set_output(len(results))
+    """
+    current = Span(stage, labels)
+    start = time.perf_counter()
+    error = False
+    try:
+        yield current
+    except BaseException:
+        error = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics_registry.observe(current, elapsed, error)
+        logger.debug(
+            f"[span] {stage} {labels} {elapsed * 1000:.1f}ms "
+            f"in={current.input_size} out={current.output_size} "
+            f"tokens={current.input_tokens}/{current.output_tokens}"
+        )
+
+
+def messages_size(messages: List[Any]) -> int:
+    """LLM 메시지 리스트의 전체 문자 수를 반환합니다."""
+    return sum(len(str(getattr(m, "content", m))) for m in messages)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = metrics_registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("metrics endpoint: " + format % args)
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = None, host: str = None) -> Optional[ThreadingHTTPServer]:
+    """
+    /metrics 엔드포인트를 백그라운드 스레드로 시작합니다. 프로세스당 한 번만 시작됩니다.
+
+    Args:
+        port: 포트 (None이면 METRICS_PORT 환경변수, 0 또는 미설정이면 시작하지 않음)
+        host: 바인딩 주소 (None이면 METRICS_HOST 환경변수, 기본 127.0.0.1)
+    """
+    global _server
+    port = port if port is not None else get_env_int("METRICS_PORT", 0, min_value=0)
+    if not port:
+        return None
+    host = host or get_env_str("METRICS_HOST", "127.0.0.1")
+
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            logger.warning(f"메트릭 엔드포인트를 시작할 수 없습니다({host}:{port}): {e}")
+            return None
+        thread = threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True)
+        thread.start()
+        logger.info(f"메트릭 엔드포인트 시작: http://{host}:{port}/metrics")
+        return _server
@@ -0,0 +1,62 @@
+"""
+프로세스 공용 토큰 버킷 요청 제한기
+
+- rate(초당 토큰)로 채워지고 capacity 만큼 순간 요청(burst)을 허용합니다.
+- acquire 는 토큰이 생길 때까지 대기하며, timeout 안에 얻지 못하면 False 를 반환합니다.
+"""
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """스레드 안전한 토큰 버킷"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """대기 없이 토큰을 얻습니다."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        토큰을 얻을 때까지 대기합니다.
+
+        Args:
+            tokens: 필요한 토큰 수
+            timeout: 최대 대기 시간(초). None이면 무한 대기
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate if self.rate > 0 else float("inf")
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or wait > remaining:
+                    return False
+            time.sleep(min(wait, 1.0))
+
+    def available(self) -> float:
+        """현재 남은 토큰 수"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
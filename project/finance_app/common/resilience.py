@@ -0,0 +1,252 @@
+"""
+외부 제공자(DuckDuckGo, yfinance, Azure OpenAI) 호출 보호 계층
+
+- 제공자마다 프로세스 공용 토큰 버킷(요청 제한)과 서킷 브레이커를 둡니다.
+- 연속 실패가 PROVIDER_<NAME>_FAILURE_THRESHOLD 회를 넘으면 서킷이 열리고(open),
+  PROVIDER_<NAME>_RECOVERY_SEC 동안은 호출하지 않고 즉시 ProviderUnavailableError 를 발생시킵니다.
+  이후 반열림(half-open) 상태에서 시험 호출 1건만 보내 성공하면 닫고, 실패하면 다시 엽니다.
+- 서킷 실패로 세는 오류는 전송 오류/시간 초과/429/5xx 뿐이며(is_provider_failure),
+  잘못된 요청(400, 콘텐츠 필터), 응답 파싱 오류, 빈 결과 같은 호출별 오류는 서킷 상태를 바꾸지 않고 그대로 전달합니다.
+- 호출 측은 ProviderUnavailableError 를 받으면 캐시된 데이터로 대체합니다.
+- 상태는 provider_circuit_state(0=closed, 1=half_open, 2=open), provider_rejected_total 게이지로 노출됩니다.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+from common.env import get_env_float, get_env_int
+from common.metrics import metrics_registry
+from common.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVIDER_CONFIGS = {
+    "ddg": {"rate_per_sec": 2.0, "burst": 4, "failure_threshold": 5, "recovery_sec": 30.0, "max_wait_sec": 5.0},
+    "yfinance": {"rate_per_sec": 1.0, "burst": 3, "failure_threshold": 3, "recovery_sec": 30.0, "max_wait_sec": 10.0},
+    "llm": {"rate_per_sec": 10.0, "burst": 20, "failure_threshold": 5, "recovery_sec": 20.0, "max_wait_sec": 10.0},
+}
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class ProviderUnavailableError(RuntimeError):
+    """서킷이 열려 있거나 요청 한도를 기다릴 수 없어 호출하지 않은 경우"""
+
+    def __init__(self, provider: str, reason: str):
+        super().__init__(f"{provider} 호출 차단: {reason}")
+        self.provider = provider
+        self.reason = reason
+
+
+# 선택 의존성(openai/httpx/duckduckgo_search/yfinance)을 import 하지 않고 클래스 이름으로 판별하는 일시적 오류
+_TRANSIENT_ERROR_NAMES = {
+    "APIConnectionError",         # openai (APITimeoutError 포함)
+    "TransportError",             # httpx (연결/읽기 시간 초과 포함)
+    "DuckDuckGoSearchException",  # duckduckgo_search 전송 오류 (RatelimitException/TimeoutException 포함)
+    "YFRateLimitError",           # yfinance
+}
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """제공자 장애로 볼 오류(전송 오류, 시간 초과, 429, 5xx)인지 확인합니다."""
+    if isinstance(error, (OSError, asyncio.TimeoutError)):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    return any(cls.__name__ in _TRANSIENT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def get_provider_config(provider: str) -> Dict[str, Any]:
+    """제공자별 설정을 환경변수에서 읽어옵니다. (예: PROVIDER_DDG_RATE_PER_SEC=1)"""
+    config = DEFAULT_PROVIDER_CONFIGS.get(provider, DEFAULT_PROVIDER_CONFIGS["llm"]).copy()
+    prefix = f"PROVIDER_{provider.upper()}"
+    config["rate_per_sec"] = get_env_float(f"{prefix}_RATE_PER_SEC", config["rate_per_sec"], min_value=0.01)
+    config["burst"] = get_env_int(f"{prefix}_BURST", config["burst"], min_value=1)
+    config["failure_threshold"] = get_env_int(f"{prefix}_FAILURE_THRESHOLD", config["failure_threshold"], min_value=1)
+    config["recovery_sec"] = get_env_float(f"{prefix}_RECOVERY_SEC", config["recovery_sec"], min_value=0.0)
+    config["max_wait_sec"] = get_env_float(f"{prefix}_MAX_WAIT_SEC", config["max_wait_sec"], min_value=0.0)
+    return config
+
+
+class CircuitBreaker:
+    """연속 실패 횟수 기반 서킷 브레이커 (closed → open → half_open → closed)"""
+
+    def __init__(self, name: str, failure_threshold: int, recovery_sec: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_sec = recovery_sec
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """호출 가능 여부. 반열림 상태에서는 시험 호출 1건만 허용합니다."""
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_sec:
+                    return False
+                self._set_state(HALF_OPEN)
+            if self._state == HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def release(self) -> None:
+        """호출하지 못한 시험 호출 자리를 반납합니다."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self._state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                if self._state != OPEN:
+                    self._set_state(OPEN)
+
+    def _set_state(self, state: str) -> None:
+        logger.warning(f"{self.name} 서킷 상태 변경: {self._state} → {state}")
+        self._state = state
+        metrics_registry.set_gauge("provider_circuit_state", _STATE_VALUES[state], provider=self.name)
+
+
+class ProviderGuard:
+    """제공자 하나에 대한 요청 제한 + 서킷 브레이커"""
+
+    def __init__(self, provider: str):
+        config = get_provider_config(provider)
+        self.provider = provider
+        self.max_wait_sec = config["max_wait_sec"]
+        self.bucket = TokenBucket(rate=config["rate_per_sec"], capacity=config["burst"])
+        self.breaker = CircuitBreaker(provider, config["failure_threshold"], config["recovery_sec"])
+        self._rejected = 0
+        self._lock = threading.Lock()
+        metrics_registry.set_gauge("provider_circuit_state", _STATE_VALUES[CLOSED], provider=provider)
+
+    def _reject(self, reason: str) -> ProviderUnavailableError:
+        with self._lock:
+            self._rejected += 1
+            rejected = self._rejected
+        metrics_registry.set_gauge("provider_rejected_total", rejected, provider=self.provider)
+        return ProviderUnavailableError(self.provider, reason)
+
+    def _record_error(self, error: Exception) -> None:
+        if is_provider_failure(error):
+            self.breaker.record_failure()
+        else:
+            # 호출별 오류는 제공자 상태와 무관하므로 시험 호출 자리만 반납
+            self.breaker.release()
+
+    def _before_call(self) -> None:
+        if not self.breaker.allow():
+            raise self._reject("서킷 열림")
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """요청 한도와 서킷 상태를 확인한 뒤 fn 을 호출합니다."""
+        self._before_call()
+        if not self.bucket.acquire(timeout=self.max_wait_sec):
+            self.breaker.release()
+            raise self._reject("요청 한도 초과")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._record_error(e)
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def acall(self, fn: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        """call 의 비동기 버전 (토큰 대기는 스레드로 넘김)"""
+        self._before_call()
+        if not self.bucket.try_acquire():
+            acquired = await asyncio.to_thread(self.bucket.acquire, 1.0, self.max_wait_sec)
+            if not acquired:
+                self.breaker.release()
+                raise self._reject("요청 한도 초과")
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self._record_error(e)
+            raise
+        self.breaker.record_success()
+        return result
+
+
+class GuardedChatModel:
+    """채팅 모델의 invoke/ainvoke 호출을 ProviderGuard 로 보호하는 래퍼 (그 외 속성은 원본 모델에 위임)"""
+
+    def __init__(self, model: Any, guard: ProviderGuard):
+        self.model = model
+        self.guard = guard
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs) -> Any:
+        return self.guard.call(self.model.invoke, input, config=config, **kwargs)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs) -> Any:
+        return await self.guard.acall(self.model.ainvoke, input, config=config, **kwargs)
+
+    def with_structured_output(self, schema: Any, **kwargs) -> Runnable:
+        structured = self.model.with_structured_output(schema, **kwargs)
+
+        def invoke(input: Any, config: RunnableConfig) -> Any:
+            return self.guard.call(structured.invoke, input, config=config)
+
+        async def ainvoke(input: Any, config: RunnableConfig) -> Any:
+            return await self.guard.acall(structured.ainvoke, input, config=config)
+
+        return RunnableLambda(invoke, afunc=ainvoke)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+
+_guards: Dict[str, ProviderGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def get_provider_guard(provider: str) -> ProviderGuard:
+    """제공자 이름(ddg, yfinance, llm)에 해당하는 전역 ProviderGuard 를 반환합니다."""
+    with _guards_lock:
+        guard = _guards.get(provider)
+        if guard is None:
+            guard = _guards[provider] = ProviderGuard(provider)
+        return guard
+
+
+def reset_provider_guards() -> None:
+    with _guards_lock:
+        _guards.clear()
@@ -1,9 +1,28 @@
 from datetime import datetime
 from zoneinfo import ZoneInfo
-import json, re, ast
-from typing import Any, Dict
+import json, re, ast, base64, zlib
+from typing import Any, Dict, List
 from workflow.state import AgentState
 from langchain.schema import Document, BaseMessage, SystemMessage, HumanMessage, AIMessage
+from common.env import get_env_str
+
+try:
+    import zstandard
+except ImportError:  # zstd 압축은 선택 사항
+    zstandard = None
+
+# 이력 화면에 표시하는 에이전트 응답 필드
+RESPONSE_FIELDS = [
+    "market_data_response",
+    "retrieve_response",
+    "analysis_response",
+    "portfolio_response",
+]
+
+# 직렬화 포맷 버전 (1: json.dumps(default=str) 기반 repr 포맷, 2: 타입 태그 JSON)
+STATE_FORMAT_VERSION = 2
+# 압축된 blob 앞에 붙는 접두어 (Text 컬럼에 저장하기 위해 base64 인코딩)
+_COMPRESSED_PREFIXES = {"zlib": "z1:", "zstd": "zs1:"}
 
 # Document / Message 역직렬화용 패턴 (repr 문자열 대응 + 개행 허용)
 _doc_pat = re.compile(r"page_content='(.*?)'\s+metadata=(\{.*\})$", re.DOTALL)
@@ -16,18 +35,102 @@ def parse_dtm(raw):
     ts  = raw.strftime("%Y-%m-%d %H:%M:%S")
     return ts
 
-def dict_to_str(d: Dict[str, Any]) -> str:
-    """AgentState 딕셔너리를 JSON 문자열로 직렬화 (기존 포맷 유지).
+def _to_plain(value: Any) -> Any:
+    """numpy 스칼라 등 JSON 비호환 값을 파이썬 기본 타입으로 변환."""
+    if isinstance(value, dict):
+        return {str(k): _to_plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_plain(v) for v in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if hasattr(value, "item"):
+        # np.float32, np.int64 등
+        try:
+            return value.item()
+        except Exception:
+            pass
+    return str(value)
+
+
+def _message_role(message: BaseMessage) -> str:
+    if isinstance(message, SystemMessage):
+        return "system"
+    if isinstance(message, AIMessage):
+        return "ai"
+    return "human"
+
+
+def _encode_value(value: Any) -> Any:
+    """Document/Message 를 타입 태그가 붙은 dict로 변환."""
+    if isinstance(value, Document):
+        return {
+            "__type__": "Document",
+            "page_content": value.page_content,
+            "metadata": _to_plain(value.metadata or {}),
+        }
+    if isinstance(value, BaseMessage):
+        return {
+            "__type__": "Message",
+            "role": _message_role(value),
+            "content": value.content,
+        }
+    if isinstance(value, dict):
+        return {str(k): _encode_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode_value(v) for v in value]
+    return _to_plain(value)
+
 
-    - 기존 동작을 유지하기 위해 default=str 를 사용합니다.
-    - Document/Message 는 repr 문자열로 저장됩니다.
+def _compress(text: str, method: str) -> str:
+    raw = text.encode("utf-8")
+    if method == "zstd" and zstandard is not None:
+        packed = zstandard.ZstdCompressor(level=10).compress(raw)
+    elif method in ("zlib", "zstd"):
+        method = "zlib"
+        packed = zlib.compress(raw, 6)
+    else:
+        return text
+    return _COMPRESSED_PREFIXES[method] + base64.b64encode(packed).decode("ascii")
+
+
+def _decompress(text: str) -> str:
+    if text.startswith(_COMPRESSED_PREFIXES["zlib"]):
+        packed = base64.b64decode(text[len(_COMPRESSED_PREFIXES["zlib"]):])
+        return zlib.decompress(packed).decode("utf-8")
+    if text.startswith(_COMPRESSED_PREFIXES["zstd"]):
+        if zstandard is None:
+            raise RuntimeError("zstd로 압축된 데이터를 읽으려면 zstandard 패키지가 필요합니다.")
+        packed = base64.b64decode(text[len(_COMPRESSED_PREFIXES["zstd"]):])
+        return zstandard.ZstdDecompressor().decompress(packed).decode("utf-8")
+    return text
+
+
+def dict_to_str(d: Dict[str, Any], compression: str = None) -> str:
+    """AgentState 딕셔너리를 버전이 붙은 타입 태그 JSON 문자열로 직렬화.
+
+    - Document/Message 는 {"__type__": ...} 형태로 저장되어 로드 시 정규식 파싱이 필요 없습니다.
+    - compression: none | zlib | zstd (None이면 STATE_COMPRESSION 환경변수, 기본 zlib)
     """
-    return json.dumps(
-        d,
+    payload = _encode_value(d)
+    payload["__format__"] = STATE_FORMAT_VERSION
+    text = json.dumps(
+        payload,
         ensure_ascii=False,
-        default=str,
-        indent=None
+        separators=(",", ":"),
     )
+    method = compression or get_env_str("STATE_COMPRESSION", "zlib").lower()
+    return _compress(text, method)
+
+
+def is_legacy_state_str(raw: str) -> bool:
+    """구버전(repr 기반) 포맷으로 저장된 문자열인지 확인."""
+    if not raw:
+        return False
+    text = _decompress(raw)
+    try:
+        return json.loads(text).get("__format__", 1) < STATE_FORMAT_VERSION
+    except (ValueError, AttributeError):
+        return True
 
 def _normalize_meta_literals(text: str) -> str:
     """메타데이터 문자열의 비-리터럴 패턴을 파이썬 리터럴로 치환.
@@ -120,19 +223,64 @@ def _to_message(obj: Any) -> BaseMessage:
     if isinstance(obj, BaseMessage):
         return obj
     if isinstance(obj, dict) and obj.get("__type__") == "Message":
-        role = obj.get("role", "human")
-        content = obj.get("content", "")
-        if role == "system":
-            return SystemMessage(content=content)
-        if role == "ai":
-            return AIMessage(content=content)
-        return HumanMessage(content=content)
+        return _decode_message(obj)
     # 기타 문자열/미상 포맷은 구버전 파서 사용
     return _parse_msg(str(obj))
 
+def extract_state_fields(raw: str, keys: List[str]) -> Dict[str, Any]:
+    """저장된 AgentState 문자열에서 지정한 필드만 꺼냅니다. (Document/Message 복원 없음)"""
+    if not raw:
+        return {key: "" for key in keys}
+    data = json.loads(_decompress(raw))
+    return {key: data.get(key, "") for key in keys}
+
+
+def str_to_documents(raw: str) -> Dict[str, List[Document]]:
+    """저장된 AgentState 문자열에서 참고 자료(Document)만 복원합니다."""
+    if not raw:
+        return {"market_data_docs": [], "retrieve_docs": []}
+    data = json.loads(_decompress(raw))
+    decode = _decode_document if data.get("__format__", 1) >= STATE_FORMAT_VERSION else _to_document
+    return {
+        "market_data_docs": [decode(s) for s in data.get("market_data_docs", [])],
+        "retrieve_docs": [decode(s) for s in data.get("retrieve_docs", [])],
+    }
+
+
+def _decode_document(obj: Dict[str, Any]) -> Document:
+    return Document(page_content=obj.get("page_content", ""), metadata=obj.get("metadata") or {})
+
+
+def _decode_message(obj: Dict[str, Any]) -> BaseMessage:
+    role = obj.get("role", "human")
+    content = obj.get("content", "")
+    if role == "system":
+        return SystemMessage(content=content)
+    if role == "ai":
+        return AIMessage(content=content)
+    return HumanMessage(content=content)
+
+
 def str_to_agentState(json_str: str) -> AgentState:
-    data = json.loads(json_str)
+    data = json.loads(_decompress(json_str))
 
+    if data.get("__format__", 1) >= STATE_FORMAT_VERSION:
+        # 타입 태그 포맷: 정규식/literal_eval 없이 바로 복원
+        return AgentState(
+            chat_state           = data["chat_state"],
+            agent_id             = data["agent_id"],
+            market_data_docs     = [_decode_document(s) for s in data.get("market_data_docs", [])],
+            market_data_response = data.get("market_data_response", ""),
+            retrieve_docs        = [_decode_document(s) for s in data.get("retrieve_docs", [])],
+            retrieve_response    = data.get("retrieve_response", ""),
+            analysis_response    = data.get("analysis_response", ""),
+            portfolio_response   = data.get("portfolio_response", ""),
+            context              = data.get("context", ""),
+            messages             = [_decode_message(s) for s in data.get("messages", [])],
+            response             = data.get("response", ""),
+        )
+
+    # 구버전 repr 포맷 호환
     return AgentState(
         chat_state           = data["chat_state"],
         agent_id             = data["agent_id"],
@@ -146,8 +294,3 @@ def str_to_agentState(json_str: str) -> AgentState:
         messages             = [_to_message(s) for s in data.get("messages", [])],
         response             = data.get("response", ""),
     )
-
-
-
-
-
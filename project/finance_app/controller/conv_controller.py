@@ -2,7 +2,7 @@ from database.repository.user_repository import user_repository
 from database.repository.session_repository import session_repository
 from database.model import User, Session
 from database.session import db_session
-from common.utils import dict_to_str
+from common.utils import RESPONSE_FIELDS, dict_to_str
 from common import constants
 from workflow.state import AgentState
 import streamlit as st
@@ -77,7 +77,8 @@ class ConvController:
 
                 result = session_repository.create_session_detail(
                     session_id=session_id,
-                    response=agentState_str
+                    response=agentState_str,
+                    responses={key: agentState.get(key, "") for key in RESPONSE_FIELDS}
                 )
                 if result:
                     return True
@@ -86,18 +87,18 @@ class ConvController:
         except Exception as e:
             logger.error(f"Error in insert_session_result: {e}")
 
-    def on_history_detail_btn(self, session_id: int) -> Session:
-        session_detail = session_repository.get_session_detail_by_id(session_id=session_id)
-        return session_detail
+    def on_history_detail_btn(self, session_id: int) -> dict | None:
+        summary = session_repository.get_session_summary_by_id(session_id=session_id)
+        return summary
 
-    def on_history_detail_del_btn(self, session_id: int) -> bool:
-        result1 = session_repository.delete_session_by_id(session_id)
-        if result1:
-            logger.info("detail 삭제 완료")
+    def on_history_docs_open(self, session_id: int) -> dict:
+        documents = session_repository.get_session_documents_by_id(session_id=session_id)
+        return documents
 
-        result2 = session_repository.delete_session_detail_by_id(session_id)
-        if result2:
-            logger.info("session 삭제 완료")
+    def on_history_detail_del_btn(self, session_id: int) -> bool:
+        result = session_repository.delete_session_with_detail_by_id(session_id)
+        if result:
+            logger.info("session, detail 삭제 완료")
 
         return True
 
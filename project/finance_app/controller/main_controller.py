@@ -9,6 +9,7 @@ from database.repository.user_repository import user_repository
 from database.repository.session_repository import session_repository
 from workflow.state import AgentState
 from workflow.graph import create_graph
+from workflow.runner import create_initial_state
 from workflow.state import ChatState, AgentState
 
 logger = logging.getLogger(__name__)
@@ -47,19 +48,7 @@ class MainController:
                 "risk_level" : st.session_state["risk_level"],
             }
 
-            initial_state: AgentState = {
-                "chat_state": chat_state,
-                "agent_id": 0,
-                "market_data_docs": [],
-                "market_data_response": "",
-                "retrieve_docs": [],
-                "retrieve_response": "",
-                "analysis_response": "",
-                "portfolio_response": "",
-                "context": "",
-                "messages": [],
-                "response": ""
-            }
+            initial_state: AgentState = create_initial_state(chat_state)
 
             stream_gen = chat_graph.stream(
                     initial_state,
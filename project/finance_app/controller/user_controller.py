@@ -56,7 +56,7 @@ class UserController:
         if user is None:
             return False
         else:
-            sessions = session_repository.get_session_by_user_id(user.user_id)
+            sessions, _ = session_repository.get_session_list_by_user_id(user.user_id, limit=1)
 
             st.session_state.update(
                     {
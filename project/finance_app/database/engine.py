@@ -0,0 +1,91 @@
+import os
+import logging
+import threading
+from typing import Any, Dict
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+from common.env import get_env_bool, get_env_int, get_env_str
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+DB_PATH      = os.getenv("DB_PATH", "./finance_agent.db")
+DATABASE_URL = f"sqlite:///{DB_PATH}"
+
+DEFAULT_SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,        # ms
+    "cache_size": -20000,        # 음수는 KiB 단위 (약 20MB)
+    "mmap_size": 268435456,      # 256MB
+    "foreign_keys": True,
+}
+
+
+def get_sqlite_pragmas() -> Dict[str, Any]:
+    """환경변수에서 SQLite PRAGMA 설정을 읽어옵니다."""
+    pragmas = DEFAULT_SQLITE_PRAGMAS.copy()
+    pragmas["journal_mode"] = get_env_str("SQLITE_JOURNAL_MODE", pragmas["journal_mode"]).upper()
+    pragmas["synchronous"] = get_env_str("SQLITE_SYNCHRONOUS", pragmas["synchronous"]).upper()
+    pragmas["busy_timeout"] = get_env_int("SQLITE_BUSY_TIMEOUT_MS", pragmas["busy_timeout"], min_value=0)
+    pragmas["cache_size"] = get_env_int("SQLITE_CACHE_SIZE", pragmas["cache_size"])
+    pragmas["mmap_size"] = get_env_int("SQLITE_MMAP_SIZE", pragmas["mmap_size"], min_value=0)
+    pragmas["foreign_keys"] = get_env_bool("SQLITE_FOREIGN_KEYS", pragmas["foreign_keys"])
+    return pragmas
+
+
+def _apply_sqlite_pragmas(engine: Engine, pragmas: Dict[str, Any]) -> None:
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA journal_mode={pragmas['journal_mode']}")
+            cursor.execute(f"PRAGMA synchronous={pragmas['synchronous']}")
+            cursor.execute(f"PRAGMA busy_timeout={int(pragmas['busy_timeout'])}")
+            cursor.execute(f"PRAGMA cache_size={int(pragmas['cache_size'])}")
+            cursor.execute(f"PRAGMA mmap_size={int(pragmas['mmap_size'])}")
+            cursor.execute(f"PRAGMA foreign_keys={'ON' if pragmas['foreign_keys'] else 'OFF'}")
+        finally:
+            cursor.close()
+
+
+def create_db_engine(database_url: str = DATABASE_URL, pragmas: Dict[str, Any] = None) -> Engine:
+    """
+    PRAGMA 설정이 적용된 SQLAlchemy 엔진을 생성합니다.
+
+    Args:
+        database_url: DB 접속 URL
+        pragmas: SQLite PRAGMA 설정 (None이면 환경변수 설정 사용)
+    """
+    if not database_url.startswith("sqlite"):
+        return create_engine(database_url)
+
+    pragmas = pragmas or get_sqlite_pragmas()
+    engine = create_engine(
+        database_url,
+        connect_args={
+            "check_same_thread": False,
+            # 드라이버 수준 잠금 대기 시간(초)도 busy_timeout 에 맞춤
+            "timeout": pragmas["busy_timeout"] / 1000,
+        },
+    )
+    _apply_sqlite_pragmas(engine, pragmas)
+    logger.info(f"SQLite 엔진 생성: {database_url}, pragmas: {pragmas}")
+    return engine
+
+
+# 프로세스 전역 공유 엔진
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """프로세스 전역에서 공유하는 엔진 인스턴스를 반환합니다."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_db_engine()
+        return _engine
@@ -0,0 +1,60 @@
+import logging
+from database.model import SessionDetail
+from database.session import db_session
+from common.utils import RESPONSE_FIELDS, dict_to_str, extract_state_fields, str_to_agentState, is_legacy_state_str
+import json
+
+logger = logging.getLogger(__name__)
+
+
+def migrate_session_details(batch_size: int = 100) -> int:
+    """
+    구버전(repr 기반) 포맷으로 저장된 SessionDetail.response 를 신규 포맷으로 일괄 변환하고,
+    비어 있는 summary 컬럼을 채웁니다.
+
+    Args:
+        batch_size: 한 트랜잭션에서 변환할 행 수
+
+    Returns:
+        변환된 행 수
+    """
+    logger.info("SessionDetail migration start")
+    migrated = 0
+    last_session_id = 0
+
+    while True:
+        with db_session.get_db_session() as db:
+            rows = (
+                db.query(SessionDetail)
+                .filter(SessionDetail.session_id > last_session_id)
+                .order_by(SessionDetail.session_id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            for row in rows:
+                last_session_id = row.session_id
+                try:
+                    changed = False
+                    if is_legacy_state_str(row.response):
+                        agent_state = str_to_agentState(row.response)
+                        row.response = dict_to_str(agent_state)
+                        changed = True
+                    if not row.summary:
+                        row.summary = json.dumps(extract_state_fields(row.response, RESPONSE_FIELDS), ensure_ascii=False)
+                        changed = True
+                    if changed:
+                        migrated += 1
+                except Exception:
+                    logger.exception(f"SessionDetail {row.session_id} 변환 실패, 건너뜁니다.")
+
+    logger.info(f"SessionDetail migration end: {migrated}건 변환")
+    return migrated
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    db_session.initialize()
+    migrate_session_details()
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, BigInteger, String, DateTime, func, Text, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, func, Text, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship
 from common.utils import current_seoul_time
 
 Base = declarative_base()
@@ -8,7 +9,7 @@ class User(Base):
     __tablename__ = 'users'
     user_id    = Column(Integer, primary_key=True, autoincrement=True)
     audit_dtm  = Column(DateTime(timezone=True), default=current_seoul_time, nullable=False)
-    name       = Column(String(10), nullable=False)
+    name       = Column(String(10), nullable=False, index=True)
     capital    = Column(BigInteger, nullable=False)
     risk_level = Column(Integer, nullable=False)
 
@@ -27,8 +28,14 @@ class Session(Base):
     risk_level = Column(Integer, nullable=False)
     topic      = Column(String, nullable=False)
 
+    details    = relationship("SessionDetail", cascade="all, delete-orphan", passive_deletes=True)
+
+# 사용자별 최신순 이력 조회(keyset pagination)용 복합 인덱스
+Index("ix_sessions_user_id_audit_dtm", Session.user_id, Session.audit_dtm.desc(), Session.session_id.desc())
+
 class SessionDetail(Base):
     __tablename__ = 'session_details'
-    session_id    = Column(Integer, ForeignKey('sessions.session_id'), primary_key=True)
+    session_id    = Column(Integer, ForeignKey('sessions.session_id', ondelete="CASCADE"), primary_key=True)
     audit_dtm     = Column(DateTime(timezone=True), default=current_seoul_time, nullable=False)
-    response      = Column(Text, nullable=True)
+    response      = Column(Text, nullable=True)    # 직렬화된 AgentState 전체 (참고 자료 포함)
+    summary       = Column(Text, nullable=True)    # 4개 에이전트 응답만 담은 JSON (이력 화면용)
@@ -1,6 +1,10 @@
 from database.model import User, Session, SessionDetail
 from database.session import db_session
-from typing import Any
+from database import search_index
+from common.utils import RESPONSE_FIELDS, extract_state_fields, str_to_documents
+from sqlalchemy import and_, or_
+from typing import Any, NamedTuple
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,6 +12,14 @@ logger = logging.getLogger(__name__)
 class RepositoryError(Exception):
     pass
 
+class SearchResult(NamedTuple):
+    session_id: int
+    audit_dtm: Any
+    capital: int
+    risk_level: int
+    topic: str
+    snippet: str
+
 class SessionRepository:
 
     _instance = None
@@ -43,6 +55,94 @@ class SessionRepository:
             logger.error(f"SessionRepository get_session_by_user_id: {str(e)}")
             raise e
 
+    def get_session_list_by_user_id(
+            self,
+            user_id: int,
+            limit: int = 20,
+            cursor: tuple | None = None
+            ) -> tuple[list, tuple | None]:
+        """
+        이력 목록에 필요한 컬럼만 최신순으로 한 페이지 조회합니다. (keyset pagination)
+
+        Args:
+            user_id: 사용자 ID
+            limit: 페이지 크기
+            cursor: 이전 페이지 마지막 행의 (audit_dtm, session_id), None이면 첫 페이지
+
+        Returns:
+            (행 리스트, 다음 페이지 cursor 또는 None)
+        """
+        try:
+            with db_session.get_db_session() as db:
+                query = (
+                    db.query(
+                        Session.session_id,
+                        Session.audit_dtm,
+                        Session.capital,
+                        Session.risk_level,
+                        Session.topic,
+                    )
+                    .filter(Session.user_id == user_id)
+                )
+                if cursor is not None:
+                    last_dtm, last_session_id = cursor
+                    query = query.filter(
+                        or_(
+                            Session.audit_dtm < last_dtm,
+                            and_(Session.audit_dtm == last_dtm, Session.session_id < last_session_id),
+                        )
+                    )
+                # 다음 페이지 존재 여부 확인을 위해 1건 더 조회
+                rows = (
+                    query
+                    .order_by(Session.audit_dtm.desc(), Session.session_id.desc())
+                    .limit(limit + 1)
+                    .all()
+                )
+                if len(rows) > limit:
+                    rows = rows[:limit]
+                    next_cursor = (rows[-1].audit_dtm, rows[-1].session_id)
+                else:
+                    next_cursor = None
+                return rows, next_cursor
+        except Exception as e:
+            logger.error(f"SessionRepository get_session_list_by_user_id: {str(e)}")
+            raise e
+
+    def search_sessions_by_user_id(self, user_id: int, query: str, limit: int = 20) -> list:
+        """
+        주제와 에이전트 응답을 전문 검색하여 관련도 순으로 반환합니다.
+
+        Returns:
+            session_id, audit_dtm, capital, risk_level, topic, snippet 속성을 가진 행 리스트
+        """
+        try:
+            with db_session.get_db_session() as db:
+                hits = search_index.search_sessions(db, user_id, query, limit)
+                if not hits:
+                    return []
+                snippets = {hit.session_id: hit.snippet for hit in hits}
+                rows = (
+                    db.query(
+                        Session.session_id,
+                        Session.audit_dtm,
+                        Session.capital,
+                        Session.risk_level,
+                        Session.topic,
+                    )
+                    .filter(Session.session_id.in_(list(snippets)))
+                    .all()
+                )
+                rows_by_id = {row.session_id: row for row in rows}
+                return [
+                    SearchResult(*rows_by_id[session_id], snippets[session_id])
+                    for session_id in snippets
+                    if session_id in rows_by_id
+                ]
+        except Exception as e:
+            logger.error(f"SessionRepository search_sessions_by_user_id: {str(e)}")
+            raise e
+
     def create_session(self, user: User, topic: str) -> bool:
         try:
             with db_session.get_db_session() as db:
@@ -63,15 +163,24 @@ class SessionRepository:
     def create_session_detail(
             self,
             session_id: int,
-            response: Any
+            response: Any,
+            responses: dict | None = None
             ):
         try:
+            if responses is None:
+                responses = extract_state_fields(response, RESPONSE_FIELDS)
             with db_session.get_db_session() as db:
                 temp_session_detail = SessionDetail(
                     session_id=session_id,
-                    response=response
+                    response=response,
+                    summary=json.dumps(responses, ensure_ascii=False)
                 )
                 db.add(temp_session_detail)
+
+                # 이력 검색 색인 (같은 트랜잭션)
+                session = db.query(Session.user_id, Session.topic).filter(Session.session_id == session_id).first()
+                if session is not None:
+                    search_index.index_session(db, session_id, session.user_id, session.topic, responses)
                 return True
         except RepositoryError as e:
             logger.error(f"SessionRepository create_session_detail: {str(e)}")
@@ -94,9 +203,36 @@ class SessionRepository:
             logger.error(f"SessionRepository get_session_detail_by_id: {str(e)}")
             raise e
 
+    def get_session_summary_by_id(self, session_id: int) -> dict | None:
+        """상세 이력에서 4개 에이전트 응답만 조회합니다. (참고 자료는 읽지 않음)"""
+        try:
+            with db_session.get_db_session() as db:
+                row = db.query(SessionDetail.summary).filter(SessionDetail.session_id == session_id).first()
+                if row is None:
+                    return None
+                if row.summary:
+                    return json.loads(row.summary)
+                # summary 컬럼이 없던 시절의 행은 전체 blob 에서 응답 필드만 추출
+                response = db.query(SessionDetail.response).filter(SessionDetail.session_id == session_id).scalar()
+                return extract_state_fields(response, RESPONSE_FIELDS)
+        except Exception as e:
+            logger.error(f"SessionRepository get_session_summary_by_id: {str(e)}")
+            raise e
+
+    def get_session_documents_by_id(self, session_id: int) -> dict:
+        """상세 이력에서 참고 자료(시장 데이터/정보 검색 Document)만 복원합니다."""
+        try:
+            with db_session.get_db_session() as db:
+                response = db.query(SessionDetail.response).filter(SessionDetail.session_id == session_id).scalar()
+                return str_to_documents(response)
+        except Exception as e:
+            logger.error(f"SessionRepository get_session_documents_by_id: {str(e)}")
+            raise e
+
     def delete_session_by_id(self, session_id: int):
         try:
             with db_session.get_db_session() as db:
+                search_index.delete_session_index(db, session_id=session_id)
                 result = db.query(Session).filter(Session.session_id == session_id).delete()
                 return result > 0
         except Exception as e:
@@ -106,10 +242,44 @@ class SessionRepository:
     def delete_session_detail_by_id(self, session_id: int):
         try:
             with db_session.get_db_session() as db:
+                search_index.delete_session_index(db, session_id=session_id)
                 result = db.query(SessionDetail).filter(SessionDetail.session_id == session_id).delete()
                 return result > 0
         except Exception as e:
             logger.error(f"SessionRepository delete_session_detail_by_id: {str(e)}")
             raise e
 
+    def delete_session_with_detail_by_id(self, session_id: int) -> bool:
+        """세션과 상세 이력을 하나의 트랜잭션에서 삭제합니다."""
+        try:
+            with db_session.get_db_session() as db:
+                search_index.delete_session_index(db, session_id=session_id)
+                db.query(SessionDetail).filter(SessionDetail.session_id == session_id).delete(synchronize_session=False)
+                result = db.query(Session).filter(Session.session_id == session_id).delete(synchronize_session=False)
+                return result > 0
+        except Exception as e:
+            logger.error(f"SessionRepository delete_session_with_detail_by_id: {str(e)}")
+            raise e
+
+    def delete_sessions_by_user_id(self, user_id: int) -> int:
+        """
+        사용자의 모든 세션과 상세 이력을 하나의 트랜잭션에서 삭제합니다.
+
+        Returns:
+            삭제된 세션 수
+        """
+        try:
+            with db_session.get_db_session() as db:
+                search_index.delete_session_index(db, user_id=user_id)
+                session_ids = db.query(Session.session_id).filter(Session.user_id == user_id)
+                # DELETE FROM session_details WHERE session_id IN (SELECT ...)
+                db.query(SessionDetail).filter(
+                    SessionDetail.session_id.in_(session_ids.scalar_subquery())
+                ).delete(synchronize_session=False)
+                result = db.query(Session).filter(Session.user_id == user_id).delete(synchronize_session=False)
+                return result
+        except Exception as e:
+            logger.error(f"SessionRepository delete_sessions_by_user_id: {str(e)}")
+            raise e
+
 session_repository = SessionRepository()
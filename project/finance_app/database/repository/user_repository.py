@@ -1,5 +1,7 @@
 from database.model import User
 from database.session import db_session
+from collections import OrderedDict
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,11 +13,42 @@ class UserRepository:
 
     _instance = None
 
+    # 이름 -> User 읽기 캐시 (rerun 마다 반복되는 조회를 DB 없이 처리)
+    _CACHE_MAX_SIZE = 1024
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(UserRepository, cls).__new__(cls)
+            cls._instance._cache = OrderedDict()
+            cls._instance._cache_lock = threading.Lock()
         return cls._instance
 
+    def _cache_get(self, user_name: str) -> User | None:
+        with self._cache_lock:
+            user = self._cache.get(user_name)
+            if user is not None:
+                self._cache.move_to_end(user_name)
+            return user
+
+    def _cache_put(self, user: User) -> None:
+        with self._cache_lock:
+            self._cache[user.name] = user
+            self._cache.move_to_end(user.name)
+            while len(self._cache) > self._CACHE_MAX_SIZE:
+                self._cache.popitem(last=False)
+
+    def _cache_invalidate(self, user_name: str = None, user_id: int = None) -> None:
+        with self._cache_lock:
+            if user_name is not None:
+                self._cache.pop(user_name, None)
+            if user_id is not None:
+                for name in [n for n, u in self._cache.items() if u.user_id == user_id]:
+                    del self._cache[name]
+
+    def clear_cache(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+
     def get_user_by_id(self, user_id: int) -> User | None:
         try:
             with db_session.get_db_session() as session:
@@ -31,10 +64,14 @@ class UserRepository:
             raise e
 
     def get_user_by_name(self, user_name: str) -> User | None:
+        cached = self._cache_get(user_name)
+        if cached is not None:
+            return cached
         try:
             with db_session.get_db_session() as session:
-                users = session.query(User).filter(User.name == user_name).all()
+                users = session.query(User).filter(User.name == user_name).limit(2).all()
                 if len(users) == 1:
+                    self._cache_put(users[0])
                     return users[0]
                 elif len(users) > 1:
                     raise RepositoryError(f"multiple users with the same name")
@@ -49,7 +86,8 @@ class UserRepository:
             with db_session.get_db_session() as session:
                 temp_user = User(name=name, capital=capital, risk_level=risk_level)
                 session.add(temp_user)
-                return True
+            self._cache_invalidate(user_name=name)
+            return True
         except RepositoryError as e:
             logger.error(f"UserRepository create_user: {str(e)}")
             raise e
@@ -69,7 +107,8 @@ class UserRepository:
                         "risk_level": risk_level
                     })
                 )
-                return updated == 1
+            self._cache_invalidate(user_id=user_id)
+            return updated == 1
         except RepositoryError as e:
             logger.error(f"UserRepository create_user: {str(e)}")
             raise e
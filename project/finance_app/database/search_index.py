@@ -0,0 +1,131 @@
+import logging
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from common.utils import RESPONSE_FIELDS, extract_state_fields
+
+logger = logging.getLogger(__name__)
+
+# 주제와 4개 에이전트 응답을 색인하는 FTS5 가상 테이블 (rowid = sessions.session_id)
+SEARCH_TABLE = "session_search"
+SEARCH_FIELDS = RESPONSE_FIELDS
+
+_CREATE_SQL = f"""
+CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+    user_id UNINDEXED,
+    topic,
+    {", ".join(SEARCH_FIELDS)},
+    tokenize = 'unicode61'
+)
+"""
+
+_INSERT_SQL = text(
+    f"INSERT INTO {SEARCH_TABLE} (rowid, user_id, topic, {', '.join(SEARCH_FIELDS)}) "
+    f"VALUES (:session_id, :user_id, :topic, {', '.join(':' + f for f in SEARCH_FIELDS)})"
+)
+
+_available = None
+
+
+def _table_exists(conn) -> bool:
+    row = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": SEARCH_TABLE},
+    ).first()
+    return row is not None
+
+
+def is_search_available(db) -> bool:
+    """FTS5 검색 테이블을 사용할 수 있는지 확인합니다."""
+    global _available
+    if _available is None:
+        _available = _table_exists(db)
+    return _available
+
+
+def create_search_index(engine: Engine) -> bool:
+    """FTS5 검색 테이블을 생성하고, 새로 만든 경우 기존 이력을 색인합니다."""
+    global _available
+    with engine.begin() as conn:
+        if _table_exists(conn):
+            _available = True
+            return True
+        try:
+            conn.execute(text(_CREATE_SQL))
+        except OperationalError as e:
+            logger.warning(f"FTS5를 사용할 수 없어 이력 검색을 비활성화합니다: {e}")
+            _available = False
+            return False
+
+        rows = conn.execute(text(
+            "SELECT d.session_id, s.user_id, s.topic, d.response "
+            "FROM session_details d JOIN sessions s ON s.session_id = d.session_id"
+        )).fetchall()
+        for row in rows:
+            try:
+                fields = extract_state_fields(row.response, SEARCH_FIELDS)
+            except Exception:
+                logger.warning(f"SessionDetail {row.session_id} 색인 실패, 건너뜁니다.")
+                continue
+            conn.execute(_INSERT_SQL, {
+                "session_id": row.session_id,
+                "user_id": row.user_id,
+                "topic": row.topic,
+                **fields,
+            })
+        logger.info(f"이력 검색 색인 생성 완료: {len(rows)}건")
+
+    _available = True
+    return True
+
+
+def index_session(db, session_id: int, user_id: int, topic: str, fields: Dict[str, Any]) -> None:
+    """세션 하나를 색인합니다. 호출한 DB 세션의 트랜잭션에 포함됩니다."""
+    if not is_search_available(db):
+        return
+    db.execute(_INSERT_SQL, {
+        "session_id": session_id,
+        "user_id": user_id,
+        "topic": topic,
+        **{f: fields.get(f) or "" for f in SEARCH_FIELDS},
+    })
+
+
+def delete_session_index(db, session_id: int = None, user_id: int = None) -> None:
+    """세션 또는 사용자 단위로 색인을 삭제합니다."""
+    if not is_search_available(db):
+        return
+    if session_id is not None:
+        db.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :session_id"), {"session_id": session_id})
+    if user_id is not None:
+        db.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE user_id = :user_id"), {"user_id": user_id})
+
+
+def build_match_query(query: str) -> str:
+    """사용자 입력을 FTS5 MATCH 구문으로 변환합니다. (단어별 접두어 AND 검색)"""
+    terms = [t.replace('"', '""') for t in query.split() if t.strip()]
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def search_sessions(db, user_id: int, query: str, limit: int = 20) -> List[Any]:
+    """
+    사용자의 이력을 관련도(bm25) 순으로 검색합니다.
+
+    Returns:
+        (session_id, snippet) 행 리스트
+    """
+    match = build_match_query(query)
+    if not match or not is_search_available(db):
+        return []
+    return db.execute(
+        text(
+            f"SELECT rowid AS session_id, snippet({SEARCH_TABLE}, -1, '**', '**', '…', 12) AS snippet "
+            f"FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH :match AND user_id = :user_id "
+            f"ORDER BY bm25({SEARCH_TABLE}) LIMIT :limit"
+        ),
+        {"match": match, "user_id": user_id, "limit": limit},
+    ).fetchall()
@@ -1,19 +1,11 @@
-import os
 import logging
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from database.engine import get_engine
 from database.model import Base, Agent
 
-load_dotenv()
-
 logger = logging.getLogger(__name__)
 
-DB_PATH = os.getenv("DB_PATH")
-DATABASE_URL = f"sqlite:///{DB_PATH}"
-DB_TYPE = os.getenv("DB_TYPE")
-
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+engine = get_engine()
 SessionLocal = sessionmaker(bind=engine)
 
 def seed():
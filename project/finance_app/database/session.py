@@ -1,25 +1,19 @@
-import os
 import logging
 from contextlib import contextmanager
 
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import sessionmaker
 
+from database.engine import get_engine
 from database.model import Base
+from database.search_index import create_search_index
 from database.seed import seed
 
-# ENV, LOGGING
-load_dotenv()
+# LOGGING
 logger = logging.getLogger(__name__)
-DB_PATH      = os.getenv("DB_PATH", "./finance_agent.db")
-DATABASE_URL = f"sqlite:///{DB_PATH}"
 
 # ENGINE, SESSION
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-)
+engine = get_engine()
 SessionLocal = sessionmaker(
     bind=engine,
     autoflush=False,
@@ -39,6 +33,12 @@ class DatabaseSession:
     def initialize(self) -> None:
         logger.info("Database initialize start")
         Base.metadata.create_all(engine)
+        self._add_missing_columns()
+        # 기존 DB 파일에는 create_all 이 인덱스를 추가하지 않으므로 개별 생성
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(engine, checkfirst=True)
+        create_search_index(engine)
         try:
             seed()
         except Exception:
@@ -46,6 +46,19 @@ class DatabaseSession:
             raise
         logger.info("Database initialize end")
 
+    def _add_missing_columns(self) -> None:
+        # 기존 DB 파일에 새로 추가된 nullable 컬럼을 반영
+        inspector = inspect(engine)
+        with engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                existing = {c["name"] for c in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing or not column.nullable:
+                        continue
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                    logger.info(f"컬럼 추가: {table.name}.{column.name}")
+
     def get_session(self):
         return SessionLocal()
 
@@ -2,6 +2,7 @@ import streamlit as st
 from database.session import db_session
 from controller.main_controller import mainController
 from common import constants
+from common.metrics import start_metrics_server
 import logging
 
 logging.basicConfig(
@@ -15,6 +16,9 @@ if __name__ == "__main__":
     if "app_mode" not in st.session_state:
         st.session_state["app_mode"] = constants.Mode.Application
 
+    # METRICS_PORT 가 설정된 경우 /metrics 엔드포인트 시작 (프로세스당 1회)
+    start_metrics_server()
+
     if "db_initialized" not in st.session_state:
         db_session.initialize()
         st.session_state["db_initialized"] = True
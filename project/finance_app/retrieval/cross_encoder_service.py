@@ -2,7 +2,9 @@ import streamlit as st
 from typing import List, Dict, Any, Tuple
 from langchain.schema import Document
 from sentence_transformers import CrossEncoder
-from common.cross_encoder_config import get_cross_encoder_config, validate_config
+from common.cross_encoder_config import configure_torch_threads, get_cross_encoder_config, validate_config
+from common.metrics import span
+from retrieval.cross_encoder_worker import RemoteCrossEncoder, get_worker_pool
 import logging
 import numpy as np
 import os
@@ -22,12 +24,22 @@ class CrossEncoderService:
             logger.warning("크로스 인코더 설정이 유효하지 않습니다. 기본값을 사용합니다.")
 
         self.config = get_cross_encoder_config()
-        self.model_name = model_name or self.config["model_name"]
+        self._requested_model_name = model_name
+        self.model_name = None
         self.cross_encoder = None
+        # 2단계 재순위화용 빠른 모델 (cascade_enabled 일 때만 로드)
+        self.fast_model_name = None
+        self.fast_encoder = None
         self._load_model()
 
     def _load_model(self):
-        """크로스 인코더 모델을 로드합니다."""
+        """크로스 인코더 모델을 로드합니다. (cascade_enabled 이면 빠른 모델도 함께 로드)"""
+        cascade = self.config["cascade_enabled"]
+        self.model_name = self._requested_model_name or (
+            self.config["cascade_accurate_model"] if cascade else self.config["model_name"]
+        )
+        self.fast_model_name = self.config["cascade_fast_model"] if cascade else None
+        self.fast_encoder = None
         try:
             # 크로스 인코더가 비활성화된 경우
             if not self.config["use_cross_encoder"]:
@@ -42,17 +54,71 @@ class CrossEncoderService:
                 os.makedirs(cache_dir, exist_ok=True)
                 logger.debug(f"모델 캐시 디렉토리: {cache_dir}")
 
-            logger.info(f"크로스 인코더 모델 로드 시작: {self.model_name}")
-            self.cross_encoder = CrossEncoder(
-                self.model_name,
-                cache_folder=cache_dir
-            )
-            logger.info(f"CrossEncoder 모델 로드 완료: {self.model_name}")
+            if not self.config["worker_processes"]:
+                # 앱 프로세스에서 추론하는 경우 모델 로드 전에 torch 스레드 수만 적용 (코어 고정은 워커 전용)
+                configure_torch_threads({**self._thread_config(), "cpu_affinity": ""})
+            self.cross_encoder = self._create_encoder(self.model_name, cache_dir)
 
         except Exception as e:
             logger.error(f"CrossEncoder 모델 로드 실패: {e}")
             logger.warning("크로스 인코더 없이 기본 검색을 사용합니다.")
             self.cross_encoder = None
+            return
+
+        if self.fast_model_name and self.fast_model_name != self.model_name:
+            try:
+                self.fast_encoder = self._create_encoder(self.fast_model_name, cache_dir)
+            except Exception as e:
+                logger.error(f"빠른 CrossEncoder 모델 로드 실패: {e}")
+                logger.warning(f"2단계 재순위화 없이 {self.model_name} 모델만 사용합니다.")
+
+    def _thread_config(self) -> Dict[str, Any]:
+        keys = ("intra_op_threads", "inter_op_threads", "cpu_affinity")
+        return {key: self.config[key] for key in keys}
+
+    def _create_encoder(self, model_name: str, cache_dir: str = None):
+        """모델을 로드합니다. (worker_processes 가 1 이상이면 워커 프로세스에서 로드하는 프록시)"""
+        workers = self.config["worker_processes"]
+        logger.info(f"크로스 인코더 모델 로드 시작: {model_name}" + (f" (워커 {workers}개)" if workers else ""))
+        if workers:
+            pool = get_worker_pool(workers, self.config["worker_timeout"], thread_config=self._thread_config())
+            encoder = RemoteCrossEncoder(pool, model_name, CrossEncoder, cache_folder=cache_dir)
+        else:
+            encoder = CrossEncoder(model_name, cache_folder=cache_dir)
+        logger.info(f"CrossEncoder 모델 로드 완료: {model_name}")
+        return encoder
+
+    def _predict_with(self, encoder, model_name: str, pairs: List[Tuple[str, str]], **labels):
+        with span("cross_encoder_predict", model=model_name, **labels) as s:
+            s.set_input(len(pairs))
+            scores = encoder.predict(pairs)
+            s.set_output(len(scores))
+            return scores
+
+    def _predict(self, pairs: List[Tuple[str, str]]):
+        """
+        크로스 인코더 점수 계산 (단계별 지연시간 계측 포함)
+
+        2단계 재순위화가 켜져 있고 후보가 cascade_top_m 개보다 많으면 빠른 모델로 전체를 점수화한 뒤
+        상위 cascade_top_m 개만 정확한 모델로 다시 점수화합니다. 나머지 문서의 점수는 -inf 입니다.
+        """
+        top_m = self.config["cascade_top_m"]
+        if self.fast_encoder is None or len(pairs) <= top_m:
+            return self._predict_with(self.cross_encoder, self.model_name, pairs)
+
+        with span("cross_encoder_cascade", top_m=top_m) as s:
+            s.set_input(len(pairs))
+            fast_scores = np.asarray(
+                self._predict_with(self.fast_encoder, self.fast_model_name, pairs, cascade="fast"), dtype=np.float32
+            )
+            top = np.argsort(-fast_scores, kind="stable")[:top_m]
+            accurate_scores = self._predict_with(
+                self.cross_encoder, self.model_name, [pairs[i] for i in top], cascade="accurate"
+            )
+            scores = np.full(len(pairs), -np.inf, dtype=np.float32)
+            scores[top] = accurate_scores
+            s.set_output(len(top))
+        return scores
 
     def is_available(self) -> bool:
         """크로스 인코더가 사용 가능한지 확인합니다."""
@@ -97,7 +163,7 @@ class CrossEncoderService:
             logger.debug(f"문서 재순위화 시작: {len(documents)}개 문서, 임계값: {threshold}")
 
             # 크로스 인코더로 점수 계산
-            scores = self.cross_encoder.predict(pairs)
+            scores = self._predict(pairs)
 
             # 문서와 점수를 튜플로 묶고 점수로 정렬
             doc_scores = list(zip(documents, scores))
@@ -148,7 +214,7 @@ class CrossEncoderService:
             logger.debug(f"문서 필터링 시작: {len(documents)}개 문서, 임계값: {threshold}")
 
             # 크로스 인코더로 점수 계산
-            scores = self.cross_encoder.predict(pairs)
+            scores = self._predict(pairs)
 
             # 임계값 이상의 문서만 반환
             filtered_docs = []
@@ -184,7 +250,7 @@ class CrossEncoderService:
 
         try:
             pair = [(query, document.page_content)]
-            score = self.cross_encoder.predict(pair)[0]
+            score = self._predict(pair)[0]
             return float(score)
         except Exception as e:
             logger.error(f"관련성 점수 계산 중 오류 발생: {e}")
@@ -213,7 +279,7 @@ class CrossEncoderService:
             pairs = [(query, doc.page_content) for doc in documents]
 
             # 크로스 인코더로 점수 계산
-            scores = self.cross_encoder.predict(pairs)
+            scores = self._predict(pairs)
 
             # 문서와 점수를 튜플로 묶기
             return list(zip(documents, scores))
@@ -226,6 +292,7 @@ class CrossEncoderService:
         """크로스 인코더 모델 정보를 반환합니다."""
         return {
             "model_name": self.model_name,
+            "fast_model_name": self.fast_model_name,
             "is_available": self.is_available(),
             "config": self.config,
             "model_loaded": self.cross_encoder is not None
@@ -237,10 +304,16 @@ class CrossEncoderService:
             "model_name": self.model_name,
             "is_enabled": self.config["use_cross_encoder"],
             "is_loaded": self.cross_encoder is not None,
+            "cascade_enabled": self.fast_encoder is not None,
+            "cascade_top_m": self.config["cascade_top_m"],
             "threshold": self.config["relevance_threshold"],
             "max_docs": self.config["max_documents"],
             "top_k": self.config["rerank_top_k"],
-            "caching_enabled": self.config["cache_models"]
+            "caching_enabled": self.config["cache_models"],
+            "worker_processes": self.config["worker_processes"],
+            "intra_op_threads": self.config["intra_op_threads"],
+            "inter_op_threads": self.config["inter_op_threads"],
+            "cpu_affinity": self.config["cpu_affinity"]
         }
 
 # 전역 크로스 인코더 서비스 인스턴스
@@ -0,0 +1,298 @@
+"""
+크로스 인코더 추론 워커 프로세스 풀
+
+- CrossEncoder.predict 를 Streamlit 프로세스 밖의 전용 프로세스(spawn)에서 실행하여
+  재순위화가 다른 세션의 화면 처리와 GIL/CPU 를 다투지 않게 합니다.
+- 앱 ↔ 워커는 multiprocessing Pipe 로 명령(load/predict/stop)과 쿼리-문서 쌍을 주고받고,
+  점수 배열은 워커별 공유 메모리 버퍼(float32)에 바로 써서 직렬화 없이 넘겨받습니다.
+- 워커를 꺼낼 때 프로세스가 죽어 있거나, 요청 중 응답이 끊기거나 시간 내 응답하지 않으면
+  해당 워커를 종료 후 다시 띄우고(모델은 다시 로드) 요청을 한 번 더 보냅니다.
+  다시 실패하면 WorkerError 를 발생시킵니다.
+- 워커마다 torch intra/inter-op 스레드 수와 코어 고정(cpu_affinity=auto 면 워커별로 코어를 나눔)을
+  모델 로드 전에 적용합니다.
+- 재시작 횟수와 유휴 워커 수는 cross_encoder_worker_restarts, cross_encoder_worker_idle 게이지로 노출됩니다.
+"""
+import atexit
+import logging
+import multiprocessing
+import queue
+import threading
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from common.cross_encoder_config import configure_torch_threads
+from common.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# 워커당 공유 메모리 점수 버퍼 크기 (float32 개수). 이보다 많은 쌍은 나눠서 요청
+SCORE_BUFFER_SIZE = 4096
+# 모델 로드(최초 다운로드 포함) 대기 시간(초)
+MODEL_LOAD_TIMEOUT = 300.0
+
+
+class WorkerError(RuntimeError):
+    """워커가 요청을 처리하지 못한 경우"""
+
+
+def _worker_main(conn, shm_name: str, capacity: int, thread_config: Dict[str, Any], slot: int, slots: int) -> None:
+    """워커 프로세스 본체: torch 스레드/코어 고정을 적용한 뒤 명령을 순서대로 처리합니다."""
+    if thread_config:
+        try:
+            configure_torch_threads(thread_config, slot=slot, slots=slots)
+        except Exception as e:
+            logger.warning(f"워커 {slot} torch 스레드 설정 실패: {e}")
+    shm = SharedMemory(name=shm_name)
+    scores_buffer = np.ndarray((capacity,), dtype=np.float32, buffer=shm.buf)
+    encoders: Dict[str, Any] = {}
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, KeyboardInterrupt):
+                break
+            command = message[0]
+            if command == "stop":
+                break
+            try:
+                if command == "load":
+                    _, model_name, factory, kwargs = message
+                    if model_name not in encoders:
+                        encoders[model_name] = factory(model_name, **kwargs)
+                    conn.send(("ok", None))
+                elif command == "predict":
+                    _, model_name, pairs = message
+                    scores = np.asarray(encoders[model_name].predict(pairs), dtype=np.float32).reshape(-1)
+                    scores_buffer[:len(scores)] = scores
+                    conn.send(("ok", len(scores)))
+                else:
+                    conn.send(("error", f"알 수 없는 명령: {command}"))
+            except Exception as e:
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        del scores_buffer
+        shm.close()
+
+
+class _Worker:
+    """워커 프로세스 하나와 전용 파이프/공유 메모리 점수 버퍼"""
+
+    def __init__(self, index: int, capacity: int, slots: int, thread_config: Optional[Dict[str, Any]]):
+        self.index = index
+        self.capacity = capacity
+        self.slots = slots
+        self.thread_config = thread_config
+        self.shm = SharedMemory(create=True, size=capacity * np.dtype(np.float32).itemsize)
+        self.scores = np.ndarray((capacity,), dtype=np.float32, buffer=self.shm.buf)
+        self.process = None
+        self.conn = None
+        self.loaded = set()
+
+    def start(self, context) -> None:
+        parent_conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, self.shm.name, self.capacity, self.thread_config, self.index, self.slots),
+            name=f"cross-encoder-worker-{self.index}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.loaded = set()
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def request(self, message: tuple, timeout: float) -> Any:
+        """
+        명령을 보내고 응답을 기다립니다.
+        모델 오류는 WorkerError, 프로세스 이상(응답 끊김/시간 초과)은 ConnectionError 를 발생시킵니다.
+        """
+        try:
+            self.conn.send(message)
+            if not self.conn.poll(timeout):
+                raise ConnectionError(f"응답 시간 초과 ({timeout:.0f}초)")
+            status, payload = self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise ConnectionError(f"워커 연결 끊김: {e}") from e
+        if status != "ok":
+            raise WorkerError(payload)
+        return payload
+
+    def stop(self, timeout: float = 2.0) -> None:
+        if self.process is None:
+            return
+        try:
+            if self.process.is_alive():
+                self.conn.send(("stop",))
+                self.process.join(timeout)
+        except (OSError, ValueError):
+            pass
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.conn.close()
+        self.process = None
+
+    def close(self) -> None:
+        self.stop()
+        del self.scores
+        self.shm.close()
+        self.shm.unlink()
+
+
+class CrossEncoderWorkerPool:
+    """크로스 인코더 워커 프로세스 풀 (워커 하나가 요청 하나를 처리)"""
+
+    def __init__(self, size: int, timeout: float, thread_config: Optional[Dict[str, Any]] = None):
+        self.size = size
+        self.timeout = timeout
+        self._context = multiprocessing.get_context("spawn")
+        self._models: Dict[str, Tuple[Callable, Dict[str, Any]]] = {}
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._restarts = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+        for index in range(size):
+            worker = _Worker(index, SCORE_BUFFER_SIZE, size, thread_config)
+            worker.start(self._context)
+            self._workers.append(worker)
+            self._idle.put(worker)
+        logger.info(f"크로스 인코더 워커 {size}개 시작")
+        self._publish_stats()
+
+    def _publish_stats(self) -> None:
+        metrics_registry.set_gauge("cross_encoder_worker_restarts", self._restarts)
+        metrics_registry.set_gauge("cross_encoder_worker_idle", self._idle.qsize())
+
+    def _restart(self, worker: _Worker, reason: str) -> None:
+        logger.warning(f"크로스 인코더 워커 {worker.index} 재시작: {reason}")
+        worker.stop(timeout=0.5)
+        worker.start(self._context)
+        with self._lock:
+            self._restarts += 1
+
+    def _acquire(self) -> _Worker:
+        if self._closed:
+            raise WorkerError("워커 풀이 종료되었습니다.")
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise WorkerError(f"{self.timeout:.0f}초 안에 사용 가능한 워커가 없습니다.")
+        if not worker.is_alive():
+            self._restart(worker, f"프로세스 종료됨 (exitcode={worker.process.exitcode})")
+        return worker
+
+    def _release(self, worker: _Worker) -> None:
+        self._idle.put(worker)
+        self._publish_stats()
+
+    def _ensure_model(self, worker: _Worker, model_name: str) -> None:
+        if model_name in worker.loaded:
+            return
+        factory, kwargs = self._models[model_name]
+        worker.request(("load", model_name, factory, kwargs), MODEL_LOAD_TIMEOUT)
+        worker.loaded.add(model_name)
+
+    def load_model(self, model_name: str, factory: Callable, **kwargs) -> None:
+        """
+        모델을 등록하고 워커 하나에서 로드해 봅니다. (나머지 워커는 처음 사용할 때 로드)
+
+        Args:
+            model_name: 모델명
+            factory: 워커에서 factory(model_name, **kwargs) 로 모델을 만드는 피클 가능한 호출 객체
+        """
+        self._models[model_name] = (factory, kwargs)
+        self._run(lambda worker: self._ensure_model(worker, model_name))
+
+    def predict(self, model_name: str, pairs: Sequence[Tuple[str, str]]) -> np.ndarray:
+        """워커에서 쌍별 점수를 계산합니다."""
+        def run(worker: _Worker) -> np.ndarray:
+            self._ensure_model(worker, model_name)
+            scores = np.empty(len(pairs), dtype=np.float32)
+            for start in range(0, len(pairs), worker.capacity):
+                chunk = list(pairs[start:start + worker.capacity])
+                count = worker.request(("predict", model_name, chunk), self.timeout)
+                scores[start:start + count] = worker.scores[:count]
+            return scores
+
+        return self._run(run)
+
+    def _run(self, fn: Callable[[_Worker], Any]) -> Any:
+        """워커 하나를 빌려 fn 을 실행합니다. 워커 이상 시 재시작 후 한 번 더 시도합니다."""
+        worker = self._acquire()
+        try:
+            try:
+                return fn(worker)
+            except ConnectionError as e:
+                self._restart(worker, str(e))
+            try:
+                return fn(worker)
+            except ConnectionError as e:
+                self._restart(worker, str(e))
+                raise WorkerError(f"크로스 인코더 워커 {worker.index} 오류: {e}") from e
+        finally:
+            self._release(worker)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "alive": sum(1 for w in self._workers if w.is_alive()),
+            "restarts": self._restarts,
+        }
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for worker in self._workers:
+            worker.close()
+        logger.info("크로스 인코더 워커 종료")
+
+
+class RemoteCrossEncoder:
+    """워커 풀의 모델을 CrossEncoder 처럼 사용하는 프록시 (predict 만 지원)"""
+
+    def __init__(self, pool: CrossEncoderWorkerPool, model_name: str, factory: Callable, **kwargs):
+        self.pool = pool
+        self.model_name = model_name
+        pool.load_model(model_name, factory, **kwargs)
+
+    def predict(self, pairs: Sequence[Tuple[str, str]], **kwargs) -> np.ndarray:
+        return self.pool.predict(self.model_name, pairs)
+
+
+_pool: Optional[CrossEncoderWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool(size: int, timeout: float, thread_config: Optional[Dict[str, Any]] = None) -> CrossEncoderWorkerPool:
+    """
+    전역 워커 풀을 반환합니다. (최초 호출 시 size 개의 워커로 생성)
+
+    Args:
+        thread_config: 워커마다 적용할 torch 스레드/코어 고정 설정 (cross_encoder_config 형식)
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = CrossEncoderWorkerPool(size, timeout, thread_config)
+        return _pool
+
+
+def shutdown_worker_pool() -> None:
+    """전역 워커 풀의 프로세스와 공유 메모리를 정리합니다."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+atexit.register(shutdown_worker_pool)
@@ -0,0 +1,148 @@
+"""
+검색 결과 근사 중복(near-duplicate) 제거
+
+- DDG 결과에는 같은 통신사 기사가 여러 매체 URL 로 재배포된 사본이 자주 섞여 있어
+  임베딩/FAISS/크로스 인코더가 같은 내용을 여러 번 처리합니다.
+- 본문의 문자 n-gram(shingle) MinHash 서명을 만들고 LSH 밴딩으로 후보 쌍을 찾은 뒤,
+  추정 Jaccard 유사도가 NEAR_DUP_THRESHOLD 이상이면 같은 군집으로 묶습니다.
+  (출처 URL 이 같은 문서도 같은 군집으로 묶습니다.)
+- 군집마다 본문이 가장 긴 문서 하나만 남기고, 병합된 출처 URL 을 metadata["sources"],
+  제거된 사본 수를 metadata["duplicate_count"] 에 기록합니다.
+"""
+import logging
+import re
+import zlib
+from collections import defaultdict
+from itertools import combinations
+from typing import Dict, List, Sequence
+
+import numpy as np
+from langchain.schema import Document
+
+from common.env import get_env_bool, get_env_float
+from common.metrics import span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.8
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 64
+# 밴드 16개 x 4행: 추정 Jaccard 약 0.5 이상인 쌍부터 후보가 됨
+NUM_BANDS = 16
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(20240601)
+# crc32(32bit) 해시에 곱해도 uint64 를 넘지 않도록 31bit 계수 사용
+_PERM_A = _rng.integers(1, 1 << 31, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 31, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_NORMALIZE_PATTERN = re.compile(r"[^0-9a-z가-힣]+")
+
+
+def _shingles(text: str) -> np.ndarray:
+    normalized = _NORMALIZE_PATTERN.sub(" ", (text or "").lower()).strip()
+    if len(normalized) <= SHINGLE_SIZE:
+        grams = {normalized}
+    else:
+        grams = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """본문의 MinHash 서명(NUM_PERMUTATIONS 개의 최솟값)을 계산합니다."""
+    hashes = _shingles(text)
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0)
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            # 앞선 문서를 루트로 유지
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+
+def find_duplicate_clusters(texts: Sequence[str], sources: Sequence[str], threshold: float) -> List[List[int]]:
+    """근사 중복 군집(문서 인덱스 목록)을 원래 순서대로 반환합니다."""
+    signatures = np.stack([minhash_signature(text) for text in texts])
+    union_find = _UnionFind(len(texts))
+
+    rows = NUM_PERMUTATIONS // NUM_BANDS
+    candidates = set()
+    for band in range(NUM_BANDS):
+        buckets: Dict[bytes, List[int]] = defaultdict(list)
+        for i, signature in enumerate(signatures):
+            buckets[signature[band * rows:(band + 1) * rows].tobytes()].append(i)
+        for members in buckets.values():
+            candidates.update(combinations(members, 2))
+
+    for i, j in candidates:
+        if float(np.mean(signatures[i] == signatures[j])) >= threshold:
+            union_find.union(i, j)
+
+    first_by_source: Dict[str, int] = {}
+    for i, source in enumerate(sources):
+        if not source or source == "unknown":
+            continue
+        if source in first_by_source:
+            union_find.union(first_by_source[source], i)
+        else:
+            first_by_source[source] = i
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(texts)):
+        clusters[union_find.find(i)].append(i)
+    return [clusters[root] for root in sorted(clusters)]
+
+
+def collapse_near_duplicates(documents: List[Document], threshold: float = None) -> List[Document]:
+    """
+    근사 중복 문서를 군집별 대표 문서 하나로 합칩니다.
+
+    Args:
+        documents: DDG 검색 결과 문서 (검색 순위 순)
+        threshold: 같은 문서로 볼 추정 Jaccard 유사도 (None이면 NEAR_DUP_THRESHOLD, 기본 0.8)
+    """
+    if len(documents) < 2 or not get_env_bool("NEAR_DUP_ENABLED", True):
+        return documents
+    if threshold is None:
+        threshold = get_env_float("NEAR_DUP_THRESHOLD", DEFAULT_THRESHOLD, min_value=0.0, max_value=1.0)
+
+    with span("dedup") as s:
+        s.set_input(len(documents))
+        clusters = find_duplicate_clusters(
+            [doc.page_content for doc in documents],
+            [doc.metadata.get("source", "") for doc in documents],
+            threshold,
+        )
+
+        collapsed: List[Document] = []
+        for members in clusters:
+            if len(members) == 1:
+                collapsed.append(documents[members[0]])
+                continue
+            # 본문이 가장 긴 문서를 대표로, 길이가 같으면 검색 순위가 앞선 문서
+            representative = max(members, key=lambda i: (len(documents[i].page_content), -i))
+            sources = []
+            for i in [representative] + members:
+                source = documents[i].metadata.get("source")
+                if source and source != "unknown" and source not in sources:
+                    sources.append(source)
+            metadata = dict(documents[representative].metadata)
+            metadata["sources"] = sources
+            metadata["duplicate_count"] = len(members) - 1
+            collapsed.append(Document(page_content=documents[representative].page_content, metadata=metadata))
+        s.set_output(len(collapsed))
+
+    if len(collapsed) < len(documents):
+        logger.info(f"근사 중복 문서 병합: {len(documents)} -> {len(collapsed)}")
+    return collapsed
@@ -0,0 +1,191 @@
+"""
+yfinance 시세 조회 브로커
+
+- 여러 세션이 동시에 요청한 티커를 짧은 시간(MARKET_DATA_BATCH_WINDOW_MS) 동안 모아
+  합집합을 한 번의 yf.download 로 조회하고, 결과를 티커별로 나눠 각 호출자에게 돌려줍니다.
+- 이미 조회 중인 티커는 진행 중인 요청의 결과를 함께 사용하고,
+  최근(MARKET_DATA_CACHE_TTL 초 이내) 조회한 티커는 다시 내려받지 않습니다.
+- 모든 다운로드는 yfinance 제공자 보호 계층(common.resilience: 요청 제한 + 서킷 브레이커)을 거치며,
+  조회에 실패하거나 서킷이 열려 있으면 TTL 이 지난 캐시라도 반환합니다.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future, wait
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+import yfinance as yf
+
+from common.deadline import get_stage_timeout
+from common.env import get_env_float, get_env_int
+from common.metrics import metrics_registry, span
+from common.resilience import get_provider_guard
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_WINDOW_MS = 50
+DEFAULT_MAX_BATCH_SIZE = 50
+DEFAULT_CACHE_TTL = 60.0
+
+
+def _split_columns(data: pd.DataFrame, tickers: List[str]) -> Dict[str, Optional[pd.DataFrame]]:
+    """yf.download 결과를 티커별 Close/Open DataFrame 으로 나눕니다."""
+    if data is None or data.empty:
+        return {ticker: None for ticker in tickers}
+
+    if data.columns.nlevels == 3:
+        # yfinance 0.2.x: ('Price','Close',ticker)
+        close_df = data.xs("Close", level=1, axis=1)
+        open_df = data.xs("Open", level=1, axis=1)
+    elif data.columns.nlevels == 2:
+        close_df = data["Close"]
+        open_df = data["Open"]
+    else:
+        # 단일 티커를 평탄한 컬럼으로 받은 경우
+        close_df = data[["Close"]].rename(columns={"Close": tickers[0]})
+        open_df = data[["Open"]].rename(columns={"Open": tickers[0]})
+
+    frames = {}
+    for ticker in tickers:
+        if ticker in close_df.columns and ticker in open_df.columns:
+            frames[ticker] = pd.DataFrame({"Close": close_df[ticker], "Open": open_df[ticker]})
+        else:
+            frames[ticker] = None
+    return frames
+
+
+class MarketDataBroker:
+    """동시 요청을 모아 배치로 yf.download 를 호출하는 브로커"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(MarketDataBroker, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._pending: List[str] = []
+            cls._instance._inflight: Dict[str, Future] = {}
+            cls._instance._cache: Dict[str, tuple] = {}
+            cls._instance._timer = None
+            cls._instance._stats = {
+                "requested": 0, "cache_hits": 0, "coalesced": 0, "downloaded": 0, "batches": 0, "stale_served": 0,
+            }
+        return cls._instance
+
+    def get_quotes(self, tickers: Iterable[str], timeout: float = None) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        티커별 최근 2개월 일봉(Close/Open) DataFrame 을 반환합니다.
+        조회에 실패했거나 timeout 안에 받지 못한 티커는 None 입니다.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        ttl = get_env_float("MARKET_DATA_CACHE_TTL", DEFAULT_CACHE_TTL, min_value=0.0)
+        now = time.time()
+        futures: Dict[str, Future] = {}
+
+        with self._lock:
+            for ticker in tickers:
+                self._stats["requested"] += 1
+                cached = self._cache.get(ticker)
+                if cached and now - cached[0] < ttl:
+                    future = Future()
+                    future.set_result(cached[1])
+                    self._stats["cache_hits"] += 1
+                elif ticker in self._inflight:
+                    future = self._inflight[ticker]
+                    self._stats["coalesced"] += 1
+                else:
+                    future = Future()
+                    self._inflight[ticker] = future
+                    self._pending.append(ticker)
+                futures[ticker] = future
+
+            if self._pending and self._timer is None:
+                window = get_env_int("MARKET_DATA_BATCH_WINDOW_MS", DEFAULT_BATCH_WINDOW_MS, min_value=0) / 1000
+                self._timer = threading.Timer(window, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        wait(list(futures.values()), timeout=timeout)
+
+        results = {}
+        for ticker, future in futures.items():
+            if not future.done():
+                logger.warning(f"시세 조회 대기 시간 초과: {ticker}")
+                results[ticker] = None
+            elif future.exception() is not None:
+                results[ticker] = None
+            else:
+                results[ticker] = future.result()
+        return results
+
+    def _flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._timer = None
+
+        max_batch = get_env_int("MARKET_DATA_MAX_BATCH_SIZE", DEFAULT_MAX_BATCH_SIZE, min_value=1)
+        for start in range(0, len(batch), max_batch):
+            self._download(batch[start:start + max_batch])
+        self._publish_stats()
+
+    @staticmethod
+    def _yf_download(tickers: List[str]) -> pd.DataFrame:
+        with span("yfinance_download", kind="batch") as s:
+            s.set_input(len(tickers))
+            data = yf.download(
+                tickers,
+                period="2mo",
+                interval="1d",
+                progress=False,
+                threads=False,
+                timeout=get_stage_timeout("yfinance"),
+                group_by="column",
+            )
+            s.set_output(len(data))
+        # yfinance 는 요청 제한(429) 시 예외 대신 빈 결과를 반환하므로 실패로 처리
+        if data is None or data.empty:
+            raise RuntimeError("yf.download 가 빈 결과를 반환했습니다.")
+        return data
+
+    def _download(self, tickers: List[str]):
+        frames: Dict[str, Optional[pd.DataFrame]] = {}
+        try:
+            data = get_provider_guard("yfinance").call(self._yf_download, tickers)
+            frames = _split_columns(data, tickers)
+        except Exception as e:
+            logger.warning(f"yf.download 배치 조회 실패 ({len(tickers)}개), 이전 조회 데이터로 대체합니다: {e}")
+
+        now = time.time()
+        with self._lock:
+            self._stats["downloaded"] += len(tickers)
+            self._stats["batches"] += 1
+            for ticker in tickers:
+                future = self._inflight.pop(ticker, None)
+                frame = frames.get(ticker)
+                if frame is not None and not frame.dropna().empty:
+                    self._cache[ticker] = (now, frame)
+                elif ticker in self._cache:
+                    # 조회 실패 시 TTL 이 지난 캐시라도 사용
+                    frame = self._cache[ticker][1]
+                    self._stats["stale_served"] += 1
+                if future is not None:
+                    future.set_result(frame)
+
+    def _publish_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        for name, value in stats.items():
+            metrics_registry.set_gauge(f"market_data_broker_{name}", value)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+
+def get_market_data_broker() -> MarketDataBroker:
+    return MarketDataBroker()
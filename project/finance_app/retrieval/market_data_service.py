@@ -1,20 +1,38 @@
+import asyncio
+import re
+import threading
+import time
 import yfinance as yf
 from typing import List, Dict
 from langchain.schema import Document
 from langchain_core.messages import HumanMessage, SystemMessage
-from common.config import get_llm
-from common.constants import Agent
+from common.llm_cache import get_cached_llm
+from common.metrics import span, messages_size
+from common.constants import Agent, TickerStrategy
+from common.env import get_env_str
+from common.deadline import get_stage_timeout
+from common.resilience import get_provider_guard
+from retrieval.ticker_universe import get_ticker_universe, resolve_tickers
+from retrieval.ticker_recommender import get_ticker_recommender
+from retrieval.market_data_broker import get_market_data_broker
 import logging
 
 
 logger = logging.getLogger(__name__)
 
+# 티커 추천이 제한시간을 넘겼을 때 사용할 기본 티커 (지수/대표 ETF)
+FALLBACK_TICKERS = ["^GSPC", "^IXIC", "^KS11", "SPY", "QQQ"]
+
+# 마지막으로 성공한 시세 조회 결과 (제한시간 초과 시 대체 데이터로 사용)
+_market_cache_lock = threading.Lock()
+_stock_doc_cache: Dict[str, Document] = {}
+_macro_doc_cache: List[Document] = []
+_macro_cached_at = 0.0
+
 # 관련된 종목 찾기
 
 
-def suggest_related_tickers(
-    topic: str, capital: float, risk_level: int
-) -> List[str]:
+def _build_ticker_messages(topic: str, capital: float, risk_level: int) -> list:
 
     prompt = (
         f"자본금 {capital}만원, 위험성향 {risk_level}(1 ~ 5등급, 숫자가 클수록 공격투자형)인 투자자에게 필요한 "
@@ -35,7 +53,7 @@ def suggest_related_tickers(
         Required:
         - Exactly 5 tickers
         - Output in one single line, separated by commas
-        - Must be valid yfinance format(e.g., 005930.KS, NVDA, ^ GSPC, BTC-USD, CL=F)
+        - Must be valid yfinance format(e.g., 005930.KS, NVDA, ^GSPC, BTC-USD, CL=F)
 
         Risk rules:
         - Risk level 1–2: Focus on indexes/ETFs(2–3), large-cap defensive stocks(1–2), optional hedge(0–1)
@@ -45,7 +63,7 @@ def suggest_related_tickers(
         Regional suffix hints:
         - Korea KOSPI: .KS, KOSDAQ: .KQ
         - Japan: .T, UK: .L, Hong Kong: .HK, Shanghai: .SS
-        - Index: ^ GSPC(S & P 500), ^ IXIC(NASDAQ), ^ KS11(KOSPI)
+        - Index: ^GSPC(S&P 500), ^IXIC(NASDAQ), ^KS11(KOSPI)
         - Commodities: CL=F(WTI), GC=F(Gold)
         - FX: USDKRW=X
         - Crypto: BTC-USD, ETH-USD
@@ -64,35 +82,108 @@ def suggest_related_tickers(
         Do not explain.
     """)
 
-    messages = [
+    return [
         SystemMessage(content=system_prompt),
         HumanMessage(content=human_prompt),
     ]
 
-    response = get_llm().invoke(messages)
 
-    # , 로 구분된 ticker 리스트 추출
-    suggested_tickers = [t.strip() for t in response.content.split(",")]
+def get_ticker_strategy() -> TickerStrategy:
+    """티커 추천 전략을 반환합니다. (TICKER_STRATEGY=llm|embedding)"""
+    value = get_env_str("TICKER_STRATEGY", TickerStrategy.LLM.value).lower()
+    try:
+        return TickerStrategy(value)
+    except ValueError:
+        logger.warning(f"환경변수 TICKER_STRATEGY 값이 올바르지 않습니다({value}). 기본값 {TickerStrategy.LLM.value}을 사용합니다.")
+        return TickerStrategy.LLM
+
+
+def suggest_related_tickers(
+    topic: str, capital: float, risk_level: int
+) -> List[str]:
+
+    # 임베딩 인덱스로 추천하고, 신뢰도가 낮거나 실패하면 LLM 으로 대체
+    if get_ticker_strategy() == TickerStrategy.Embedding:
+        try:
+            recommendation = get_ticker_recommender().recommend(topic, risk_level)
+        except Exception as e:
+            logger.warning(f"임베딩 티커 추천 실패, LLM 으로 대체합니다: {e}")
+            recommendation = None
+        if recommendation:
+            return recommendation.tickers
+
+    return _suggest_tickers_with_llm(topic, capital, risk_level)
+
+
+def _suggest_tickers_with_llm(
+    topic: str, capital: float, risk_level: int
+) -> List[str]:
 
-    return suggested_tickers
+    messages = _build_ticker_messages(topic, capital, risk_level)
+
+    with span("ticker_suggestion") as s:
+        llm = get_cached_llm(
+            "suggest_related_tickers",
+            key=topic,
+            scope=f"{capital}|{risk_level}",
+        )
+        s.set_input(messages_size(messages))
+        response = llm.invoke(messages)
+        s.record_llm_response(response)
+
+    return _parse_tickers(response.content)
+
+
+async def asuggest_related_tickers(
+    topic: str, capital: float, risk_level: int
+) -> List[str]:
+    """suggest_related_tickers 의 비동기 버전 (LLM 호출에 ainvoke 사용)"""
+    if get_ticker_strategy() == TickerStrategy.Embedding:
+        try:
+            recommendation = await get_ticker_recommender().arecommend(topic, risk_level)
+        except Exception as e:
+            logger.warning(f"임베딩 티커 추천 실패, LLM 으로 대체합니다: {e}")
+            recommendation = None
+        if recommendation:
+            return recommendation.tickers
+
+    messages = _build_ticker_messages(topic, capital, risk_level)
+
+    with span("ticker_suggestion") as s:
+        llm = get_cached_llm(
+            "suggest_related_tickers",
+            key=topic,
+            scope=f"{capital}|{risk_level}",
+        )
+        s.set_input(messages_size(messages))
+        response = await llm.ainvoke(messages)
+        s.record_llm_response(response)
+
+    return _parse_tickers(response.content)
+
+
+def _parse_tickers(content: str) -> List[str]:
+    """콤마/줄바꿈으로 구분된 LLM 응답을 로컬 티커 유니버스로 검증/교정합니다. (네트워크 호출 전)"""
+    raw_tickers = [t for t in re.split(r"[,\n]", content) if t.strip()]
+    tickers = resolve_tickers(raw_tickers)
+    if not tickers:
+        logger.warning(f"유효한 추천 티커가 없어 기본 티커를 사용합니다: {content!r}")
+        return list(FALLBACK_TICKERS)
+    return tickers
 
 # 종목 시세 가져오기
 def fetch_stock_data(tickers: List[str]) -> List[Document]:
     documents = []
-    data = yf.download(
-        tickers,
-        period="2mo",
-        interval="1d",
-        progress=False,
-        threads=False,
-    )
+    # 다른 세션의 요청과 묶어서 한 번에 조회
+    quotes = get_market_data_broker().get_quotes(tickers, timeout=get_stage_timeout("market_data"))
 
     for ticker in tickers:
-        # 멀티티커 → DataFrame, 단일티커 → Series 형태일 수 있음
+        # 시장마다 휴장일이 달라 마지막 행이 NaN 일 수 있으므로 Close/Open 이 모두 있는 마지막 행 사용
         try:
-            close_val = data["Close"][ticker].iloc[-1]
-            open_val = data["Open"][ticker].iloc[-1]
-        except (KeyError, IndexError, TypeError):
+            last_row = quotes[ticker].dropna().iloc[-1]
+            close_val = last_row["Close"]
+            open_val = last_row["Open"]
+        except (KeyError, IndexError, TypeError, AttributeError):
             # 컬럼이 없거나 빈 Series 인 경우
             doc = Document(
                 page_content=f"{ticker} 종목: 데이터 없음",
@@ -123,8 +214,18 @@ def fetch_stock_data(tickers: List[str]) -> List[Document]:
         # 정상 데이터라면 변동률 계산
         change_pct = (close_val - open_val) / open_val * 100
 
-        info = yf.Ticker(ticker).info
-        name = info.get("shortName") or info.get("longName") or ticker
+        # 유니버스에 있는 종목은 .info 조회 없이 이름을 사용
+        entry = get_ticker_universe().get(ticker)
+        if entry:
+            name = entry.name
+        else:
+            try:
+                with span("yfinance_info"):
+                    info = get_provider_guard("yfinance").call(lambda: yf.Ticker(ticker).info)
+                name = info.get("shortName") or info.get("longName") or ticker
+            except Exception as e:
+                logger.warning(f"{ticker} 종목 정보 조회 실패: {e}")
+                name = ticker
 
         doc = Document(
             page_content=f"{ticker} 종목 현재가: {close_val:.2f} USD, 변동률: {change_pct:+.2f}%",
@@ -138,6 +239,11 @@ def fetch_stock_data(tickers: List[str]) -> List[Document]:
         )
         documents.append(doc)
 
+    with _market_cache_lock:
+        for doc in documents:
+            if doc.metadata.get("price") is not None:
+                _stock_doc_cache[doc.metadata["ticker"]] = doc
+
     return documents
 
 # 주요 지수/금리/환율 데이터 가져오기
@@ -152,34 +258,19 @@ def fetch_macro_data() -> List[Document]:
         "WTI 원유": "CL=F",
     }
 
-    data = yf.download(
-        list(macro_tickers.values()),
-        period="2mo",
-        interval="1d",
-        progress=False,
-        threads=False,
-        group_by="column"
-    )
-
-    # 멀티-인덱스를 티커별 Close / Open 테이블로 변환
-    #   * yfinance 0.2.x: ('Price','Close',ticker)
-    if data.columns.nlevels == 3:
-        close_df = data.xs("Close", level=1, axis=1)
-        open_df = data.xs("Open",  level=1, axis=1)
-    else:
-        close_df = data["Close"]
-        open_df = data["Open"]
+    quotes = get_market_data_broker().get_quotes(macro_tickers.values(), timeout=get_stage_timeout("market_data"))
 
     documents: List[Document] = []
 
     for name, ticker in macro_tickers.items():
-        # 컬럼 자체가 없으면 스킵
-        if ticker not in close_df.columns:
+        frame = quotes.get(ticker)
+        # 데이터 자체가 없으면 스킵
+        if frame is None:
             continue
 
         # 최근 유효값 추출(dropna 로 NaN 제거)
-        close_series = close_df[ticker].dropna()
-        open_series = open_df[ticker].dropna()
+        close_series = frame["Close"].dropna()
+        open_series = frame["Open"].dropna()
 
         if close_series.empty or open_series.empty:
             # 데이터 완전 없음
@@ -226,6 +317,31 @@ def fetch_macro_data() -> List[Document]:
             )
         )
 
+    global _macro_doc_cache, _macro_cached_at
+    if any(doc.metadata.get("price") is not None for doc in documents):
+        with _market_cache_lock:
+            _macro_doc_cache = list(documents)
+            _macro_cached_at = time.time()
+
+    return documents
+
+
+def get_cached_market_data(tickers: List[str]) -> List[Document]:
+    """
+    마지막으로 성공한 조회 결과에서 종목/지표 문서를 반환합니다. (제한시간 초과 시 대체 데이터)
+    반환 문서의 metadata 에는 stale=True 와 조회 시각(cached_at)이 표시됩니다.
+    """
+    with _market_cache_lock:
+        stock_docs = [_stock_doc_cache[t] for t in tickers if t in _stock_doc_cache]
+        macro_docs = list(_macro_doc_cache)
+        cached_at = _macro_cached_at
+
+    documents = []
+    for doc in stock_docs + macro_docs:
+        metadata = {**doc.metadata, "stale": True}
+        if cached_at and doc.metadata.get("section") == "macro":
+            metadata["cached_at"] = time.strftime("%Y-%m-%d %H:%M", time.localtime(cached_at))
+        documents.append(Document(page_content=f"{doc.page_content} (이전 조회 데이터)", metadata=metadata))
     return documents
 
 
@@ -237,3 +353,12 @@ def get_market_data(tickers: List[str]) -> List[Document]:
     stock_docs = fetch_stock_data(tickers)
     macro_docs = fetch_macro_data()
     return stock_docs + macro_docs
+
+
+async def aget_market_data(tickers: List[str]) -> List[Document]:
+    """get_market_data 의 비동기 버전. yfinance 호출은 스레드로 넘겨 종목/지표를 동시에 조회합니다."""
+    stock_docs, macro_docs = await asyncio.gather(
+        asyncio.to_thread(fetch_stock_data, tickers),
+        asyncio.to_thread(fetch_macro_data),
+    )
+    return stock_docs + macro_docs
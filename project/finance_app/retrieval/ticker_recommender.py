@@ -0,0 +1,230 @@
+"""
+임베딩 기반 주제 → 티커 추천
+
+- 종목 프로필(retrieval/data/ticker_profiles.csv: 역할, 최소 위험성향, 섹터 태그, 설명)을 임베딩한 인덱스를
+  미리 만들어 두고(python -m retrieval.ticker_recommender), 주제 임베딩과의 코사인 유사도로 종목을 고릅니다.
+- 위험성향별 구성 규칙(RISK_QUOTAS)과 최소 위험성향(min_risk)을 필터로 적용합니다.
+- 가장 높은 유사도가 TICKER_EMBEDDING_MIN_SCORE 보다 낮거나 관련 종목이 MIN_TICKER_COUNT 보다 적으면
+  None 을 반환하고, 호출 측이 LLM 추천으로 대체합니다.
+- TICKER_EMBEDDING_MIN_SCORE 기본값(0.3)은 실제 주제로 보정한 값이 아니며, 유사도 분포가 임베딩 백엔드/모델/
+  차원(EMBEDDING_BACKEND, EMBEDDING_DIMENSIONS)마다 다르므로 사용하는 임베딩 설정에서 보정한 뒤
+  TICKER_STRATEGY=embedding 을 켜야 합니다. (기본 전략은 llm)
+- 인덱스는 TICKER_INDEX_DIR 에 저장되며, 프로필/임베딩 모델이 바뀌면 처음 사용할 때 다시 만듭니다.
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from common.config import get_embedding_model_name, get_embeddings
+from common.env import get_env_float, get_env_int, get_env_str
+from common.metrics import span
+from retrieval.ticker_universe import get_ticker_universe
+
+logger = logging.getLogger(__name__)
+
+_DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DEFAULT_PROFILE_PATH = os.path.join(_DATA_DIR, "ticker_profiles.csv")
+DEFAULT_INDEX_DIR = os.path.join(_DATA_DIR, "ticker_index")
+DEFAULT_MIN_SCORE = 0.3
+DEFAULT_RELATIVE_SCORE = 0.75
+DEFAULT_TICKER_COUNT = 5
+# 관련 종목이 이보다 적으면 LLM 추천으로 대체
+MIN_TICKER_COUNT = 3
+
+# 위험성향별 구성 규칙: (허용 역할, 종목 수)
+#   fund: 지수/ETF, defensive: 대형 방어주, mega: 초대형 주도주, growth: 성장/테마주, hedge: 채권/금/환율 등
+_CONSERVATIVE = [(("fund",), 3), (("defensive",), 1), (("hedge",), 1)]
+_BALANCED = [(("fund",), 2), (("mega",), 2), (("growth",), 1)]
+_AGGRESSIVE = [(("growth",), 4), (("fund", "hedge"), 1)]
+RISK_QUOTAS = {1: _CONSERVATIVE, 2: _CONSERVATIVE, 3: _BALANCED, 4: _AGGRESSIVE, 5: _AGGRESSIVE}
+
+
+class TickerProfile(NamedTuple):
+    symbol: str
+    roles: Tuple[str, ...]
+    min_risk: int
+    text: str       # 임베딩 대상 문자열
+
+
+class TickerRecommendation(NamedTuple):
+    tickers: List[str]
+    confidence: float   # 주제와 가장 가까운 종목의 코사인 유사도
+
+
+def _load_profiles(path: str) -> List[TickerProfile]:
+    universe = get_ticker_universe()
+    profiles = []
+    with open(path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            entry = universe.get(row["symbol"].strip())
+            if entry is None:
+                logger.warning(f"티커 유니버스에 없는 프로필을 건너뜁니다: {row['symbol']}")
+                continue
+            tags = ", ".join(t.strip() for t in (row.get("tags") or "").split("|") if t.strip())
+            profiles.append(TickerProfile(
+                symbol=entry.symbol,
+                roles=tuple(r.strip() for r in row["roles"].split("|") if r.strip()),
+                min_risk=int(row.get("min_risk") or 1),
+                text=f"{entry.name_ko} ({entry.name}) - {row.get('description', '').strip()} / 섹터: {tags}",
+            ))
+    return profiles
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class TickerRecommender:
+    """종목 프로필 임베딩 인덱스를 지연 로드하여 공유하는 추천기"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(TickerRecommender, cls).__new__(cls)
+            cls._instance._profiles = []
+            cls._instance._vectors = None
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    @staticmethod
+    def _fingerprint(profiles: Sequence[TickerProfile], model: str) -> str:
+        digest = hashlib.sha1(model.encode("utf-8"))
+        for p in profiles:
+            digest.update(f"{p.symbol}\t{p.text}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _ensure_index(self):
+        if self._vectors is not None:
+            return
+        with self._lock:
+            if self._vectors is None:
+                self._load_or_build(force=False)
+
+    def _load_or_build(self, force: bool):
+        profiles = _load_profiles(get_env_str("TICKER_PROFILE_PATH", DEFAULT_PROFILE_PATH))
+        model = get_embedding_model_name()
+        fingerprint = self._fingerprint(profiles, model)
+        index_dir = get_env_str("TICKER_INDEX_DIR", DEFAULT_INDEX_DIR)
+        meta_path = os.path.join(index_dir, "meta.json")
+        vectors_path = os.path.join(index_dir, "vectors.npy")
+
+        vectors = None
+        if not force and os.path.exists(meta_path) and os.path.exists(vectors_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("fingerprint") == fingerprint:
+                vectors = np.load(vectors_path)
+            else:
+                logger.info("티커 프로필 또는 임베딩 모델이 변경되어 인덱스를 다시 생성합니다.")
+
+        if vectors is None:
+            with span("embedding", purpose="ticker_index") as s:
+                s.set_input(len(profiles))
+                vectors = np.asarray(get_embeddings().embed_documents([p.text for p in profiles]), dtype=np.float32)
+            vectors = _normalize(vectors)
+            try:
+                os.makedirs(index_dir, exist_ok=True)
+                np.save(vectors_path, vectors)
+                with open(meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"fingerprint": fingerprint, "model": model, "symbols": [p.symbol for p in profiles]},
+                              f, ensure_ascii=False)
+            except OSError as e:
+                logger.warning(f"티커 인덱스를 저장하지 못했습니다({index_dir}): {e}")
+            logger.info(f"티커 인덱스 생성: {len(profiles)}개 종목")
+
+        self._profiles = profiles
+        self._vectors = vectors
+
+    def build(self):
+        """프로필 임베딩 인덱스를 새로 만들어 저장합니다. (배포 전 오프라인 실행용)"""
+        with self._lock:
+            self._load_or_build(force=True)
+
+    def recommend(self, topic: str, risk_level: int) -> Optional[TickerRecommendation]:
+        """주제와 위험성향에 맞는 티커를 추천합니다. 유사도가 낮으면 None"""
+        self._ensure_index()
+        with span("embedding", purpose="ticker_query"):
+            query = get_embeddings().embed_query(topic)
+        return self._select(query, risk_level)
+
+    async def arecommend(self, topic: str, risk_level: int) -> Optional[TickerRecommendation]:
+        """recommend 의 비동기 버전 (인덱스가 없으면 최초 1회는 스레드에서 생성)"""
+        if self._vectors is None:
+            await asyncio.to_thread(self._ensure_index)
+        with span("embedding", purpose="ticker_query"):
+            query = await get_embeddings().aembed_query(topic)
+        return self._select(query, risk_level)
+
+    def _select(self, query: Sequence[float], risk_level: int) -> Optional[TickerRecommendation]:
+        query_vec = _normalize(np.asarray(query, dtype=np.float32))
+        scores = self._vectors @ query_vec
+        risk_level = min(max(int(risk_level), 1), 5)
+
+        # 위험성향에 허용된 종목만 유사도 순으로
+        ranked = [i for i in np.argsort(-scores) if self._profiles[i].min_risk <= risk_level]
+        if not ranked:
+            return None
+        confidence = float(scores[ranked[0]])
+        min_score = get_env_float("TICKER_EMBEDDING_MIN_SCORE", DEFAULT_MIN_SCORE, min_value=-1.0, max_value=1.0)
+        if confidence < min_score:
+            logger.info(f"임베딩 티커 추천 신뢰도 부족: {confidence:.3f} < {min_score}")
+            return None
+
+        # 가장 가까운 종목 대비 일정 비율 이상인 종목만 후보로 사용
+        relative = get_env_float("TICKER_EMBEDDING_RELATIVE_SCORE", DEFAULT_RELATIVE_SCORE, min_value=0.0, max_value=1.0)
+        candidates = [i for i in ranked if scores[i] >= confidence * relative]
+
+        selected: List[int] = []
+        for roles, count in RISK_QUOTAS[risk_level]:
+            picked = [i for i in candidates if i not in selected and set(roles) & set(self._profiles[i].roles)][:count]
+            selected.extend(picked)
+
+        # 역할별 후보가 부족하면 유사도 순으로 채움
+        total = get_env_int("TICKER_RECOMMEND_COUNT", DEFAULT_TICKER_COUNT, min_value=1)
+        for i in candidates:
+            if len(selected) >= total:
+                break
+            if i not in selected:
+                selected.append(i)
+
+        if len(selected) < min(MIN_TICKER_COUNT, total):
+            logger.info(f"임베딩 티커 추천 후보 부족: {len(selected)}개")
+            return None
+
+        return TickerRecommendation(
+            tickers=[self._profiles[i].symbol for i in selected[:total]],
+            confidence=confidence,
+        )
+
+
+def get_ticker_recommender() -> TickerRecommender:
+    return TickerRecommender()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="티커 추천용 임베딩 인덱스 생성")
+    parser.add_argument("--topic", help="인덱스 생성 후 추천 결과를 확인할 주제")
+    parser.add_argument("--risk-level", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    recommender = get_ticker_recommender()
+    recommender.build()
+    if args.topic:
+        print(recommender.recommend(args.topic, args.risk_level))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+로컬 티커 유니버스 인덱스
+
+- 번들된 CSV(retrieval/data/ticker_universe/*.csv)에서 KRX, 미국 주식, ETF, 지수, 환율, 선물, 암호화폐 심볼을 읽어
+  메모리 인덱스(심볼/이름 → 엔트리 번호)로 보관합니다.
+- LLM 이 추천한 티커를 네트워크 호출 전에 검증/교정합니다.
+  정확 일치 → 정규화 일치("^ GSPC" → "^GSPC", "brk.b" → "BRK-B", "005930" → "005930.KS")
+  → 한글/영문 이름 일치 → 이름 유사도(fuzzy) 순으로 찾습니다.
+  번들 유니버스는 일부 종목만 담고 있으므로 찾지 못한 티커는 형식이 올바르면 그대로 통과시키고,
+  형식이 잘못되었거나 중간에 공백이 있는 구문("Tesla shares", "gold ETF")은 제외합니다. (TICKER_UNIVERSE_STRICT=true 면 유니버스에 없는 티커를 모두 제외)
+- 전체 종목 목록을 쓰려면 같은 형식의 CSV 가 있는 디렉터리를 TICKER_UNIVERSE_DIR 로 지정합니다.
+  (symbol,kind,name,name_ko,aliases / aliases 는 '|' 로 구분)
+"""
+import csv
+import difflib
+import glob
+import logging
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from common.env import get_env_bool, get_env_float, get_env_str
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UNIVERSE_DIR = os.path.join(os.path.dirname(__file__), "data", "ticker_universe")
+DEFAULT_FUZZY_CUTOFF = 0.85
+# 이름 유사도 검색을 적용할 최소 길이 (짧은 문자열은 오탐이 많음)
+_MIN_FUZZY_LENGTH = 3
+
+_KRX_SUFFIXES = (".KS", ".KQ")
+_KRX_CODE_PATTERN = re.compile(r"^(\d{6})(?:\.(KS|KQ))?$")
+# 미국 클래스 주식 표기 (BRK.B → BRK-B)
+_CLASS_SHARE_PATTERN = re.compile(r"^([A-Z]{1,5})\.([A-Z])$")
+# 유니버스에 없어도 허용할 수 있는 yfinance 심볼 형식 (비엄격 모드)
+_SYMBOL_PATTERN = re.compile(r"^\^?[A-Z0-9][A-Z0-9.\-=]{0,14}$")
+_STRIP_CHARS = " \t\r\n'\"`*[](){}"
+_NAME_KEY_PATTERN = re.compile(r"[^0-9a-z가-힣]")
+# 이름 비교 시 무시하는 법인 표기
+_CORPORATE_SUFFIX_PATTERN = re.compile(r"\b(inc|corp|corporation|co|ltd|plc|company)\b\.?|\(주\)|주식회사")
+
+
+class TickerEntry(NamedTuple):
+    symbol: str
+    kind: str       # stock, etf, index, fx, future, crypto
+    name: str
+    name_ko: str
+
+
+def _strip_decorations(raw: str) -> str:
+    # 앞뒤 공백/따옴표와 목록 기호("- ", "1. ")만 제거 (중간 공백은 유지)
+    text = re.sub(r"^\s*(?:[-•]|\d+[.)])\s+", "", raw or "")
+    return text.strip(_STRIP_CHARS)
+
+
+def normalize_symbol(raw: str) -> str:
+    """공백/따옴표/목록 기호를 제거하고 대문자로 바꿉니다. ("^ gspc" → "^GSPC")"""
+    return re.sub(r"\s+", "", _strip_decorations(raw)).upper()
+
+
+def _name_key(text: str) -> str:
+    text = _CORPORATE_SUFFIX_PATTERN.sub("", (text or "").lower())
+    return _NAME_KEY_PATTERN.sub("", text)
+
+
+class TickerUniverse:
+    """번들된 심볼 목록을 지연 로드하여 공유하는 티커 인덱스"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(TickerUniverse, cls).__new__(cls)
+            cls._instance._entries = ()
+            cls._instance._by_symbol = {}
+            cls._instance._by_name = {}
+            cls._instance._name_keys = []
+            cls._instance._loaded = False
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load(get_env_str("TICKER_UNIVERSE_DIR", DEFAULT_UNIVERSE_DIR))
+                self._loaded = True
+
+    def _load(self, directory: str):
+        entries: List[TickerEntry] = []
+        by_symbol: Dict[str, int] = {}
+        by_name: Dict[str, int] = {}
+
+        paths = sorted(glob.glob(os.path.join(directory, "*.csv")))
+        if not paths:
+            logger.warning(f"티커 유니버스 파일이 없습니다: {directory}")
+
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    symbol = normalize_symbol(row.get("symbol", ""))
+                    if not symbol or symbol in by_symbol:
+                        continue
+                    index = len(entries)
+                    entries.append(TickerEntry(
+                        symbol=symbol,
+                        kind=(row.get("kind") or "stock").strip(),
+                        name=(row.get("name") or symbol).strip(),
+                        name_ko=(row.get("name_ko") or "").strip(),
+                    ))
+                    by_symbol[symbol] = index
+
+                    aliases = (row.get("aliases") or "").split("|")
+                    for name in [row.get("name"), row.get("name_ko"), *aliases]:
+                        key = _name_key(name)
+                        # 같은 이름은 먼저 등록된 엔트리를 우선
+                        if key and key not in by_name:
+                            by_name[key] = index
+
+        self._entries = tuple(entries)
+        self._by_symbol = by_symbol
+        self._by_name = by_name
+        self._name_keys = sorted(by_name)
+        logger.info(f"티커 유니버스 로드: 심볼 {len(entries)}개, 이름 {len(by_name)}개 ({len(paths)}개 파일)")
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._entries)
+
+    def get(self, symbol: str) -> Optional[TickerEntry]:
+        """정확히 일치하는 심볼의 엔트리를 반환합니다."""
+        self._ensure_loaded()
+        index = self._by_symbol.get(symbol)
+        return self._entries[index] if index is not None else None
+
+    def resolve(self, raw: str) -> Optional[TickerEntry]:
+        """
+        심볼 또는 종목명을 유니버스의 엔트리로 변환합니다. 찾지 못하면 None
+
+        Args:
+            raw: LLM 이 반환한 티커 문자열 (예: "^ GSPC", "005930", "삼성전자", "NVIDA")
+        """
+        self._ensure_loaded()
+        if not raw or not raw.strip():
+            return None
+
+        entry = self.get(raw.strip())
+        if entry:
+            return entry
+
+        symbol = normalize_symbol(raw)
+        for candidate in self._symbol_candidates(symbol):
+            entry = self.get(candidate)
+            if entry:
+                return entry
+
+        key = _name_key(raw)
+        if not key:
+            return None
+        index = self._by_name.get(key)
+        if index is not None:
+            return self._entries[index]
+
+        if len(key) >= _MIN_FUZZY_LENGTH:
+            cutoff = get_env_float("TICKER_FUZZY_CUTOFF", DEFAULT_FUZZY_CUTOFF, min_value=0.0, max_value=1.0)
+            matches = difflib.get_close_matches(key, self._name_keys, n=1, cutoff=cutoff)
+            if matches:
+                return self._entries[self._by_name[matches[0]]]
+        return None
+
+    @staticmethod
+    def _symbol_candidates(symbol: str) -> List[str]:
+        candidates = [symbol]
+        krx = _KRX_CODE_PATTERN.match(symbol)
+        if krx:
+            # 시장 접미어가 없거나 잘못된 KRX 종목코드 (005930, 247540.KS)
+            code, suffix = krx.group(1), krx.group(2)
+            candidates += [code + s for s in _KRX_SUFFIXES if s != f".{suffix}"]
+        class_share = _CLASS_SHARE_PATTERN.match(symbol)
+        if class_share:
+            candidates.append(f"{class_share.group(1)}-{class_share.group(2)}")
+        return candidates
+
+    def resolve_tickers(self, raw_tickers: Iterable[str], strict: bool = None) -> List[str]:
+        """
+        티커 목록을 검증/교정하여 중복 없이 반환합니다.
+
+        Args:
+            raw_tickers: LLM 이 반환한 티커 목록
+                (유니버스에 없는 "Tesla shares", "gold ETF" 같은 구문은 공백을 없앤 결과가 심볼 형식이어도 제외)
+            strict: True면 유니버스에 없는 티커를 제외 (None이면 TICKER_UNIVERSE_STRICT, 기본 False)
+        """
+        if strict is None:
+            strict = get_env_bool("TICKER_UNIVERSE_STRICT", False)
+
+        resolved: List[str] = []
+        dropped: List[str] = []
+        for raw in raw_tickers:
+            entry = self.resolve(raw)
+            if entry:
+                symbol = entry.symbol
+            else:
+                # 공백 제거는 유니버스 조회("^ GSPC")에만 쓰고, 중간에 공백이 있는 구문은 심볼로 통과시키지 않음
+                symbol = normalize_symbol(raw)
+                has_space = bool(re.search(r"\s", _strip_decorations(raw)))
+                if strict or has_space or not _SYMBOL_PATTERN.match(symbol):
+                    if raw and raw.strip():
+                        dropped.append(raw.strip())
+                    continue
+            if symbol not in resolved:
+                resolved.append(symbol)
+
+        if dropped:
+            logger.warning(f"유효하지 않은 티커 제외: {', '.join(dropped)}")
+        return resolved
+
+
+def get_ticker_universe() -> TickerUniverse:
+    return TickerUniverse()
+
+
+def resolve_tickers(raw_tickers: Iterable[str], strict: bool = None) -> List[str]:
+    return get_ticker_universe().resolve_tickers(raw_tickers, strict=strict)
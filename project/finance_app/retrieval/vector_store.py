@@ -1,13 +1,58 @@
+import asyncio
 import streamlit as st
 from langchain_community.vectorstores import FAISS
+from langchain.schema import Document
 from typing import Any, Dict, Optional, List
-from retrieval.retrieve_service import generate_finance_queries, fetch_finance_documents
+from retrieval.retrieve_service import (
+    generate_finance_queries,
+    fetch_finance_documents,
+    agenerate_finance_queries,
+    afetch_finance_documents,
+)
 from retrieval.cross_encoder_service import get_cross_encoder_service
+from retrieval.dedup import collapse_near_duplicates
+from retrieval.vector_index import create_vector_store
 from common.config import get_embeddings
+from common.local_embeddings import LocalSentenceEmbeddings
+from common.metrics import span
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _validate_documents(documents: List[Document], topic: str) -> List[Document]:
+    # 문서 유효성 검사
+    valid_documents = []
+    for i, doc in enumerate(documents):
+        try:
+            # Document 객체가 유효한지 확인
+            if hasattr(doc, 'page_content') and doc.page_content and len(doc.page_content.strip()) > 0:
+                valid_documents.append(doc)
+            else:
+                logger.warning(f"문서 {i}의 내용이 비어있습니다.")
+        except Exception as e:
+            logger.warning(f"문서 {i} 처리 중 오류: {e}")
+            continue
+
+    if not valid_documents:
+        logger.warning(f"주제 '{topic}'에 대한 유효한 문서가 없습니다.")
+    else:
+        logger.info(f"벡터 스토어 생성 시작: {len(valid_documents)}개 유효 문서")
+    return valid_documents
+
+
+def _build_vector_store(documents: List[Document], texts: List[str], vectors: List[List[float]], embeddings) -> FAISS:
+    # FAISS 벡터 스토어 생성
+    with span("faiss_build") as s:
+        s.set_input(len(vectors))
+        # VECTOR_INDEX_TYPE / VECTOR_INDEX_QUANTIZATION 설정에 따라 인덱스 구성 (기본값은 IndexFlatL2)
+        return create_vector_store(
+            texts,
+            vectors,
+            embeddings,
+            metadatas=[doc.metadata for doc in documents],
+        )
+
+
 # st.cache_resource 데코레이터를 사용하여 벡터 스토어를 캐싱
 def get_topic_vector_store(
     topic: str, capital: float, risk_level: int, language: str = "ko"
@@ -30,27 +75,26 @@ def get_topic_vector_store(
             logger.warning(f"주제 '{topic}'에 대한 검색 결과가 없습니다.")
             return None
             
-        # 문서 유효성 검사
-        valid_documents = []
-        for i, doc in enumerate(documents):
-            try:
-                # Document 객체가 유효한지 확인
-                if hasattr(doc, 'page_content') and doc.page_content and len(doc.page_content.strip()) > 0:
-                    valid_documents.append(doc)
-                else:
-                    logger.warning(f"문서 {i}의 내용이 비어있습니다.")
-            except Exception as e:
-                logger.warning(f"문서 {i} 처리 중 오류: {e}")
-                continue
-        
+        valid_documents = _validate_documents(documents, topic)
         if not valid_documents:
-            logger.warning(f"주제 '{topic}'에 대한 유효한 문서가 없습니다.")
             return None
-            
-        logger.info(f"벡터 스토어 생성 시작: {len(valid_documents)}개 유효 문서")
-        
-        # FAISS 벡터 스토어 생성
-        vector_store = FAISS.from_documents(valid_documents, get_embeddings())
+
+        # 재배포된 같은 기사는 대표 문서 하나만 임베딩
+        valid_documents = collapse_near_duplicates(valid_documents)
+
+        # 문서 임베딩
+        embeddings = get_embeddings()
+        texts = [doc.page_content for doc in valid_documents]
+        with span("embedding") as s:
+            s.set_input(len(texts))
+            # 로컬 모델은 리스트 변환 없이 float32 배열을 그대로 FAISS 에 넣음
+            if isinstance(embeddings, LocalSentenceEmbeddings):
+                vectors = embeddings.encode(texts)
+            else:
+                vectors = embeddings.embed_documents(texts)
+            s.set_output(len(vectors))
+
+        vector_store = _build_vector_store(valid_documents, texts, vectors, embeddings)
         logger.info(f"벡터 스토어 생성 완료: {len(valid_documents)}개 문서")
         return vector_store
         
@@ -60,6 +104,48 @@ def get_topic_vector_store(
         return None
 
 
+async def aget_topic_vector_store(
+    topic: str, capital: float, risk_level: int, language: str = "ko"
+) -> Optional[FAISS]:
+    """get_topic_vector_store 의 비동기 버전 (LLM/임베딩은 비동기 호출, 검색/FAISS 생성은 스레드)"""
+    try:
+        improved_queries = await agenerate_finance_queries(topic, capital, risk_level)
+        if not improved_queries:
+            logger.warning(f"주제 '{topic}'에 대한 검색어를 생성할 수 없습니다.")
+            return None
+
+        documents = await afetch_finance_documents(improved_queries, language)
+        if not documents:
+            logger.warning(f"주제 '{topic}'에 대한 검색 결과가 없습니다.")
+            return None
+
+        valid_documents = _validate_documents(documents, topic)
+        if not valid_documents:
+            return None
+
+        # 재배포된 같은 기사는 대표 문서 하나만 임베딩
+        valid_documents = collapse_near_duplicates(valid_documents)
+
+        embeddings = get_embeddings()
+        texts = [doc.page_content for doc in valid_documents]
+        with span("embedding") as s:
+            s.set_input(len(texts))
+            if isinstance(embeddings, LocalSentenceEmbeddings):
+                vectors = await asyncio.to_thread(embeddings.encode, texts)
+            else:
+                vectors = await embeddings.aembed_documents(texts)
+            s.set_output(len(vectors))
+
+        vector_store = await asyncio.to_thread(_build_vector_store, valid_documents, texts, vectors, embeddings)
+        logger.info(f"벡터 스토어 생성 완료: {len(valid_documents)}개 문서")
+        return vector_store
+
+    except Exception as e:
+        logger.error(f"Vector DB 생성 중 오류 발생: {str(e)}")
+        logger.error(f"주제: {topic}, 자본금: {capital}, 위험수준: {risk_level}")
+        return None
+
+
 def search_topic(
     topic: str,
     capital: float,
@@ -83,11 +169,37 @@ def search_topic(
     vector_store = get_topic_vector_store(topic, capital, risk_level)
     if not vector_store:
         return []
+    return _search_store(vector_store, topic, k, use_cross_encoder, relevance_threshold)
+
+
+async def asearch_topic(
+    topic: str,
+    capital: float,
+    risk_level: int,
+    k: int = 5,
+    use_cross_encoder: bool = True,
+    relevance_threshold: float = 0.6
+) -> List[Document]:
+    """search_topic 의 비동기 버전 (유사도 검색/재순위화는 스레드에서 실행)"""
+    vector_store = await aget_topic_vector_store(topic, capital, risk_level)
+    if not vector_store:
+        return []
+    return await asyncio.to_thread(_search_store, vector_store, topic, k, use_cross_encoder, relevance_threshold)
 
+
+def _search_store(
+    vector_store: FAISS,
+    topic: str,
+    k: int,
+    use_cross_encoder: bool,
+    relevance_threshold: float
+) -> List[Document]:
     try:
         # 벡터 스토어에서 Similarity Search 수행 (더 많은 결과를 가져와서 필터링)
         initial_k = k * 3 if use_cross_encoder else k
-        documents = vector_store.similarity_search(topic, k=initial_k)
+        with span("vector_search") as s:
+            documents = vector_store.similarity_search(topic, k=initial_k)
+            s.set_output(len(documents))
 
         if not use_cross_encoder or not documents:
             return documents[:k]
@@ -118,7 +230,6 @@ def search_topic(
             metadata['cross_encoder_used'] = True
 
             # 새로운 Document 객체 생성
-            from langchain.schema import Document
             final_doc = Document(
                 page_content=doc.page_content,
                 metadata=metadata
@@ -151,11 +262,39 @@ def search_topic_with_scores(
     vector_store = get_topic_vector_store(topic, capital, risk_level)
     if not vector_store:
         return []
+    return _search_store_with_scores(vector_store, topic, k, use_cross_encoder, relevance_threshold)
+
+
+async def asearch_topic_with_scores(
+    topic: str,
+    capital: float,
+    risk_level: int,
+    k: int = 5,
+    use_cross_encoder: bool = True,
+    relevance_threshold: float = 0.6
+) -> List[tuple]:
+    """search_topic_with_scores 의 비동기 버전 (유사도 검색/재순위화는 스레드에서 실행)"""
+    vector_store = await aget_topic_vector_store(topic, capital, risk_level)
+    if not vector_store:
+        return []
+    return await asyncio.to_thread(
+        _search_store_with_scores, vector_store, topic, k, use_cross_encoder, relevance_threshold
+    )
+
 
+def _search_store_with_scores(
+    vector_store: FAISS,
+    topic: str,
+    k: int,
+    use_cross_encoder: bool,
+    relevance_threshold: float
+) -> List[tuple]:
     try:
         # 벡터 스토어에서 Similarity Search 수행
         initial_k = k * 3 if use_cross_encoder else k
-        documents = vector_store.similarity_search(topic, k=initial_k)
+        with span("vector_search") as s:
+            documents = vector_store.similarity_search(topic, k=initial_k)
+            s.set_output(len(documents))
 
         if not use_cross_encoder or not documents:
             return [(doc, 1.0) for doc in documents[:k]]
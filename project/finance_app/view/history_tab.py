@@ -9,42 +9,81 @@ from common.constants import Mode
 
 logger = logging.getLogger(__name__)
 
+HISTORY_PAGE_SIZE = 10
+
 def render_history_tab():
 
     if st.session_state.get("sessions", "") != "":
-        logger.info(st.session_state['sessions'])
+        user = None
+        if st.session_state.get("user_name", "") != "":
+            user = user_repository.get_user_by_name(user_name=st.session_state.get("user_name"))
 
         col1, col2 = st.columns([1, 1])
 
         with col1:
             if st.button("이력 새로고침", use_container_width=True):
+                st.session_state["history_cursors"] = [None]
                 st.rerun()
 
         with col2:
             if st.button("전체 이력 삭제", type="primary", use_container_width=True):
-                if st.session_state.get("user_name", "") != "":
-                    user_name = st.session_state.get("user_name")
-                    user = user_repository.get_user_by_name(user_name=user_name)
-                    sessions = session_repository.get_session_by_user_id(user.user_id)
-
-                    for s in sessions:
-                        try:
-
-                            result1 = session_repository.delete_session_detail_by_id(s.session_id)
-                            if result1:
-                                logger.info("detail 삭제 완료")
-                            result2 = session_repository.delete_session_by_id(s.session_id)
-                            if result2:
-                                logger.info("session 삭제 완료")
-                        except Exception as e:
-                            logger.error(f"삭제 실패 {str(e)}")
+                if user is not None:
+                    try:
+                        deleted = session_repository.delete_sessions_by_user_id(user.user_id)
+                        logger.info(f"전체 이력 삭제 완료: {deleted}건")
+                    except Exception as e:
+                        logger.error(f"삭제 실패 {str(e)}")
+                    st.session_state["history_cursors"] = [None]
 
-        if st.session_state.get("user_name", "") != "":
-            user_name = st.session_state.get("user_name")
-            user = user_repository.get_user_by_name(user_name=user_name)
-            sessions = session_repository.get_session_by_user_id(user.user_id)
-            if sessions:
-                render_history_list(sessions)
+        if user is not None:
+            search_query = st.text_input(
+                label="이력 검색",
+                placeholder="주제나 리포트 내용으로 검색",
+                key="history_search"
+            )
+            if search_query.strip():
+                render_history_search(user.user_id, search_query)
+            else:
+                render_history_page(user.user_id)
+
+def render_history_search(user_id: int, search_query: str):
+    sessions = session_repository.search_sessions_by_user_id(user_id, search_query, limit=HISTORY_PAGE_SIZE)
+    if sessions:
+        render_history_list(sessions)
+    else:
+        st.caption("검색 결과가 없습니다.")
+
+def render_history_page(user_id: int):
+    # 사용자가 바뀌면 첫 페이지부터 다시 조회
+    if st.session_state.get("history_user_id") != user_id:
+        st.session_state["history_user_id"] = user_id
+        st.session_state["history_cursors"] = [None]
+
+    cursors = st.session_state.setdefault("history_cursors", [None])
+    sessions, next_cursor = session_repository.get_session_list_by_user_id(
+        user_id,
+        limit=HISTORY_PAGE_SIZE,
+        cursor=cursors[-1]
+    )
+
+    # 삭제 등으로 현재 페이지가 비었으면 이전 페이지로 이동
+    if not sessions and len(cursors) > 1:
+        cursors.pop()
+        st.rerun()
+
+    if sessions:
+        render_history_list(sessions)
+
+    if len(cursors) > 1 or next_cursor is not None:
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            if st.button("이전", key="history_prev", disabled=len(cursors) <= 1, use_container_width=True):
+                cursors.pop()
+                st.rerun()
+        with col2:
+            if st.button("다음", key="history_next", disabled=next_cursor is None, use_container_width=True):
+                cursors.append(next_cursor)
+                st.rerun()
 
 def render_history_list(sessions):
     for session in sessions:
@@ -57,15 +96,19 @@ def render_history_list(sessions):
             with col1:
                 parsed_dtm = parse_dtm(session.audit_dtm)
                 st.caption(f"날짜: {parsed_dtm} | 자본금: {session.capital} | 투자성향: {session.risk_level}")
+                snippet = getattr(session, "snippet", None)
+                if snippet:
+                    st.caption(snippet)
 
             with col2:
                 if st.button("보기", key=f"history_{session.session_id}", use_container_width=True):
-                    session_detail = convController.on_history_detail_btn(session.session_id)
-                    if session_detail:
+                    session_summary = convController.on_history_detail_btn(session.session_id)
+                    if session_summary:
                         st.session_state.update({
                             "app_mode": Mode.History,
                             "history_session": session,
-                            "history_session_dtl": session_detail
+                            "history_session_dtl": session_summary,
+                            "history_session_docs": None
                             })
 
             with col3:
@@ -5,7 +5,6 @@ from typing import List, Any, Optional
 from workflow.state import AgentState
 from common.constants import Mode, Agent
 from controller.conv_controller import convController
-from common.utils import str_to_agentState
 from view import sidebar
 
 
@@ -33,6 +32,7 @@ def render_portfolio(stream_gen):
 
         if node_output_body:
             convController.insert_session_result(node_output_body)
+            render_degraded_notice(node_output_body)
             render_source_materials(node_output_body)
 
     logger.info("end of render_portfolio")
@@ -72,35 +72,43 @@ def render_chat_message(node_name: str, response: Optional[str]):
         st.markdown(response)
 
 
+def render_degraded_notice(node_output_body: AgentState):
+    degraded_stages = node_output_body.get("degraded_stages") or []
+    if degraded_stages:
+        st.caption(f"⚠️ 제한시간 초과로 일부 단계를 축소 실행했습니다: {', '.join(degraded_stages)}")
+
+
 def render_source_materials(node_output_body: AgentState):
     logger.info("render_source_materials")
     with st.expander("사용된 참고 자료 보기"):
-        st.subheader(f"시장 데이터 자료")
-        for i, doc in enumerate(node_output_body.get("market_data_docs", [])):
-            st.markdown(f"#### 문서 {i + 1}")
-            if doc.page_content:
-                st.markdown(doc.page_content)
-            st.divider()
-
-        st.subheader(f"정보 검색 자료")
-        for i, doc in enumerate(node_output_body.get("retrieve_docs", [])):
-            st.markdown(f"#### 문서 {i + 1}")
-            if doc.page_content:
-                st.markdown(doc.page_content)
-            source = doc.metadata.get("source")
-            if source:
-                st.markdown(f"- 출처: {source}")
-            st.divider()
+        render_source_documents(node_output_body)
+
+
+def render_source_documents(documents: dict):
+    st.subheader(f"시장 데이터 자료")
+    for i, doc in enumerate(documents.get("market_data_docs", [])):
+        st.markdown(f"#### 문서 {i + 1}")
+        if doc.page_content:
+            st.markdown(doc.page_content)
+        st.divider()
+
+    st.subheader(f"정보 검색 자료")
+    for i, doc in enumerate(documents.get("retrieve_docs", [])):
+        st.markdown(f"#### 문서 {i + 1}")
+        if doc.page_content:
+            st.markdown(doc.page_content)
+        sources = doc.metadata.get("sources") or [doc.metadata.get("source")]
+        for source in filter(None, sources):
+            st.markdown(f"- 출처: {source}")
+        st.divider()
 
 
 def render_history_view():
     logger.info("render_history_view")
     session = st.session_state.get("history_session", None)
-    session_detail = st.session_state.get("history_session_dtl", None)
+    session_summary = st.session_state.get("history_session_dtl", None)
 
-    if session and session_detail:
-        response_str = session_detail.response
-        agentState = str_to_agentState(response_str)
+    if session and session_summary:
         for i in [1, 2, 3, 4]:
             node_name = ""
             if i == 1:
@@ -113,16 +121,30 @@ def render_history_view():
                 node_name = Agent.Portfolio
 
             if node_name == Agent.MarketData:
-                response = agentState.get("market_data_response", None)
+                response = session_summary.get("market_data_response", None)
             elif node_name == Agent.Retrieve:
-                response = agentState.get("retrieve_response", None)
+                response = session_summary.get("retrieve_response", None)
             elif node_name == Agent.Analysis:
-                response = agentState.get("analysis_response", None)
+                response = session_summary.get("analysis_response", None)
             elif node_name == Agent.Portfolio:
-                response = agentState.get("portfolio_response", None)
+                response = session_summary.get("portfolio_response", None)
 
             render_chat_message(node_name, response)
-        render_source_materials(agentState)
+        render_history_source_materials(session.session_id)
+
+
+def render_history_source_materials(session_id: int):
+    # 참고 자료는 펼쳤을 때만 DB 에서 읽어옴
+    if not st.toggle("사용된 참고 자료 보기", key=f"history_docs_{session_id}"):
+        return
+
+    documents = st.session_state.get("history_session_docs", None)
+    if documents is None:
+        documents = convController.on_history_docs_open(session_id)
+        st.session_state["history_session_docs"] = documents
+
+    with st.container(border=True):
+        render_source_documents(documents)
 
 def render_ui():
     render_application()
@@ -31,12 +31,13 @@ class AnalysisAgent(BaseAgent):
         market_docs   = state["market_data_docs"]
         retrieve_docs = state["retrieve_docs"]
 
-        ctx = ""
-        if market_docs:
-            ctx += "[시장 데이터]\n" + super()._format_context(market_docs)
-
-        if retrieve_docs:
-            ctx += "\n[검색 결과]\n" + super()._format_context(retrieve_docs)
+        # 컨텍스트 전략에 따라 원본 문서 또는 앞선 에이전트의 요약을 사용
+        builder = self._context_builder()
+        self._add_upstream_section(builder, "[시장 데이터]", market_docs, state.get("market_data_response", ""), weight=1,
+                                   numbered_positions=state.get("market_data_context_positions"))
+        self._add_upstream_section(builder, "[검색 결과]", retrieve_docs, state.get("retrieve_response", ""), weight=2,
+                                   numbered_positions=state.get("retrieve_context_positions"))
+        ctx = builder.build()
 
         return {
             **state,
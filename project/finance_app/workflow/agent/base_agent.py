@@ -1,11 +1,23 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableLambda
 from langchain.schema import HumanMessage, SystemMessage
 from langgraph.graph import StateGraph, END
 from langfuse.callback import CallbackHandler
 from common.config import get_llm
-from common.constants import Agent
+from common.constants import Agent, ContextStrategy
+from common.context_builder import (
+    ContextBuilder,
+    get_context_budget,
+    get_context_strategy,
+    get_context_top_k,
+    select_top_documents,
+)
+from common.deadline import StageTimeoutError, call_with_timeout, acall_with_timeout, mark_degraded
+from common.metrics import span, messages_size
+from common.resilience import ProviderUnavailableError
 from workflow.state import AgentState, ChatState
 import streamlit as st
 import logging
@@ -18,6 +30,11 @@ from langchain_core.prompts import ChatPromptTemplate
 
 logger = logging.getLogger(__name__)
 
+# LLM 응답이 제한시간 안에 오지 않을 때 사용하는 대체 응답
+LLM_TIMEOUT_MESSAGE = "응답 시간이 초과되어 결과를 생성하지 못했습니다."
+# LLM 제공자 서킷이 열려 호출하지 못했을 때의 대체 응답
+LLM_UNAVAILABLE_MESSAGE = "AI 서비스 요청이 일시적으로 많아 결과를 생성하지 못했습니다. 잠시 후 다시 시도해주세요."
+
 class _PlanModel(BaseModel):
     steps: List[str] = Field(description="Ordered steps to follow")
 
@@ -42,12 +59,16 @@ class BaseAgent(ABC):
         self._setup_graph()
         self.langfuse_session_id = langfuse_session_id
         self.plan_enabled = plan_enabled
+        self.context_budget = get_context_budget(self.__class__.__name__)
+        self.context_strategy = get_context_strategy(self.__class__.__name__)
+        self.context_top_k = get_context_top_k(self.__class__.__name__)
 
     def _setup_graph(self):
         workflow = StateGraph(AgentState)
-        workflow.add_node("retrieve_context", self._retrieve_context)
+        # invoke/stream 은 동기 함수, ainvoke/astream 은 비동기 함수로 실행
+        workflow.add_node("retrieve_context", RunnableLambda(self._retrieve_context, afunc=self._aretrieve_context))
         workflow.add_node("prepare_messages", self._prepare_messages)
-        workflow.add_node("generate_response", self._generate_response)
+        workflow.add_node("generate_response", RunnableLambda(self._generate_response, afunc=self._agenerate_response))
 
         workflow.add_edge("retrieve_context", "prepare_messages")
         workflow.add_edge("prepare_messages", "generate_response")
@@ -60,25 +81,47 @@ class BaseAgent(ABC):
     def _retrieve_context(self, state: AgentState) -> AgentState:
         pass
 
+    async def _aretrieve_context(self, state: AgentState) -> AgentState:
+        # 외부 I/O 가 없는 에이전트는 동기 구현을 그대로 사용
+        return self._retrieve_context(state)
+
     @abstractmethod
     def _create_prompt(self, state: AgentState) -> str:
         pass
 
-    # 검색 결과로 Context 생성
+    # 검색 결과로 Context 생성 (에이전트 토큰 예산 적용)
     def _format_context(self, docs) -> str:
-        # 문자열을 그대로 받으면 바로 반환
-        if isinstance(docs, str):
-            return docs
-
-        context = ""
-        for i, doc in enumerate(docs):
-            source = doc.metadata.get("source", "Unknown")
-            section = doc.metadata.get("section", "")
-            context += f"[문서 {i + 1}] 출처: {source}"
-            if section:
-                context += f", 섹션: {section}"
-            context += f"\n{doc.page_content}\n\n"
-        return context
+        return self._render_context(docs)[0]
+
+    # Context 와 함께 [문서 N] 순서로 실린 문서의 docs 내 위치를 반환 (하위 에이전트의 인용 해석용)
+    def _render_context(self, docs) -> Tuple[str, List[int]]:
+        builder = self._context_builder().add_section("", docs)
+        context = builder.build()
+        return context, builder.rendered_positions.get("", [])
+
+    def _context_builder(self) -> ContextBuilder:
+        return ContextBuilder(budget_tokens=self.context_budget)
+
+    # 앞선 에이전트의 결과를 컨텍스트 전략에 따라 섹션으로 추가
+    def _add_upstream_section(
+        self,
+        builder: ContextBuilder,
+        title: str,
+        docs,
+        summary: str,
+        weight: float = 1.0,
+        numbered_positions: Optional[List[int]] = None,
+    ) -> ContextBuilder:
+        # 요약이 없으면 전략과 관계없이 원본 문서를 사용
+        if self.context_strategy == ContextStrategy.Raw or not summary:
+            return builder.add_section(title, docs, weight=weight)
+
+        builder.add_section(f"{title} 요약", summary, weight=weight)
+        if self.context_strategy == ContextStrategy.SummaryTopK:
+            # 요약의 [문서 N] 은 앞선 에이전트 컨텍스트의 번호이므로 그 번호 순서로 해석
+            top_docs = select_top_documents(docs, summary, self.context_top_k, numbered_positions)
+            builder.add_section(f"{title} 주요 문서", top_docs, weight=weight)
+        return builder
 
     def _prepare_messages(self, state: AgentState) -> AgentState:
         messages = [SystemMessage(content=self.system_prompt)]
@@ -100,21 +143,76 @@ class BaseAgent(ABC):
         return {**state, "messages": messages}
 
     def _generate_response(self, state: AgentState) -> AgentState:
-        messages = state["messages"]
-        response = get_llm().invoke(messages)
-
+        agent_name = self.__class__.__name__
+        try:
+            content = call_with_timeout("llm", self._invoke_llm, state["messages"], state=state, required=True)
+        except ProviderUnavailableError as e:
+            state = mark_degraded(state, f"llm:{agent_name}", e)
+            return self._apply_response(state, LLM_UNAVAILABLE_MESSAGE)
+        except StageTimeoutError as e:
+            if not state.get("context"):
+                state = mark_degraded(state, f"llm:{agent_name}", e)
+                return self._apply_response(state, LLM_TIMEOUT_MESSAGE)
+            # 컨텍스트 없이 한 번 더 시도
+            state = mark_degraded(state, f"llm_context:{agent_name}", e)
+            messages = self._prepare_messages({**state, "context": ""})["messages"]
+            try:
+                content = call_with_timeout("llm", self._invoke_llm, messages, state=state, required=True)
+            except (StageTimeoutError, ProviderUnavailableError) as e:
+                state = mark_degraded(state, f"llm:{agent_name}", e)
+                content = LLM_TIMEOUT_MESSAGE
+
+        return self._apply_response(state, content)
+
+    async def _agenerate_response(self, state: AgentState) -> AgentState:
+        agent_name = self.__class__.__name__
+        try:
+            content = await acall_with_timeout("llm", self._ainvoke_llm(state["messages"]), state=state, required=True)
+        except ProviderUnavailableError as e:
+            state = mark_degraded(state, f"llm:{agent_name}", e)
+            return self._apply_response(state, LLM_UNAVAILABLE_MESSAGE)
+        except StageTimeoutError as e:
+            if not state.get("context"):
+                state = mark_degraded(state, f"llm:{agent_name}", e)
+                return self._apply_response(state, LLM_TIMEOUT_MESSAGE)
+            # 컨텍스트 없이 한 번 더 시도
+            state = mark_degraded(state, f"llm_context:{agent_name}", e)
+            messages = self._prepare_messages({**state, "context": ""})["messages"]
+            try:
+                content = await acall_with_timeout("llm", self._ainvoke_llm(messages), state=state, required=True)
+            except (StageTimeoutError, ProviderUnavailableError) as e:
+                state = mark_degraded(state, f"llm:{agent_name}", e)
+                content = LLM_TIMEOUT_MESSAGE
+
+        return self._apply_response(state, content)
+
+    def _invoke_llm(self, messages: List[BaseMessage]) -> str:
+        with span("llm", agent=self.__class__.__name__) as s:
+            s.set_input(messages_size(messages))
+            response = get_llm().invoke(messages)
+            s.record_llm_response(response)
+        return response.content
+
+    async def _ainvoke_llm(self, messages: List[BaseMessage]) -> str:
+        with span("llm", agent=self.__class__.__name__) as s:
+            s.set_input(messages_size(messages))
+            response = await get_llm().ainvoke(messages)
+            s.record_llm_response(response)
+        return response.content
+
+    def _apply_response(self, state: AgentState, content: str) -> AgentState:
         updates: Dict[str, Any] = {
-            "response": response.content
+            "response": content
         }
 
         if state["agent_id"] == 1:
-            updates["market_data_response"] = response.content
+            updates["market_data_response"] = content
         elif state["agent_id"] == 2:
-            updates["retrieve_response"] = response.content
+            updates["retrieve_response"] = content
         elif state["agent_id"] == 3:
-            updates["analysis_response"] = response.content
+            updates["analysis_response"] = content
         elif state["agent_id"] == 4:
-            updates["portfolio_response"] = response.content
+            updates["portfolio_response"] = content
 
         return {**state, **updates}
 
@@ -169,6 +267,22 @@ Completed steps (step, result):
         return self.graph.invoke(step_state, config={"callbacks": [langfuse_handler]})
 
     def run(self, state: AgentState) -> AgentState:
+        with span("agent", agent=self.__class__.__name__):
+            return self._run(state)
+
+    async def arun(self, state: AgentState) -> AgentState:
+        with span("agent", agent=self.__class__.__name__):
+            return await self._arun(state)
+
+    async def _arun(self, state: AgentState) -> AgentState:
+        if not getattr(self, "plan_enabled", False):
+            langfuse_handler = CallbackHandler(session_id=self.langfuse_session_id)
+            return await self.graph.ainvoke(state, config={"callbacks": [langfuse_handler]})
+
+        # Plan-and-execute 모드는 동기 루프를 스레드에서 실행
+        return await asyncio.to_thread(self._run, state)
+
+    def _run(self, state: AgentState) -> AgentState:
         if not getattr(self, "plan_enabled", False):
             langfuse_handler = CallbackHandler(session_id=self.langfuse_session_id)
             result = self.graph.invoke(state, config={"callbacks":[langfuse_handler]})
@@ -180,7 +294,8 @@ Completed steps (step, result):
         objective = self._build_objective(state)
 
         # Initial plan
-        plan_obj = planner.invoke({"messages": [("user", objective)]})
+        with span("llm", agent=self.__class__.__name__, purpose="plan"):
+            plan_obj = planner.invoke({"messages": [("user", objective)]})
         plan: List[str] = plan_obj.steps if plan_obj and plan_obj.steps else []
 
         working_state: AgentState = {**state}
@@ -195,11 +310,12 @@ Completed steps (step, result):
 
             if not plan:
                 # If no plan left, ask replanner whether to respond now
-                act = replanner.invoke({
-                    "input": objective,
-                    "plan": plan,
-                    "past_steps": past_steps,
-                })
+                with span("llm", agent=self.__class__.__name__, purpose="replan"):
+                    act = replanner.invoke({
+                        "input": objective,
+                        "plan": plan,
+                        "past_steps": past_steps,
+                    })
                 if isinstance(act.action, _ResponseModel):
                     final_text = act.action.response
                     # Update response fields coherently with existing behavior
@@ -229,11 +345,12 @@ Completed steps (step, result):
             plan = remaining_plan
 
             # Replan after each step
-            act = replanner.invoke({
-                "input": objective,
-                "plan": plan,
-                "past_steps": past_steps,
-            })
+            with span("llm", agent=self.__class__.__name__, purpose="replan"):
+                act = replanner.invoke({
+                    "input": objective,
+                    "plan": plan,
+                    "past_steps": past_steps,
+                })
             if isinstance(act.action, _ResponseModel):
                 final_text = act.action.response
                 updates: Dict[str, Any] = {"response": final_text}
@@ -1,6 +1,15 @@
 from workflow.agent.base_agent import BaseAgent
 from workflow.state import AgentState
-from retrieval.market_data_service import suggest_related_tickers, get_market_data
+from retrieval.market_data_service import (
+    suggest_related_tickers,
+    get_market_data,
+    asuggest_related_tickers,
+    aget_market_data,
+    get_cached_market_data,
+    FALLBACK_TICKERS,
+)
+from common.deadline import StageTimeoutError, call_with_timeout, acall_with_timeout, mark_degraded
+from common.resilience import ProviderUnavailableError
 from typing import Dict, Any
 from common.constants import Agent
 
@@ -41,15 +50,53 @@ class MarketDataAgent(BaseAgent):
         capital = chat_state["capital"]
         risk_level = chat_state["risk_level"]
 
-        tickers = suggest_related_tickers(topic, capital, risk_level)
-        documents = get_market_data(tickers)
+        # 제한시간을 넘기면 기본 티커 / 마지막 조회 데이터로 대체
+        try:
+            tickers = call_with_timeout("ticker_suggestion", suggest_related_tickers, topic, capital, risk_level, state=state)
+        except (StageTimeoutError, ProviderUnavailableError) as e:
+            state = mark_degraded(state, "ticker_suggestion", e)
+            tickers = list(FALLBACK_TICKERS)
 
-        context = super()._format_context(documents)
+        try:
+            documents = call_with_timeout("market_data", get_market_data, tickers, state=state)
+        except StageTimeoutError as e:
+            state = mark_degraded(state, "market_data", e)
+            documents = get_cached_market_data(tickers)
+
+        return self._market_data_state(state, documents)
+
+    async def _aretrieve_context(self, state: AgentState) -> AgentState:
+
+        if self.rag == False:
+            return {**state, "agent_id": 1, "context": ""}
+
+        chat_state = state["chat_state"]
+        try:
+            tickers = await acall_with_timeout(
+                "ticker_suggestion",
+                asuggest_related_tickers(chat_state["topic"], chat_state["capital"], chat_state["risk_level"]),
+                state=state,
+            )
+        except (StageTimeoutError, ProviderUnavailableError) as e:
+            state = mark_degraded(state, "ticker_suggestion", e)
+            tickers = list(FALLBACK_TICKERS)
+
+        try:
+            documents = await acall_with_timeout("market_data", aget_market_data(tickers), state=state)
+        except StageTimeoutError as e:
+            state = mark_degraded(state, "market_data", e)
+            documents = get_cached_market_data(tickers)
+
+        return self._market_data_state(state, documents)
+
+    def _market_data_state(self, state: AgentState, documents) -> AgentState:
+        context, context_positions = super()._render_context(documents)
 
         return {
             **state,
             "agent_id": 1,
             "market_data_docs": documents,
+            "market_data_context_positions": context_positions,
             "context": context,
             }
 
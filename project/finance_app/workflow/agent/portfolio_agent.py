@@ -35,14 +35,13 @@ class PortfolioAgent(BaseAgent):
         retrieve_docs = state["retrieve_docs"]
         analysis = state["analysis_response"]
 
-        ctx = ""
-
-        if market_docs:
-            ctx += "[시장 데이터]\n" + super()._format_context(market_docs)
-        if retrieve_docs:
-            ctx += "\n[검색 결과]\n" + super()._format_context(retrieve_docs)
-        if analysis:
-            ctx += "\n[분석 결과]\n" + super()._format_context(analysis)
+        # 토큰 예산이 부족하면 분석 결과 > 검색 결과 > 시장 데이터 순으로 우선 배분
+        builder = self._context_builder()
+        self._add_upstream_section(builder, "[시장 데이터]", market_docs, state.get("market_data_response", ""), weight=1,
+                                   numbered_positions=state.get("market_data_context_positions"))
+        self._add_upstream_section(builder, "[검색 결과]", retrieve_docs, state.get("retrieve_response", ""), weight=2,
+                                   numbered_positions=state.get("retrieve_context_positions"))
+        ctx = builder.add_section("[분석 결과]", analysis, weight=3).build()
 
         return {
             **state,
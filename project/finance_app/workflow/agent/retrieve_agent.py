@@ -1,8 +1,9 @@
 from typing import Dict, Any
 from workflow.agent.base_agent import BaseAgent
 from workflow.state import AgentState
-from retrieval.vector_store import search_topic, search_topic_with_scores
+from retrieval.vector_store import search_topic, search_topic_with_scores, asearch_topic, asearch_topic_with_scores
 from retrieval.cross_encoder_service import get_cross_encoder_service
+from common.deadline import StageTimeoutError, call_with_timeout, acall_with_timeout, mark_degraded
 import logging
 
 logger = logging.getLogger(__name__)
@@ -39,9 +40,19 @@ class RetrieveAgent(BaseAgent):
 
         chat_state = state["chat_state"]
         topic = chat_state["topic"]
-        capital = chat_state["capital"]
-        risk_level = chat_state["risk_level"]
 
+        # 제한시간을 넘기면 뉴스 검색을 생략
+        try:
+            documents, relevance_scores = call_with_timeout(
+                "retrieve", self._search_documents, topic, chat_state["capital"], chat_state["risk_level"], state=state
+            )
+        except StageTimeoutError as e:
+            state = mark_degraded(state, "retrieve", e)
+            documents, relevance_scores = [], []
+
+        return self._retrieve_state(state, topic, documents, relevance_scores)
+
+    def _search_documents(self, topic: str, capital: float, risk_level: int) -> tuple:
         # 크로스 인코더 사용 여부에 따라 다른 검색 방법 사용
         if self.use_cross_encoder:
             # 크로스 인코더를 사용한 고품질 검색
@@ -52,19 +63,9 @@ class RetrieveAgent(BaseAgent):
                 use_cross_encoder=True,
                 relevance_threshold=0.6
             )
+            documents, relevance_scores = self._split_scores(documents_with_scores)
 
-            # 점수 정보를 포함하여 문서 추출
-            documents = []
-            relevance_scores = []
-            for doc, score in documents_with_scores:
-                documents.append(doc)
-                relevance_scores.append(score)
-
-            # 안전한 로깅 (빈 리스트 체크)
-            if relevance_scores:
-                logger.info(f"크로스 인코더 검색 결과: {len(documents)}개 문서, 점수 범위: {min(relevance_scores):.3f}~{max(relevance_scores):.3f}")
-            else:
-                logger.warning("크로스 인코더 검색 결과가 없습니다.")
+            if not documents:
                 # 기존 방식으로 검색
                 documents = search_topic(
                     topic=topic,
@@ -83,6 +84,65 @@ class RetrieveAgent(BaseAgent):
             )
             relevance_scores = [1.0] * len(documents)
 
+        return documents, relevance_scores
+
+    async def _aretrieve_context(self, state: AgentState) -> AgentState:
+
+        if self.rag == False:
+            return {**state, "agent_id": 2, "context": ""}
+
+        chat_state = state["chat_state"]
+        topic = chat_state["topic"]
+
+        try:
+            documents, relevance_scores = await acall_with_timeout(
+                "retrieve", self._asearch_documents(topic, chat_state["capital"], chat_state["risk_level"]), state=state
+            )
+        except StageTimeoutError as e:
+            state = mark_degraded(state, "retrieve", e)
+            documents, relevance_scores = [], []
+
+        return self._retrieve_state(state, topic, documents, relevance_scores)
+
+    async def _asearch_documents(self, topic: str, capital: float, risk_level: int) -> tuple:
+        documents, relevance_scores = [], []
+        if self.use_cross_encoder:
+            documents_with_scores = await asearch_topic_with_scores(
+                topic=topic,
+                capital=capital,
+                risk_level=risk_level,
+                use_cross_encoder=True,
+                relevance_threshold=0.6
+            )
+            documents, relevance_scores = self._split_scores(documents_with_scores)
+
+        if not documents:
+            documents = await asearch_topic(
+                topic=topic,
+                capital=capital,
+                risk_level=risk_level,
+                use_cross_encoder=False
+            )
+            relevance_scores = [1.0] * len(documents)
+
+        return documents, relevance_scores
+
+    def _split_scores(self, documents_with_scores) -> tuple:
+        # 점수 정보를 포함하여 문서 추출
+        documents = []
+        relevance_scores = []
+        for doc, score in documents_with_scores:
+            documents.append(doc)
+            relevance_scores.append(score)
+
+        # 안전한 로깅 (빈 리스트 체크)
+        if relevance_scores:
+            logger.info(f"크로스 인코더 검색 결과: {len(documents)}개 문서, 점수 범위: {min(relevance_scores):.3f}~{max(relevance_scores):.3f}")
+        else:
+            logger.warning("크로스 인코더 검색 결과가 없습니다.")
+        return documents, relevance_scores
+
+    def _retrieve_state(self, state: AgentState, topic: str, documents, relevance_scores) -> AgentState:
         # 검색 결과가 없는 경우 처리
         if not documents:
             logger.warning(f"주제 '{topic}'에 대한 검색 결과가 없습니다.")
@@ -90,6 +150,7 @@ class RetrieveAgent(BaseAgent):
                 **state,
                 "agent_id": 2,
                 "retrieve_docs": [],
+                "retrieve_context_positions": [],
                 "context": "검색 결과가 없습니다.",
                 "relevance_scores": [],
                 "cross_encoder_used": self.use_cross_encoder
@@ -128,12 +189,13 @@ class RetrieveAgent(BaseAgent):
                 doc.metadata['relevance_score'] = score
                 doc.metadata['final_rank'] = i + 1
 
-        context = super()._format_context(final_documents)
+        context, context_positions = super()._render_context(final_documents)
 
         return {
             **state,
             "agent_id": 2,
             "retrieve_docs": final_documents,
+            "retrieve_context_positions": context_positions,
             "context": context,
             "relevance_scores": relevance_scores,
             "cross_encoder_used": self.use_cross_encoder
@@ -146,8 +208,7 @@ class RetrieveAgent(BaseAgent):
         context = state["context"]
         cross_encoder_used = state.get("cross_encoder_used", False)
 
-        logger.info(f"context: {context}")
-        logger.info(f"state: {state}")
+        logger.debug(f"context: {len(context)}자, 문서 {len(state.get('retrieve_docs', []))}개")
 
         # 크로스 인코더 사용 여부에 따른 프롬프트 조정
         cross_encoder_info = ""
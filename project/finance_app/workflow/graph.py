@@ -1,3 +1,4 @@
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 from workflow.state import AgentState
 from common.constants import Agent
@@ -18,10 +19,11 @@ def create_graph(rag: bool, langfuse_session_id: str = None, plan_enabled: bool
     portfolio_agent = PortfolioAgent(rag=rag, langfuse_session_id=langfuse_session_id, plan_enabled=plan_enabled)
 
 
-    workflow.add_node(Agent.MarketData, market_data_agent.run)
-    workflow.add_node(Agent.Retrieve, retrieve_agent.run)
-    workflow.add_node(Agent.Analysis, analysis_agent.run)
-    workflow.add_node(Agent.Portfolio, portfolio_agent.run)
+    # stream/invoke 는 run, astream/ainvoke 는 arun 으로 실행
+    workflow.add_node(Agent.MarketData, RunnableLambda(market_data_agent.run, afunc=market_data_agent.arun))
+    workflow.add_node(Agent.Retrieve, RunnableLambda(retrieve_agent.run, afunc=retrieve_agent.arun))
+    workflow.add_node(Agent.Analysis, RunnableLambda(analysis_agent.run, afunc=analysis_agent.arun))
+    workflow.add_node(Agent.Portfolio, RunnableLambda(portfolio_agent.run, afunc=portfolio_agent.arun))
 
     workflow.add_edge(Agent.MarketData, Agent.Retrieve)
     workflow.add_edge(Agent.Retrieve, Agent.Analysis)
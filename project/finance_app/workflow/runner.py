@@ -0,0 +1,106 @@
+"""
+에이전트 그래프 실행 헬퍼
+
+- create_initial_state: ChatState 로 그래프 초기 상태 생성
+- arun_report / arun_reports: astream 으로 리포트를 비동기 실행.
+  하나의 이벤트 루프에서 여러 리포트를 동시에 처리할 수 있습니다.
+"""
+import asyncio
+import logging
+import uuid
+from typing import Any, List, Optional, Sequence
+
+from langfuse.callback import CallbackHandler
+
+from common.deadline import new_report_deadline
+from workflow.graph import create_graph
+from workflow.state import AgentState, ChatState
+
+logger = logging.getLogger(__name__)
+
+
+def create_initial_state(chat_state: ChatState) -> AgentState:
+    return {
+        "chat_state": chat_state,
+        "agent_id": 0,
+        "market_data_docs": [],
+        "market_data_context_positions": [],
+        "market_data_response": "",
+        "retrieve_docs": [],
+        "retrieve_context_positions": [],
+        "retrieve_response": "",
+        "analysis_response": "",
+        "portfolio_response": "",
+        "context": "",
+        "messages": [],
+        "response": "",
+        "deadline": new_report_deadline(),
+        "degraded_stages": []
+    }
+
+
+def extract_portfolio_state(chunk: Any) -> Optional[AgentState]:
+    """stream/astream(subgraphs=True, stream_mode="updates") 청크에서 최종(포트폴리오) 상태를 꺼냅니다."""
+    if not chunk or len(chunk) < 2:
+        return None
+    update = chunk[1]
+    body = update.get("generate_response") if isinstance(update, dict) else None
+    if body and body.get("portfolio_response"):
+        return body
+    return None
+
+
+async def arun_report(
+    chat_state: ChatState,
+    rag: bool = True,
+    langfuse_session_id: str = None,
+    graph=None,
+) -> Optional[AgentState]:
+    """
+    리포트 1건을 astream 으로 실행하고 최종 상태를 반환합니다.
+
+    Args:
+        chat_state: 사용자 입력 정보
+        rag: RAG 사용 여부
+        langfuse_session_id: Langfuse 세션 ID (None이면 새로 생성)
+        graph: 재사용할 그래프 (None이면 새로 생성)
+    """
+    langfuse_session_id = langfuse_session_id or str(uuid.uuid4())
+    graph = graph or create_graph(rag=rag, langfuse_session_id=langfuse_session_id)
+    langfuse_handler = CallbackHandler(session_id=langfuse_session_id)
+
+    final_state = None
+    async for chunk in graph.astream(
+        create_initial_state(chat_state),
+        config={"callbacks": [langfuse_handler]},
+        subgraphs=True,
+        stream_mode="updates",
+    ):
+        body = extract_portfolio_state(chunk)
+        if body:
+            final_state = body
+    return final_state
+
+
+async def arun_reports(
+    chat_states: Sequence[ChatState],
+    rag: bool = True,
+    concurrency: int = 8,
+) -> List[Any]:
+    """
+    여러 리포트를 하나의 이벤트 루프에서 동시에 실행합니다.
+
+    Returns:
+        입력 순서대로 최종 상태 또는 발생한 예외
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(chat_state: ChatState):
+        async with semaphore:
+            return await arun_report(chat_state, rag=rag)
+
+    results = await asyncio.gather(*(run_one(c) for c in chat_states), return_exceptions=True)
+    failed = sum(1 for r in results if isinstance(r, BaseException))
+    if failed:
+        logger.warning(f"비동기 리포트 {len(results)}건 중 {failed}건 실패")
+    return list(results)
@@ -30,10 +30,12 @@ class AgentState(TypedDict):
 
     # MarketDataAgent 결과
     market_data_docs: List[Document] # 수집된 시세/지표 데이터 문서들
+    market_data_context_positions: List[int]  # context 에 [문서 N] 순서로 실린 market_data_docs 위치
     market_data_response: str        # MarketDataAgent의 LLM 해석 결과
 
     # RetrieverAgent 결과
     retrieve_docs: List[Document]    # 수집된 뉴스/리포트 문서들
+    retrieve_context_positions: List[int]  # context 에 [문서 N] 순서로 실린 retrieve_docs 위치
     retrieve_response: str           # RetrieverAgent의 요약/해석 결과
 
     # AnalysisAgent 결과
@@ -47,6 +49,10 @@ class AgentState(TypedDict):
     messages: List[BaseMessage]      # 이번 Agent에서 전달할 LLM messages
     response: str                    # 이번 Agent에서 받은 LLM 응답
 
+    # 제한시간/축소 실행 (optional)
+    deadline: float                  # 리포트 마감 시각 (time.time 기준)
+    degraded_stages: List[str]       # 제한시간 초과로 축소 실행된 단계
+
     # Plan & Execute (optional)
     plan: List[str]                  # 현재 에이전트가 수행할 계획 단계 목록
     past_steps: List[tuple]          # (step, result) 형태의 완료된 단계 기록